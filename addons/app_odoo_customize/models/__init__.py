@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from . import app_data_cleanup
+from . import ir_config_parameter
 from . import res_config_settings
 from . import base_language_install
 from . import ir_module_module
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from psycopg2 import sql
+
+from odoo import api, models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class AppDataCleanup(models.AbstractModel):
+    """
+    清数据计划：按外键依赖排序，单事务执行。
+    Plans the removal of all rows of a set of models: the tables are ordered on their foreign keys
+    and the whole removal runs in the current transaction, so a failure leaves nothing half deleted.
+    """
+    _name = 'app.data.cleanup'
+    _description = 'App Data Cleanup Planner'
+
+    @api.model
+    def _get_tables(self, model_names):
+        """ 模型对应的已存在的表，保持顺序. Existing tables of the models, in order. """
+        tables = []
+        for name in model_names:
+            model = self.env.registry.get(name)
+            if model is not None and (model._abstract or not model._auto):
+                continue
+            # 有时安装出错数据乱，没有 model 但有 table
+            table = model._table if model is not None else name.replace('.', '_')
+            self.env.cr.execute("SELECT to_regclass(%s) IS NOT NULL", [table])
+            if self.env.cr.fetchone()[0] and table not in tables:
+                tables.append(table)
+        return tables
+
+    @api.model
+    def _get_foreign_keys(self):
+        """
+        [(referencing table, referenced table, on delete, all columns not null)] of the public schema.
+        """
+        self.env.cr.execute("""
+            SELECT src.relname, dst.relname, con.confdeltype,
+                   bool_and(att.attnotnull)
+              FROM pg_constraint con
+              JOIN pg_class src ON src.oid = con.conrelid
+              JOIN pg_class dst ON dst.oid = con.confrelid
+              JOIN pg_namespace ns ON ns.oid = src.relnamespace
+              JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = ANY(con.conkey)
+             WHERE con.contype = 'f' AND ns.nspname = current_schema()
+          GROUP BY con.oid, src.relname, dst.relname, con.confdeltype
+        """)
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _plan(self, model_names):
+        """
+        Compute how to empty the tables of ``model_names``.
+
+        Tables whose rows would all be removed by ON DELETE CASCADE anyway (not null foreign key,
+        e.g. many2many relations) are added to the selection. A table is truncated when every table
+        referencing it is emptied too, so the TRUNCATE can never reach data outside the plan; it is
+        issued without CASCADE for the same reason, PostgreSQL refuses rather than widening it.
+        The other tables are deleted from, referencing tables before the tables they reference.
+
+        :return: {'truncate': [tables], 'delete': [tables in order], 'cascade': [tables added]}
+        """
+        selected = self._get_tables(model_names)
+        foreign_keys = [fk for fk in self._get_foreign_keys() if fk[0] != fk[1]]
+        referencing = {}
+        for src, dst, on_delete, not_null in foreign_keys:
+            referencing.setdefault(dst, []).append((src, on_delete, not_null))
+
+        # 级联必然清空的表
+        emptied = list(selected)
+        index = 0
+        while index < len(emptied):
+            for src, on_delete, not_null in referencing.get(emptied[index], ()):
+                if on_delete == 'c' and not_null and src not in emptied:
+                    emptied.append(src)
+            index += 1
+
+        # 所有引用方都被清空的表才可 truncate
+        truncate = set(emptied)
+        changed = True
+        while changed:
+            changed = False
+            for table in list(truncate):
+                if any(src not in truncate for src, _on_delete, _not_null in referencing.get(table, ())):
+                    truncate.discard(table)
+                    changed = True
+
+        # 其余按外键拓扑排序后 delete
+        delete = [table for table in selected if table not in truncate]
+        depends = {table: set() for table in delete}
+        for src, dst, _on_delete, _not_null in foreign_keys:
+            if src in depends and dst in depends:
+                depends[dst].add(src)
+        ordered = []
+        while depends:
+            ready = [table for table in delete if table in depends and not depends[table]]
+            if not ready:
+                # 循环引用：按原顺序继续，由数据库校验
+                ready = [next(table for table in delete if table in depends)]
+            for table in ready:
+                ordered.append(table)
+                del depends[table]
+                for waiting in depends.values():
+                    waiting.discard(table)
+        return {
+            'truncate': [table for table in emptied if table in truncate],
+            'delete': ordered,
+            'cascade': [table for table in emptied if table not in selected],
+        }
+
+    @api.model
+    def _estimate_rows(self, tables):
+        """ 统计信息中的估算行数. Planner estimate of the row count, without scanning. """
+        if not tables:
+            return {}
+        self.env.cr.execute("""
+            SELECT relname, GREATEST(reltuples, 0)::bigint
+              FROM pg_class
+             WHERE relname IN %s AND relkind = 'r' AND relnamespace = current_schema()::regnamespace
+        """, [tuple(tables)])
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _run(self, model_names, dry_run=False):
+        """
+        执行清数据计划，dry_run 只估算。
+        Empty the tables of ``model_names`` in the current transaction, or only estimate it.
+
+        :return: list of {'table', 'method', 'rows', 'estimate'} in execution order
+        """
+        plan = self._plan(model_names)
+        steps = [(table, 'truncate') for table in plan['truncate']] + [(table, 'delete') for table in plan['delete']]
+        if dry_run:
+            estimates = self._estimate_rows([table for table, _method in steps])
+            return [{'table': table, 'method': method, 'rows': estimates.get(table, 0), 'estimate': True}
+                    for table, method in steps]
+
+        self.env.flush_all()
+        cr = self.env.cr
+        report = []
+        for table in plan['truncate']:
+            cr.execute(sql.SQL("SELECT count(*) FROM {}").format(sql.Identifier(table)))
+            report.append({'table': table, 'method': 'truncate', 'rows': cr.fetchone()[0], 'estimate': False})
+        if plan['truncate']:
+            _logger.info('remove data: truncate %s', ', '.join(plan['truncate']))
+            cr.execute(sql.SQL("TRUNCATE {}").format(
+                sql.SQL(', ').join(sql.Identifier(table) for table in plan['truncate'])))
+        for step, table in enumerate(plan['delete'], 1):
+            try:
+                with cr.savepoint(flush=False):
+                    cr.execute(sql.SQL("DELETE FROM {}").format(sql.Identifier(table)))
+                    rows = cr.rowcount
+            except Exception as e:
+                raise UserError(_('Cannot remove the data of table %s, nothing has been removed: %s') % (table, e))
+            report.append({'table': table, 'method': 'delete', 'rows': rows, 'estimate': False})
+            _logger.info('remove data: [%s/%s] delete from %s, %s rows', step, len(plan['delete']), table, rows)
+        self.env.invalidate_all()
+        return report
+
+    @api.model
+    def _format_report(self, report, dry_run=False):
+        if not report:
+            return _('Nothing to remove.')
+        lines = ['%s: %s%s (%s)' % (line['table'], '~' if line['estimate'] else '', line['rows'], line['method'])
+                 for line in report]
+        total = sum(line['rows'] for line in report)
+        title = _('Would remove about %s rows') if dry_run else _('Removed %s rows')
+        return '%s\n%s' % (title % total, '\n'.join(lines))
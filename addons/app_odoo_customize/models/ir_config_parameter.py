@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, models, tools
+
+# app_* parameters read on every web client load, with their get_param defaults
+APP_SETTINGS_DEFAULTS = {
+    'app_system_name': 'odooAi',
+    'app_documentation_url': False,
+    'app_documentation_dev_url': False,
+    'app_support_url': False,
+    'app_account_title': False,
+    'app_account_url': False,
+    'app_show_lang': False,
+    'app_show_debug': False,
+    'app_show_documentation': False,
+    'app_show_documentation_dev': False,
+    'app_show_support': False,
+    'app_show_account': False,
+    'app_show_poweredby': False,
+    'app_navbar_pos_pc': 'top',
+    'app_navbar_pos_mobile': 'top',
+    'app_debug_only_admin': False,
+    'app_stop_subscribe': False,
+}
+
+
+class IrConfigParameter(models.Model):
+    _inherit = 'ir.config_parameter'
+
+    @api.model
+    @tools.ormcache()
+    def _get_app_settings(self):
+        """
+        所有 app_* 参数及已启用语言，一次查询后缓存。
+        Every app_* parameter and the active languages, loaded with one query per table and cached.
+        ir.config_parameter and res.lang clear the registry cache on create/write/unlink, which drops
+        this bundle whenever one of its parameters or languages changes.
+        """
+        self.env.cr.execute("""
+            SELECT key, value FROM ir_config_parameter WHERE key IN %s
+        """, [tuple(APP_SETTINGS_DEFAULTS)])
+        settings = dict(APP_SETTINGS_DEFAULTS)
+        settings.update((key, value) for key, value in self.env.cr.fetchall() if value)
+        self.env['res.lang'].flush_model(['code', 'name', 'active'])
+        self.env.cr.execute("""
+            SELECT id, code, name FROM res_lang WHERE active ORDER BY name
+        """)
+        settings['app_lang_list'] = tuple(self.env.cr.fetchall())
+        return settings
+
+    @api.model
+    def get_app_settings(self):
+        """ 返回副本，调用方可修改. A copy of the cached bundle, safe to modify. """
+        settings = dict(self._get_app_settings())
+        settings['app_lang_list'] = [
+            {'id': lang_id, 'code': code, 'name': name} for lang_id, code, name in settings['app_lang_list']
+        ]
+        return settings
@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models, modules, tools, _
+from collections import defaultdict
+
+from odoo import addons, api, fields, models, modules, release, tools, _
 
 import operator
 
+from ..tools import module_index
+
 
 class IrModule(models.Model):
     _inherit = 'ir.module.module'
@@ -66,18 +70,31 @@ class IrModule(models.Model):
 
     def update_list(self):
         res = super(IrModule, self).update_list()
-        default_version = modules.adapt_version('1.0')
-        known_mods = self.with_context(lang=None).search([])
-        known_mods_names = {mod.name: mod for mod in known_mods}
-        # 处理可更新字段， 不要compute，会出错
-        for mod_name in modules.get_modules():
-            mod = known_mods_names.get(mod_name)
-            installed_version = self.get_module_info(mod.name).get('version', default_version)
-            if installed_version and mod.latest_version and operator.gt(installed_version, mod.latest_version):
-                local_updatable = True
-            else:
-                local_updatable = False
-            if mod.local_updatable != local_updatable:
-                mod.write({'local_updatable': local_updatable})
-            
+        self._update_local_info()
         return res
+
+    @api.model
+    def _update_local_info(self):
+        """
+        处理可更新字段及所属 addons 路径，不要compute，会出错。
+        Set local_updatable and addons_path_id of every module from one read of the module table and
+        one scan of the addons paths; manifests unchanged since the last scan are not parsed again
+        and the changes are written in one batch per value.
+        """
+        versions = module_index.module_versions(addons.__path__, release.major_version)
+        path_ids = {rec.path: rec.id for rec in self.env['ir.module.addons.path'].sudo().search([])}
+        self.flush_model(['name', 'latest_version', 'local_updatable', 'addons_path_id'])
+        self.env.cr.execute("SELECT id, name, latest_version, local_updatable, addons_path_id FROM ir_module_module")
+        to_write = defaultdict(list)
+        for mod_id, name, latest_version, local_updatable, addons_path_id in self.env.cr.fetchall():
+            if name not in versions:
+                continue
+            addons_path, installed_version = versions[name]
+            updatable = bool(installed_version and latest_version and operator.gt(installed_version, latest_version))
+            if updatable != bool(local_updatable):
+                to_write[('local_updatable', updatable)].append(mod_id)
+            path_id = path_ids.get(addons_path)
+            if path_id and path_id != addons_path_id:
+                to_write[('addons_path_id', path_id)].append(mod_id)
+        for (field, value), mod_ids in to_write.items():
+            self.browse(mod_ids).write({field: value})
@@ -58,6 +58,8 @@ class ResConfigSettings(models.TransientModel):
     # 安全与提速
     app_debug_only_admin = fields.Boolean('Debug for Admin', config_parameter='app_debug_only_admin',
                                           help="Check to only Debug / Debug Assets for Odoo Admin. Deny debug from url for other user.")
+    # 清数据只估算，不删除
+    app_cleanup_dry_run = fields.Boolean('Dry Run', help="Check to only estimate the rows the Delete buttons would remove.")
     app_stop_subscribe = fields.Boolean('Stop Odoo Subscribe', help="Check to stop subscribe and follow. This to make odoo speed up.",
                                         config_parameter='app_stop_subscribe')
     # 处理额外模块
@@ -83,43 +85,38 @@ class ResConfigSettings(models.TransientModel):
 
     # 清数据，o=对象, s=序列 
     def _remove_app_data(self, o, s=[]):
+        """
+        按外键依赖顺序一次清除，全部在当前事务中完成，失败则整体回滚。
+        Remove all rows of the models in ``o`` and reset the sequences matching ``s``, in one transaction.
+        With Dry Run checked nothing is changed and the estimated row counts are returned instead.
+        """
         if not self._app_check_sys_op():
             raise UserError(_('Not allow.'))
-        for line in o:
-            # 检查是否存在
-            try:
-                if not self.env['ir.model']._get(line):
-                    continue
-            except Exception as e:
-                _logger.warning('remove data error get ir.model: %s,%s', line, e)
-                continue
-            obj_name = line
-            obj = self.pool.get(obj_name)
-            if not obj:
-                # 有时安装出错数据乱，没有 obj 但有 table
-                t_name = obj_name.replace('.', '_')
-            else:
-                t_name = obj._table
-
-            sql = "delete from %s" % t_name
-            # 增加多公司处理
-            try:
-                self._cr.execute(sql)
-                self._cr.commit()
-            except Exception as e:
-                _logger.warning('remove data error: %s,%s', line, e)
+        dry_run = self._app_cleanup_dry_run()
+        cleanup = self.env['app.data.cleanup']
+        report = cleanup._run(o, dry_run=dry_run)
         # 更新序号
-        for line in s:
-            domain = ['|', ('code', '=ilike', line + '%'), ('prefix', '=ilike', line + '%')]
-            try:
+        if not dry_run:
+            for line in s:
+                domain = ['|', ('code', '=ilike', line + '%'), ('prefix', '=ilike', line + '%')]
                 seqs = self.env['ir.sequence'].sudo().search(domain)
-                if seqs.exists():
+                if seqs:
                     seqs.write({
                         'number_next': 1,
                     })
-            except Exception as e:
-                _logger.warning('reset sequence data error: %s,%s', line, e)
-        return True
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Dry Run') if dry_run else _('Data Removed'),
+                'message': cleanup._format_report(report, dry_run=dry_run),
+                'type': 'info' if dry_run else 'success',
+                'sticky': True,
+            }
+        }
+
+    def _app_cleanup_dry_run(self):
+        return any(self.mapped('app_cleanup_dry_run'))
     
     def remove_sales(self):
         to_removes = [
@@ -170,13 +167,16 @@ class ResConfigSettings(models.TransientModel):
             'pos.',
         ]
         res = self._remove_app_data(to_removes, seqs)
+        if self._app_cleanup_dry_run():
+            return res
 
         # 更新要关帐的值，因为 store=true 的计算字段要重置
 
         try:
-            statement = self.env['account.bank.statement'].search([])
-            for s in statement:
-                s._end_balance()
+            with self.env.cr.savepoint():
+                statement = self.env['account.bank.statement'].search([])
+                for s in statement:
+                    s._end_balance()
         except Exception as e:
             _logger.error('reset sequence data error: %s', e)
         return res
@@ -283,6 +283,8 @@ class ResConfigSettings(models.TransientModel):
             'account.move',
         ]
         res = self._remove_app_data(to_removes, [])
+        if self._app_cleanup_dry_run():
+            return res
 
         # extra 更新序号
         domain = [
@@ -297,11 +299,12 @@ class ResConfigSettings(models.TransientModel):
             ('prefix', '=ilike', '杂项/%')
         ]
         try:
-            seqs = self.env['ir.sequence'].search(domain)
-            if seqs.exists():
-                seqs.write({
-                    'number_next': 1,
-                })
+            with self.env.cr.savepoint():
+                seqs = self.env['ir.sequence'].search(domain)
+                if seqs.exists():
+                    seqs.write({
+                        'number_next': 1,
+                    })
         except Exception as e:
             _logger.error('reset sequence data error: %s,%s', domain, e)
         return res
@@ -320,19 +323,21 @@ class ResConfigSettings(models.TransientModel):
             # 'wizard_multi_charts_accounts',
             'account.account',
         ]
+        if self._app_cleanup_dry_run():
+            return self._remove_app_data(to_removes)
         # todo: 要做 remove_hr，因为工资表会用到 account
+        # 以下各步在保存点中执行，出错只回滚该步，不会中断整个事务
         # 更新account关联，很多是多公司字段，故只存在 ir_property，故在原模型，只能用update
         try:
-            field1 = self.env['ir.model.fields']._get('product.template', "taxes_id").id
-            field2 = self.env['ir.model.fields']._get('product.template', "supplier_taxes_id").id
-
-            sql = "delete from ir_default where (field_id = %s or field_id = %s) and company_id=%d" \
-                  % (field1, field2, company_id)
-            sql2 = "update account_journal set bank_account_id=NULL where company_id=%d;" % company_id
-            self._cr.execute(sql)
-            self._cr.execute(sql2)
+            with self.env.cr.savepoint():
+                field1 = self.env['ir.model.fields']._get('product.template', "taxes_id").id
+                field2 = self.env['ir.model.fields']._get('product.template', "supplier_taxes_id").id
 
-            self._cr.commit()
+                sql = "delete from ir_default where (field_id = %s or field_id = %s) and company_id=%d" \
+                      % (field1, field2, company_id)
+                sql2 = "update account_journal set bank_account_id=NULL where company_id=%d;" % company_id
+                self._cr.execute(sql)
+                self._cr.execute(sql2)
         except Exception as e:
             _logger.error('remove data error: %s,%s', 'account_chart: set tax and account_journal', e)
 
@@ -344,58 +349,63 @@ class ResConfigSettings(models.TransientModel):
         #     todo: 以下处理参考 res.partner的合并，将所有m2o的都一次处理，不需要次次找模型
         # partner 处理
         try:
-            rec = self.env['res.partner'].search([])
-            for r in rec:
-                r.write({
-                    'property_account_receivable_id': None,
-                    'property_account_payable_id': None,
-                })
+            with self.env.cr.savepoint():
+                rec = self.env['res.partner'].search([])
+                for r in rec:
+                    r.write({
+                        'property_account_receivable_id': None,
+                        'property_account_payable_id': None,
+                    })
         except Exception as e:
-            _logger.error('remove data error: %s,%s', 'account_chart', e)
+            _logger.error('remove data error: %s,%s', 'account_chart: partner', e)
         # 品类处理
         try:
-            rec = self.env['product.category'].search([])
-            for r in rec:
-                r.write({
-                    'property_account_income_categ_id': None,
-                    'property_account_expense_categ_id': None,
-                    'property_account_creditor_price_difference_categ': None,
-                    'property_stock_account_input_categ_id': None,
-                    'property_stock_account_output_categ_id': None,
-                    'property_stock_valuation_account_id': None,
-                })
+            with self.env.cr.savepoint():
+                rec = self.env['product.category'].search([])
+                for r in rec:
+                    r.write({
+                        'property_account_income_categ_id': None,
+                        'property_account_expense_categ_id': None,
+                        'property_account_creditor_price_difference_categ': None,
+                        'property_stock_account_input_categ_id': None,
+                        'property_stock_account_output_categ_id': None,
+                        'property_stock_valuation_account_id': None,
+                    })
         except Exception as e:
-            pass
+            _logger.error('remove data error: %s,%s', 'account_chart: product category', e)
         # 产品处理
         try:
-            rec = self.env['product.template'].search([])
-            for r in rec:
-                r.write({
-                    'property_account_income_id': None,
-                    'property_account_expense_id': None,
-                })
+            with self.env.cr.savepoint():
+                rec = self.env['product.template'].search([])
+                for r in rec:
+                    r.write({
+                        'property_account_income_id': None,
+                        'property_account_expense_id': None,
+                    })
         except Exception as e:
-            pass
+            _logger.error('remove data error: %s,%s', 'account_chart: product', e)
         # 库存计价处理
         try:
-            rec = self.env['stock.location'].search([])
-            for r in rec:
-                r.write({
-                    'valuation_in_account_id': None,
-                    'valuation_out_account_id': None,
-                })
+            with self.env.cr.savepoint():
+                rec = self.env['stock.location'].search([])
+                for r in rec:
+                    r.write({
+                        'valuation_in_account_id': None,
+                        'valuation_out_account_id': None,
+                    })
         except Exception as e:
-            pass  # raise Warning(e)
-        
+            _logger.error('remove data error: %s,%s', 'account_chart: stock location', e)
+
         try:
-            rec = self.env['account.journal'].search([])
-            rec.write({
-                'default_account_id': False,
-                'suspense_account_id': False
-            })
+            with self.env.cr.savepoint():
+                rec = self.env['account.journal'].search([])
+                rec.write({
+                    'default_account_id': False,
+                    'suspense_account_id': False
+                })
         except Exception as e:
-            pass 
-           
+            _logger.error('remove data error: %s,%s', 'account_chart: journal', e)
+
         seqs = []
 
         res = self._remove_app_data(to_removes, seqs)
@@ -491,17 +501,29 @@ class ResConfigSettings(models.TransientModel):
         return self._remove_app_data(to_removes, seqs)
 
     def remove_all_biz(self):
-        self.remove_account()
-        self.remove_quality()
-        self.remove_inventory()
-        self.remove_purchase()
-        self.remove_mrp()
-        self.remove_sales()
-        self.remove_project()
-        self.remove_pos()
-        self.remove_expense()
-        self.remove_message()
-        return True
+        results = [
+            self.remove_account(),
+            self.remove_quality(),
+            self.remove_inventory(),
+            self.remove_purchase(),
+            self.remove_mrp(),
+            self.remove_sales(),
+            self.remove_project(),
+            self.remove_pos(),
+            self.remove_expense(),
+            self.remove_message(),
+        ]
+        dry_run = self._app_cleanup_dry_run()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Dry Run') if dry_run else _('Data Removed'),
+                'message': '\n\n'.join(res['params']['message'] for res in results if isinstance(res, dict)),
+                'type': 'info' if dry_run else 'success',
+                'sticky': True,
+            }
+        }
 
     def reset_cat_loc_name(self):
         ids = self.env['product.category'].search([
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+模块清单索引：按 mtime 缓存 __manifest__.py，未变化的清单不再解析。
+Index of the modules found in the addons paths, without ORM imports.
+
+Each addons path is listed once with os.scandir and each manifest is parsed only when its
+mtime or size changed since the previous scan of this process. Run this file directly for a
+benchmark on a synthetic addons tree:
+
+    python tools/module_index.py [modules] [paths]
+"""
+
+import ast
+import os
+
+MANIFEST_NAME = '__manifest__.py'
+
+# manifest path: (mtime_ns, size, manifest dict)
+_manifest_cache = {}
+
+
+def adapt_version(version, series):
+    """ 与 odoo.modules.module.adapt_version 相同. Same as odoo's adapt_version. """
+    if version == series or not version.startswith(series + '.'):
+        version = '%s.%s' % (series, version)
+    return version
+
+
+def read_manifest(manifest_path, stat=None):
+    """ 清单内容，mtime 与大小未变时取缓存. The manifest, from the cache while the file is unchanged. """
+    stat = stat or os.stat(manifest_path)
+    cached = _manifest_cache.get(manifest_path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    try:
+        with open(manifest_path, 'rb') as f:
+            manifest = ast.literal_eval(f.read().decode('utf-8'))
+    except (OSError, ValueError, SyntaxError):
+        manifest = {}
+    if not isinstance(manifest, dict):
+        manifest = {}
+    _manifest_cache[manifest_path] = (stat.st_mtime_ns, stat.st_size, manifest)
+    return manifest
+
+
+def scan_addons_paths(addons_paths):
+    """
+    {module name: (addons path, manifest path, stat)}; a module found in several paths keeps the
+    first one, as odoo's get_module_path does.
+    """
+    found = {}
+    for addons_path in addons_paths:
+        try:
+            entries = list(os.scandir(addons_path))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name in found or not entry.is_dir():
+                continue
+            manifest_path = os.path.join(entry.path, MANIFEST_NAME)
+            try:
+                stat = os.stat(manifest_path)
+            except OSError:
+                continue
+            found[entry.name] = (addons_path, manifest_path, stat)
+    return found
+
+
+def module_versions(addons_paths, series):
+    """ {module name: (addons path, adapted version)} of every module on disk. """
+    versions = {}
+    for name, (addons_path, manifest_path, stat) in scan_addons_paths(addons_paths).items():
+        manifest = read_manifest(manifest_path, stat)
+        versions[name] = (addons_path, adapt_version(str(manifest.get('version', '1.0')), series))
+    return versions
+
+
+def _benchmark(module_count=3000, path_count=4, series='17.0'):
+    """ 与逐模块查找、解析的方式对比. Compare with a per module lookup and parse. """
+    import shutil
+    import tempfile
+    import time
+
+    root = tempfile.mkdtemp(prefix='addons_bench_')
+    try:
+        paths = [os.path.join(root, 'addons%s' % index) for index in range(path_count)]
+        names = ['bench_module_%05d' % index for index in range(module_count)]
+        for index, name in enumerate(names):
+            module_dir = os.path.join(paths[index % path_count], name)
+            os.makedirs(module_dir)
+            with open(os.path.join(module_dir, MANIFEST_NAME), 'w') as f:
+                f.write(repr({'name': name, 'version': '1.%s' % (index % 7), 'depends': ['base'],
+                              'data': ['views/%s_views.xml' % name], 'installable': True}))
+            open(os.path.join(module_dir, '__init__.py'), 'w').close()
+
+        def per_module():
+            versions = {}
+            for name in names:
+                for path in paths:
+                    manifest_path = os.path.join(path, name, MANIFEST_NAME)
+                    if os.path.isfile(manifest_path):
+                        with open(manifest_path) as f:
+                            manifest = ast.literal_eval(f.read())
+                        versions[name] = (path, adapt_version(manifest.get('version', '1.0'), series))
+                        break
+            return versions
+
+        def timed(label, func):
+            start = time.perf_counter()
+            result = func()
+            print('%-32s %8.1f ms' % (label, (time.perf_counter() - start) * 1000))
+            return result
+
+        print('%s modules in %s addons paths' % (module_count, path_count))
+        expected = timed('per module lookup and parse', per_module)
+        _manifest_cache.clear()
+        cold = timed('index, cold', lambda: module_versions(paths, series))
+        warm = timed('index, unchanged manifests', lambda: module_versions(paths, series))
+        for name in names[::100]:
+            manifest_path = os.path.join(paths[names.index(name) % path_count], name, MANIFEST_NAME)
+            with open(manifest_path, 'a') as f:
+                f.write('\n')
+        timed('index, 1% manifests touched', lambda: module_versions(paths, series))
+        assert cold == warm == expected
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    import sys
+    _benchmark(*[int(arg) for arg in sys.argv[1:3]])
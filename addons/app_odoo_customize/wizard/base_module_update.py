@@ -5,7 +5,6 @@ import lxml.html
 import odoo
 import logging
 from odoo import api, fields, models, addons, modules, tools, Command
-from odoo.modules.module import get_module_path
 
 _logger = logging.getLogger(__name__)
 
@@ -16,41 +15,34 @@ class BaseModuleUpdate(models.TransientModel):
     _inherit = "base.module.update"
 
     def update_addons_paths(self):
-        addons_path_obj = self.env['ir.module.addons.path']
+        addons_path_obj = self.env['ir.module.addons.path'].sudo()
         ad_paths = addons.__path__
         path_sep = os.path.sep
+        existing = addons_path_obj.search([])
+        known_paths = set(existing.mapped('path'))
+        vals_list = []
         for path in ad_paths:
-            if not addons_path_obj.search([('path', '=', path)]):
+            if path not in known_paths:
+                known_paths.add(path)
                 path_temp = path
 
                 if len(path_temp) > 42:
                     path_temp = '%s......%s' % (path[:12], path[-19:])
 
-                addons_path_obj.sudo().create({
+                vals_list.append({
                     'name': path.split(path_sep)[-1],
                     'path': path,
                     'path_temp': path_temp,
                 })
-
-        for addons_path_id in addons_path_obj.search([]):
-            if addons_path_id.path not in ad_paths:
-                addons_path_id.unlink()
+        if vals_list:
+            addons_path_obj.create(vals_list)
+        existing.filtered(lambda rec: rec.path not in ad_paths).unlink()
 
     def update_module_addons_paths(self):
-        addons_path_obj = self.env['ir.module.addons.path']
-        path_sep = os.path.sep
-        for module_id in self.env['ir.module.module'].search([]):
-            module_path = get_module_path(module_id.name)
-            if not module_path:
-                continue
-            addons_path = module_path.rstrip(module_id.name).rstrip(path_sep)
-            addons_path_id = addons_path_obj.search([('path', '=', addons_path)])
-
-            if addons_path_id:
-                module_id.addons_path_id = addons_path_id.id
+        # 模块所属路径与可更新标记一次扫描处理
+        self.env['ir.module.module']._update_local_info()
 
     def update_module(self):
-        res = super(BaseModuleUpdate, self).update_module()
+        # 先建立路径，update_list 即可一并设置模块路径
         self.update_addons_paths()
-        self.update_module_addons_paths()
-        return res
+        return super(BaseModuleUpdate, self).update_module()
@@ -48,6 +48,9 @@
         
         # Data
         'data/sequence_data.xml',
+        'data/fsm_sla_data.xml',
+        'data/fsm_cron_data.xml',
+        'data/fsm_technician_data.xml',
         # 'data/mail_template_data.xml',
         # 'data/default_data.xml',
         
@@ -57,9 +60,12 @@
         'views/fsm_service_partner_views.xml',
         'views/fsm_spare_views.xml',
         'views/fsm_inventory_views.xml',
+        'views/fsm_reorder_views.xml',
         'views/fsm_feedback_views.xml',
         'views/fsm_expense_views.xml',
         'views/fsm_claim_views.xml',
+        'views/fsm_claim_run_views.xml',
+        'views/fsm_report_job_views.xml',
         'views/fsm_dashboard_views.xml',
         'views/fsm_service_dashboard_views.xml',
         'views/fsm_inventory_dashboard_views.xml',
@@ -78,6 +84,7 @@
         'wizard/fsm_close_call_views.xml',
         'wizard/fsm_technician_assignment_views.xml',
         'wizard/fsm_call_attachment_views.xml',
+        'wizard/fsm_dispatch_wizard_views.xml',
         
         # Reports
         'report/fsm_service_report_views.xml',
@@ -101,6 +108,6 @@
         ],
     },
     'external_dependencies': {
-        'python': [],
+        'python': ['numpy'],
     },
 }
\ No newline at end of file
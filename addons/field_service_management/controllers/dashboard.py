@@ -31,17 +31,16 @@ class FSMDashboardController(http.Controller):
                 (r.call_id and r.call_id.priority == '3')
             )
 
-            # Customer Feedback Data - Fix completed state name
-            feedback_records = request.env['fsm.feedback'].search([])
-            completed_calls = request.env['fsm.call'].search([('state', 'in', ['resolved', 'closed'])])  # Fix state names
-            calls_with_feedback = feedback_records.mapped('call_id')
-            pending_feedback_calls = completed_calls.filtered(lambda c: c.id not in calls_with_feedback.ids)
-
-            # Calculate average rating - handle string ratings properly
-            avg_rating = 0.0
-            if feedback_records:
-                ratings = [int(f.rating) for f in feedback_records if f.rating and f.rating.isdigit()]
-                avg_rating = sum(ratings) / len(ratings) if ratings else 0.0
+            # Customer Feedback Data - one grouped query over all feedback
+            feedback_stats = request.env['fsm.feedback'].get_rating_statistics()
+            feedback_stats = feedback_stats[0] if feedback_stats else {
+                'total_feedback': 0, 'average_rating': 0.0, 'rating_histogram': {star: 0 for star in range(1, 6)},
+            }
+            histogram = feedback_stats['rating_histogram']
+            pending_feedback_count = request.env['fsm.call'].search_count([
+                ('state', 'in', ['resolved', 'closed']),
+                ('feedback_ids', '=', False),
+            ])
 
             return {
                 'success': True,
@@ -59,12 +58,12 @@ class FSMDashboardController(http.Controller):
                     'urgent_spare_requests': len(urgent_spare_requests),
 
                     # Customer Feedback
-                    'total_customer_feedback': len(feedback_records),
-                    'excellent_feedback': len(feedback_records.filtered(lambda f: f.rating == '5')),
-                    'good_feedback': len(feedback_records.filtered(lambda f: f.rating in ['3', '4'])),
-                    'poor_feedback': len(feedback_records.filtered(lambda f: f.rating in ['1', '2'])),
-                    'pending_feedback': len(pending_feedback_calls),
-                    'avg_feedback_rating': round(avg_rating, 1),
+                    'total_customer_feedback': feedback_stats['total_feedback'],
+                    'excellent_feedback': histogram[5],
+                    'good_feedback': histogram[3] + histogram[4],
+                    'poor_feedback': histogram[1] + histogram[2],
+                    'pending_feedback': pending_feedback_count,
+                    'avg_feedback_rating': round(feedback_stats['average_rating'], 1),
                 }
             }
         except Exception as e:
@@ -209,18 +208,27 @@ class FSMDashboardController(http.Controller):
     @http.route('/fsm/dashboard/pending_feedback', type='json', auth='user')
     def get_pending_feedback(self):
         """Open pending feedback view"""
-        feedback_records = request.env['fsm.feedback'].search([])
-        calls_with_feedback = feedback_records.mapped('call_id')
-        completed_calls = request.env['fsm.call'].search([('state', 'in', ['resolved', 'closed'])])
-        pending_call_ids = completed_calls.filtered(lambda c: c.id not in calls_with_feedback.ids).ids
-
         return {
             'type': 'ir.actions.act_window',
             'name': 'Calls Pending Feedback',
             'res_model': 'fsm.call',
             'view_mode': 'tree,form',
             'views': [[False, 'tree'], [False, 'form']],
-            'domain': [('id', 'in', pending_call_ids)],
+            'domain': [('state', 'in', ['resolved', 'closed']), ('feedback_ids', '=', False)],
             'context': {'create': False},
             'target': 'current',
-        }
\ No newline at end of file
+        }
+
+    @http.route('/fsm/dashboard/feedback_statistics', type='json', auth='user')
+    def get_feedback_statistics(self, groupby=None, period='month', date_from=None, date_to=None, company_ids=None):
+        """Grouped feedback statistics for dashboards and reports"""
+        statistics = request.env['fsm.feedback'].get_rating_statistics(
+            groupby=groupby or [], period=period, date_from=date_from, date_to=date_to, company_ids=company_ids)
+        for stats in statistics:
+            for dimension in groupby or []:
+                value = stats[dimension]
+                if dimension == 'period':
+                    stats[dimension] = fields.Date.to_string(value) if value else False
+                else:
+                    stats[dimension] = (value.id, value.display_name) if value else False
+        return statistics
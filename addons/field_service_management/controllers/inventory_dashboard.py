@@ -12,44 +12,32 @@ class FSMInventoryDashboardController(http.Controller):
         """Get all inventory dashboard KPI data"""
         try:
             # Current Stock Levels
-            spare_parts = request.env['fsm.spare'].search([('active', '=', True)])
+            Spare = request.env['fsm.spare']
+            spare_parts = Spare.search([('active', '=', True)])
+            stock_levels = Spare._get_stock_levels(spare_parts)
 
-            # Stock movements in last 30 days
-            thirty_days_ago = fields.Date.today() - timedelta(days=30)
-            stock_moves = request.env['stock.move'].search([
-                ('date', '>=', thirty_days_ago),
-                ('state', '=', 'done'),
-                ('product_id', 'in', spare_parts.mapped('product_id').ids)
-            ])
-
-            # Inward movements (receipts, returns)
-            inward_moves = stock_moves.filtered(lambda m: m.location_dest_id.usage == 'internal')
-
-            # Outward movements (deliveries, consumptions)
-            outward_moves = stock_moves.filtered(lambda m: m.location_id.usage == 'internal')
+            # Stock movements in last 30 days (inward, outward and last 7 days) in one grouped query
+            Analytics = request.env['fsm.inventory.analytics']
+            movements = Analytics.get_movement_summary(days=30, recent_days=7)
 
             # Stock requests
             spare_requests = request.env['fsm.spare.request'].search([])
 
             # Calculate totals
-            total_inward_qty = sum(inward_moves.mapped('product_uom_qty'))
-            total_outward_qty = sum(outward_moves.mapped('product_uom_qty'))
+            total_inward_qty = movements['total_inward_qty']
+            total_outward_qty = movements['total_outward_qty']
 
             # Low stock items (below minimum stock)
-            low_stock_items = spare_parts.filtered(lambda s: s.qty_available < s.min_stock_qty)
+            low_stock_items = spare_parts.filtered(lambda s: stock_levels[s.id] < s.min_stock_qty)
 
             # Out of stock items
-            out_of_stock_items = spare_parts.filtered(lambda s: s.qty_available <= 0)
+            out_of_stock_items = spare_parts.filtered(lambda s: stock_levels[s.id] <= 0)
 
             # Overstock items (above reorder quantity * 2)
-            overstock_items = spare_parts.filtered(lambda s: s.qty_available > (s.reorder_qty * 2))
-
-            # Recent stock movements (last 7 days)
-            seven_days_ago = fields.Date.today() - timedelta(days=7)
-            recent_moves = stock_moves.filtered(lambda m: m.date.date() >= seven_days_ago)
+            overstock_items = spare_parts.filtered(lambda s: stock_levels[s.id] > (s.reorder_qty * 2))
 
             # Stock value calculation
-            total_stock_value = sum(spare.qty_available * spare.standard_price for spare in spare_parts)
+            total_stock_value = sum(stock_levels[spare.id] * spare.standard_price for spare in spare_parts)
 
             return {
                 'success': True,
@@ -64,9 +52,9 @@ class FSMInventoryDashboardController(http.Controller):
                     # Stock Movements (Last 30 Days)
                     'total_inward_qty': round(total_inward_qty, 2),
                     'total_outward_qty': round(total_outward_qty, 2),
-                    'inward_moves_count': len(inward_moves),
-                    'outward_moves_count': len(outward_moves),
-                    'recent_moves_count': len(recent_moves),
+                    'inward_moves_count': movements['inward_moves_count'],
+                    'outward_moves_count': movements['outward_moves_count'],
+                    'recent_moves_count': movements['recent_moves_count'],
 
                     # Stock Requests
                     'total_requests': len(spare_requests),
@@ -76,7 +64,7 @@ class FSMInventoryDashboardController(http.Controller):
                     'today_requests': len(spare_requests.filtered(lambda r: r.request_date.date() == fields.Date.today())),
 
                     # Stock Turnover
-                    'stock_turnover_ratio': round(total_outward_qty / (total_stock_value or 1), 4),
+                    'stock_turnover_ratio': round(Analytics.get_turnover_ratio(total_outward_qty, total_stock_value), 4),
                 }
             }
         except Exception as e:
@@ -85,6 +73,20 @@ class FSMInventoryDashboardController(http.Controller):
                 'error': str(e)
             }
 
+    @http.route('/fsm/inventory/dashboard/trend', type='json', auth='user')
+    def get_inventory_movement_trend(self, days=30):
+        """Daily inward/outward movement totals for trend charts"""
+        try:
+            return {
+                'success': True,
+                'data': request.env['fsm.inventory.analytics'].get_movement_trend(days=int(days)),
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
     @http.route('/fsm/inventory/current_stock', type='json', auth='user')
     def get_current_stock(self):
         """Open current stock view"""
@@ -131,10 +133,12 @@ class FSMInventoryDashboardController(http.Controller):
     def get_overstock(self):
         """Open overstock items view"""
         # Get overstock items using computed field logic
-        spare_parts = request.env['fsm.spare'].search([('active', '=', True)])
+        Spare = request.env['fsm.spare']
+        spare_parts = Spare.search([('active', '=', True)])
+        stock_levels = Spare._get_stock_levels(spare_parts)
         overstock_ids = []
         for spare in spare_parts:
-            if spare.qty_available > (spare.reorder_qty * 2):
+            if stock_levels[spare.id] > (spare.reorder_qty * 2):
                 overstock_ids.append(spare.id)
 
         return {
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from . import fsm_location_index
 from . import fsm_technician
 from . import fsm_service_partner
 from . import fsm_call
@@ -14,4 +15,9 @@ from . import product_template
 from . import product_product
 from . import fsm_dealer
 from . import fsm_fault
-from . import fsm_notification
\ No newline at end of file
+from . import fsm_notification
+from . import fsm_dispatch
+from . import fsm_reorder
+from . import fsm_inventory_analytics
+from . import fsm_claim_run
+from . import fsm_report_job
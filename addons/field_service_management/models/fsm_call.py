@@ -1,7 +1,21 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api, Command
+from odoo import models, fields, api, tools, Command
 from odoo.exceptions import ValidationError, UserError
 from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+from markupsafe import Markup
+
+# Fields that change a call's contribution to the technician counters
+TECHNICIAN_COUNTER_TRIGGERS = {'technician_id', 'state', 'call_date', 'closed_date', 'active'}
+
+# Fallback SLA hours per priority when no fsm.sla.policy is configured
+DEFAULT_SLA_HOURS = {
+    '0': 72,  # Low - 3 days
+    '1': 48,  # Normal - 2 days
+    '2': 24,  # High - 1 day
+    '3': 4    # Urgent - 4 hours
+}
+
 
 class FSMCall(models.Model):
     _name = 'fsm.call'
@@ -19,7 +33,7 @@ class FSMCall(models.Model):
     ], string='Service Type', default='inservice', required=True)
     
     # Customer Information
-    partner_id = fields.Many2one('res.partner', string='Customer', required=True, tracking=True,
+    partner_id = fields.Many2one('res.partner', string='Customer', required=True, tracking=True, index=True,
                                 options="{'create': True, 'create_edit': True}")
     phone = fields.Char(string='Phone', related='partner_id.phone', readonly=False, store=True)
     mobile = fields.Char(string='Mobile', related='partner_id.mobile', readonly=False, store=True)
@@ -80,9 +94,10 @@ class FSMCall(models.Model):
     symptoms = fields.Text(string='Symptoms/Issues')
     
     # Assignment
-    technician_id = fields.Many2one('fsm.technician', string='Assigned Technician', tracking=True)
+    technician_id = fields.Many2one('fsm.technician', string='Assigned Technician', tracking=True, index=True)
     service_partner_id = fields.Many2one('fsm.service.partner', string='Service Partner', tracking=True)
     auto_assigned = fields.Boolean(string='Auto Assigned', default=False)
+    skill_ids = fields.Many2many('fsm.skill', 'fsm_call_skill_rel', 'call_id', 'skill_id', string='Required Skills')
     
     # Priority and SLA
     priority = fields.Selection([
@@ -153,57 +168,116 @@ class FSMCall(models.Model):
     # Tags
     tag_ids = fields.Many2many('fsm.call.tag', string='Tags')
     
-    @api.model
-    def create(self, vals):
-        if vals.get('name', 'New') == 'New':
-            # Generate sequence based on call type
-            call_type = vals.get('call_type', 'repair')
-            
-            # Define prefixes for each call type
-            prefixes = {
-                'installation': 'INST',
-                'repair': 'REPR',
-                'maintenance': 'MAINT',
-                'inspection': 'INSP',
-                'complaint': 'COMPL',
-                'sales_enquiry': 'SALE',
-                'spare_enquiry': 'SPARE',
-                'others': 'OTHR'
-            }
-            
-            # Get prefix for the call type or default to CALL
-            prefix = prefixes.get(call_type, 'CALL')
-            
-            # Generate a simple sequence number with date
-            current_date = fields.Date.today()
-            year = current_date.year
-            month = str(current_date.month).zfill(2)
-            
-            # Simple counter approach - find the last record with the same prefix
-            last_record = self.search([('name', 'like', f'{prefix}-{year}{month}-')], 
-                                    order='name desc', limit=1)
-            if last_record:
-                # Extract the number part and increment
-                last_name = last_record.name
-                try:
-                    last_number = int(last_name.split('-')[-1])
-                    new_number = str(last_number + 1).zfill(5)
-                except:
-                    new_number = '00001'
-            else:
-                new_number = '00001'
-            
-            vals['name'] = f"{prefix}-{year}{month}-{new_number}"
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Last sequence number used per name prefix in this batch
+        last_numbers = {}
+        for vals in vals_list:
+            if vals.get('name', 'New') == 'New':
+                # Generate sequence based on call type
+                call_type = vals.get('call_type', 'repair')
+                
+                # Define prefixes for each call type
+                prefixes = {
+                    'installation': 'INST',
+                    'repair': 'REPR',
+                    'maintenance': 'MAINT',
+                    'inspection': 'INSP',
+                    'complaint': 'COMPL',
+                    'sales_enquiry': 'SALE',
+                    'spare_enquiry': 'SPARE',
+                    'others': 'OTHR'
+                }
+                
+                # Get prefix for the call type or default to CALL
+                prefix = prefixes.get(call_type, 'CALL')
+                
+                # Generate a simple sequence number with date
+                current_date = fields.Date.today()
+                year = current_date.year
+                month = str(current_date.month).zfill(2)
+                name_prefix = f"{prefix}-{year}{month}-"
+                
+                # Simple counter approach - find the last record with the same prefix
+                if name_prefix not in last_numbers:
+                    last_record = self.search([('name', 'like', name_prefix)], order='name desc', limit=1)
+                    try:
+                        last_numbers[name_prefix] = int(last_record.name.split('-')[-1]) if last_record else 0
+                    except:
+                        last_numbers[name_prefix] = 0
+                last_numbers[name_prefix] += 1
+                
+                vals['name'] = f"{name_prefix}{str(last_numbers[name_prefix]).zfill(5)}"
         
-        # Auto-assign technician if not specified
-        if not vals.get('technician_id') and vals.get('pincode'):
-            technician = self._get_available_technician(vals.get('pincode'))
+        # Fill the master location from the pincode, e.g. for imported calls,
+        # and auto-assign a technician if not specified, one lookup per batch
+        locations = self.env['fsm.location.index'].resolve_pincodes(
+            [vals['pincode'] for vals in vals_list if vals.get('pincode') and not vals.get('fsm_pincode_id')])
+        technicians = self._get_available_technicians(
+            [vals['pincode'] for vals in vals_list if vals.get('pincode') and not vals.get('technician_id')])
+        for vals in vals_list:
+            location = locations.get(vals.get('pincode')) if not vals.get('fsm_pincode_id') else None
+            if location:
+                vals.setdefault('fsm_pincode_id', location.pincode_id)
+                vals.setdefault('fsm_district_id', location.district_id)
+                vals.setdefault('fsm_state_id', location.state_id)
+            technician = technicians.get(vals.get('pincode')) if not vals.get('technician_id') else False
             if technician:
                 vals['technician_id'] = technician.id
                 vals['auto_assigned'] = True
                 vals['service_partner_id'] = technician.service_partner_id.id
         
-        return super(FSMCall, self).create(vals)
+        calls = super(FSMCall, self).create(vals_list)
+        self.env['fsm.technician']._apply_counter_deltas(calls._get_technician_counter_deltas())
+        return calls
+    
+    def write(self, vals):
+        counter_triggers = TECHNICIAN_COUNTER_TRIGGERS.intersection(vals)
+        if not counter_triggers:
+            return super(FSMCall, self).write(vals)
+        # Feedback ratings only move between technicians on reassignment/archiving
+        with_ratings = bool(counter_triggers & {'technician_id', 'active'})
+        deltas = self._get_technician_counter_deltas(sign=-1, with_ratings=with_ratings)
+        res = super(FSMCall, self).write(vals)
+        self._get_technician_counter_deltas(deltas=deltas, with_ratings=with_ratings)
+        self.env['fsm.technician']._apply_counter_deltas(deltas)
+        return res
+    
+    def unlink(self):
+        deltas = self._get_technician_counter_deltas(sign=-1)
+        call_ids = self.ids
+        res = super(FSMCall, self).unlink()
+        self.env['fsm.technician']._apply_counter_deltas(deltas)
+        self.env['fsm.service.report']._delete_calls(call_ids)
+        return res
+    
+    def _get_technician_counter_deltas(self, sign=1, deltas=None, with_ratings=True):
+        """Add (sign=1) or remove (sign=-1) these calls' contribution to the
+        technician performance counters, as {technician_id: Counter}"""
+        if deltas is None:
+            deltas = defaultdict(Counter)
+        calls = self.filtered(lambda c: c.technician_id and c.active)
+        ratings = {}
+        if with_ratings and calls:
+            for call, rating, count in self.env['fsm.feedback']._read_group(
+                    [('call_id', 'in', calls.ids), ('rating', '!=', False)],
+                    ['call_id', 'rating'], ['__count']):
+                rating_sum, rating_count = ratings.get(call.id, (0, 0))
+                ratings[call.id] = (rating_sum + int(rating) * count, rating_count + count)
+        for call in calls:
+            delta = deltas[call.technician_id.id]
+            delta['call_count'] += sign
+            if call.state not in ['closed', 'cancelled']:
+                delta['active_call_count'] += sign
+            if call.state == 'closed':
+                delta['total_calls_completed'] += sign
+                if call.closed_date and call.call_date:
+                    delta['resolution_days_sum'] += sign * (call.closed_date - call.call_date).days
+                    delta['resolution_count'] += sign
+            if call.id in ratings:
+                delta['rating_sum'] += sign * ratings[call.id][0]
+                delta['rating_count'] += sign * ratings[call.id][1]
+        return deltas
     
     @api.model
     def _get_available_technician(self, pincode):
@@ -211,18 +285,17 @@ class FSMCall(models.Model):
         TechnicianPincode = self.env['fsm.technician.pincode']
         return TechnicianPincode.get_available_technician(pincode)
     
+    def _get_available_technicians(self, pincodes):
+        """{pincode: technician or False}, resolving all distinct pincodes in one batch"""
+        return self.env['fsm.technician.pincode'].get_available_technicians(pincodes)
+    
     @api.depends('priority', 'call_date')
     def _compute_sla_deadline(self):
+        sla_hours_by_priority = self.env['fsm.sla.policy']._get_sla_hours()
         for record in self:
             if record.call_date:
                 # SLA hours based on priority
-                sla_hours = {
-                    '0': 72,  # Low - 3 days
-                    '1': 48,  # Normal - 2 days
-                    '2': 24,  # High - 1 day
-                    '3': 4    # Urgent - 4 hours
-                }.get(record.priority, 48)
-                
+                sla_hours = sla_hours_by_priority.get(record.priority, 48)
                 record.sla_deadline = record.call_date + timedelta(hours=sla_hours)
             else:
                 record.sla_deadline = False
@@ -273,6 +346,63 @@ class FSMCall(models.Model):
             else:
                 record.aging_days = 0
     
+    @api.model
+    def _cron_refresh_sla_status(self, batch_size=5000, auto_commit=True):
+        """Cron job to refresh the time-based SLA breach flag and aging of open calls.
+
+        The stored computes only run when the call is edited, so this job
+        re-evaluates them against the current time in set-based SQL, one id
+        range at a time, and logs an 'sla_breached' notification for every
+        call that crossed its deadline since the last run.
+        """
+        self.flush_model(['state', 'sla_deadline', 'call_date', 'is_sla_breached', 'aging_days'])
+        now = fields.Datetime.now()
+        last_id = 0
+        while True:
+            self.env.cr.execute("""
+                WITH batch AS (
+                    SELECT id FROM fsm_call
+                     WHERE id > %(last_id)s AND state NOT IN ('closed', 'cancelled')
+                  ORDER BY id
+                     LIMIT %(limit)s
+                ), updated AS (
+                    UPDATE fsm_call c
+                       SET is_sla_breached = COALESCE(c.sla_deadline < %(now)s, FALSE),
+                           aging_days = COALESCE(FLOOR(EXTRACT(EPOCH FROM %(now)s - c.call_date) / 86400), 0)
+                      FROM fsm_call old
+                      JOIN batch ON batch.id = old.id
+                     WHERE c.id = old.id
+                       AND (c.is_sla_breached IS DISTINCT FROM COALESCE(c.sla_deadline < %(now)s, FALSE)
+                            OR c.aging_days IS DISTINCT FROM
+                               COALESCE(FLOOR(EXTRACT(EPOCH FROM %(now)s - c.call_date) / 86400), 0))
+                 RETURNING c.id, (c.is_sla_breached AND NOT COALESCE(old.is_sla_breached, FALSE)) AS newly_breached
+                )
+                SELECT (SELECT MAX(id) FROM batch),
+                       ARRAY(SELECT id FROM updated),
+                       ARRAY(SELECT id FROM updated WHERE newly_breached)
+            """, {'last_id': last_id, 'limit': batch_size, 'now': now})
+            last_id, updated_ids, breached_ids = self.env.cr.fetchone()
+            if updated_ids:
+                self.browse(updated_ids).invalidate_recordset(['is_sla_breached', 'aging_days'])
+            if breached_ids:
+                self.browse(breached_ids)._create_sla_breach_notifications()
+            if auto_commit:
+                self.env.cr.commit()
+            if not last_id:
+                break
+    
+    def _create_sla_breach_notifications(self):
+        """Log one 'sla_breached' notification transaction per call, in one create"""
+        self.env['fsm.notification.transaction'].create([{
+            'call_id': call.id,
+            'technician_id': call.technician_id.id,
+            'service_partner_id': call.service_partner_id.id,
+            'notification_type': 'sla_breached',
+            'old_status': call.state,
+            'new_status': call.state,
+            'description': f'Service call {call.name} breached its SLA deadline {call.sla_deadline}',
+        } for call in self])
+    
     @api.depends('spare_request_ids')
     def _compute_spare_request_count(self):
         for record in self:
@@ -289,127 +419,143 @@ class FSMCall(models.Model):
         return [key for key, val in type(self).state.selection]
     
     # Workflow Actions
+    #
+    # Transitions work on any number of calls: one write per target state,
+    # one batched chatter log and one notification transaction create.
+    
+    def _log_transition(self, old_states, new_state, notification_type, description, body):
+        """Post body on every call's chatter and log one notification
+        transaction per call; description is formatted with the call."""
+        self._message_log_batch(bodies={call.id: body for call in self})
+        return self.env['fsm.notification.transaction'].create([{
+            'call_id': call.id,
+            'technician_id': call.technician_id.id,
+            'service_partner_id': call.service_partner_id.id,
+            'notification_type': notification_type,
+            'old_status': old_states[call.id],
+            'new_status': new_state,
+            'description': description.format(call=call),
+        } for call in self])
+    
+    def _attachment_wizard_action(self):
+        """Open the attachment wizard for a single call missing attachments;
+        for several calls, list the ones to complete first."""
+        missing = self.filtered(lambda c: not c.has_attachments())
+        if not missing:
+            return False
+        if len(self) == 1:
+            return {
+                'name': 'Add Attachments',
+                'type': 'ir.actions.act_window',
+                'res_model': 'fsm.call.attachment.wizard',
+                'view_mode': 'form',
+                'target': 'new',
+                'context': {'default_call_id': self.id}
+            }
+        raise ValidationError('Please add attachments to: %s' % ', '.join(missing.mapped('name')))
+    
     def action_confirm(self):
-        self.ensure_one()
-        if self.state != 'draft':
+        if self.filtered(lambda c: c.state != 'draft'):
             raise UserError('Only draft calls can be confirmed!')
         
-        old_state = self.state
+        old_states = {call.id: call.state for call in self}
         self.write({
             'state': 'confirmed',
             'confirmed_date': fields.Datetime.now()
         })
-        self.message_post(body='Service call confirmed.')
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'notification_type': 'call_created',
-            'old_status': old_state,
-            'new_status': 'confirmed',
-            'description': f'Service call {self.name} confirmed'
-        })
+        self._log_transition(old_states, 'confirmed', 'call_created',
+                             'Service call {call.name} confirmed', 'Service call confirmed.')
     
     def action_assign(self):
-        self.ensure_one()
-        if self.state not in ['draft', 'confirmed']:
+        if self.filtered(lambda c: c.state not in ['draft', 'confirmed']):
             raise UserError('Call must be in Draft or Confirmed state to assign!')
         
-        if not self.technician_id:
-            # Try auto-assignment
-            technician = self._get_available_technician(self.pincode)
+        # Try auto-assignment, grouping the writes per technician
+        unassigned = self.filtered(lambda c: not c.technician_id)
+        technicians = self._get_available_technicians(unassigned.mapped('pincode'))
+        call_ids_by_technician = defaultdict(list)
+        for call in unassigned:
+            technician = technicians.get(call.pincode)
             if not technician:
-                raise ValidationError(f"No available technician for pincode {self.pincode}")
-            self.technician_id = technician.id
-            self.service_partner_id = technician.service_partner_id.id
-            self.auto_assigned = True
+                raise ValidationError(f"No available technician for pincode {call.pincode}")
+            call_ids_by_technician[technician].append(call.id)
+        for technician, call_ids in call_ids_by_technician.items():
+            self.browse(call_ids).write({
+                'technician_id': technician.id,
+                'service_partner_id': technician.service_partner_id.id,
+                'auto_assigned': True,
+            })
         
-        old_state = self.state
+        old_states = {call.id: call.state for call in self}
         self.write({
             'state': 'assigned',
             'assigned_date': fields.Datetime.now()
         })
         
-        # Send notification to technician
-        self.message_post(
-            body=f'Call assigned to {self.technician_id.name}',
-            partner_ids=self.technician_id.user_id.partner_id.ids
-        )
-        
-        # Create activity for technician
-        self.activity_schedule(
-            'mail.mail_activity_data_todo',
-            summary=f'Service Call {self.name}',
-            user_id=self.technician_id.user_id.id
-        )
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
+        # Chatter, one notification per technician, technician activity and notification transaction
+        self._message_log_batch(bodies={call.id: f'Call assigned to {call.technician_id.name}' for call in self})
+        self._notify_assigned_technicians()
+        activity_type = self.env.ref('mail.mail_activity_data_todo', raise_if_not_found=False)
+        if activity_type:
+            res_model_id = self.env['ir.model']._get_id(self._name)
+            self.env['mail.activity'].create([{
+                'res_model_id': res_model_id,
+                'res_id': call.id,
+                'activity_type_id': activity_type.id,
+                'summary': f'Service Call {call.name}',
+                'user_id': call.technician_id.user_id.id or self.env.uid,
+                'date_deadline': fields.Date.context_today(self),
+                'automated': True,
+            } for call in self])
+        self.env['fsm.notification.transaction'].create([{
+            'call_id': call.id,
+            'technician_id': call.technician_id.id,
+            'service_partner_id': call.service_partner_id.id,
             'notification_type': 'call_assigned',
-            'old_status': old_state,
+            'old_status': old_states[call.id],
             'new_status': 'assigned',
-            'description': f'Service call {self.name} assigned to {self.technician_id.name}'
-        })
+            'description': f'Service call {call.name} assigned to {call.technician_id.name}'
+        } for call in self])
+    
+    def _notify_assigned_technicians(self):
+        """Send each technician a single inbox notification listing the calls assigned to them"""
+        calls_by_partner = defaultdict(lambda: self.browse())
+        for call in self:
+            if call.technician_id.user_id:
+                calls_by_partner[call.technician_id.user_id.partner_id] |= call
+        for partner, calls in calls_by_partner.items():
+            self.env['mail.thread'].message_notify(
+                partner_ids=partner.ids,
+                subject=f'{len(calls)} service call(s) assigned to you',
+                body=Markup('<p>Service calls assigned to you:</p><ul>%s</ul>') % Markup().join(
+                    Markup('<li>%s</li>') % call._get_html_link() for call in calls),
+            )
     
     def action_start(self):
-        self.ensure_one()
-        if self.state != 'assigned':
+        if self.filtered(lambda c: c.state != 'assigned'):
             raise UserError('Only assigned calls can be started!')
         
-        old_state = self.state
+        old_states = {call.id: call.state for call in self}
         self.write({
             'state': 'in_progress',
             'start_date': fields.Datetime.now()
         })
-        self.message_post(body='Service started.')
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
-            'notification_type': 'call_started',
-            'old_status': old_state,
-            'new_status': 'in_progress',
-            'description': f'Service call {self.name} started'
-        })
+        self._log_transition(old_states, 'in_progress', 'call_started',
+                             'Service call {call.name} started', 'Service started.')
     
     def action_pending_spares(self):
-        self.ensure_one()
-        old_state = self.state
-        self.state = 'pending_spares'
-        self.message_post(body='Waiting for spare parts.')
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
-            'notification_type': 'status_changed',
-            'old_status': old_state,
-            'new_status': 'pending_spares',
-            'description': f'Service call {self.name} status changed to pending spares'
-        })
+        old_states = {call.id: call.state for call in self}
+        self.write({'state': 'pending_spares'})
+        self._log_transition(old_states, 'pending_spares', 'status_changed',
+                             'Service call {call.name} status changed to pending spares',
+                             'Waiting for spare parts.')
     
     def action_pending_customer(self):
-        self.ensure_one()
-        old_state = self.state
-        self.state = 'pending_customer'
-        self.message_post(body='Waiting for customer response.')
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
-            'notification_type': 'status_changed',
-            'old_status': old_state,
-            'new_status': 'pending_customer',
-            'description': f'Service call {self.name} status changed to pending customer'
-        })
+        old_states = {call.id: call.state for call in self}
+        self.write({'state': 'pending_customer'})
+        self._log_transition(old_states, 'pending_customer', 'status_changed',
+                             'Service call {call.name} status changed to pending customer',
+                             'Waiting for customer response.')
     
     def has_attachments(self):
         """Check if the call has attachments"""
@@ -417,136 +563,94 @@ class FSMCall(models.Model):
         return bool(self.attachment_ids)
     
     def action_resolve(self):
-        self.ensure_one()
-        if not self.resolution:
+        if self.filtered(lambda c: not c.resolution):
             raise ValidationError('Please provide resolution details!')
         
         # Check if attachments exist, if not, open attachment wizard
-        if not self.has_attachments():
-            return {
-                'name': 'Add Attachments',
-                'type': 'ir.actions.act_window',
-                'res_model': 'fsm.call.attachment.wizard',
-                'view_mode': 'form',
-                'target': 'new',
-                'context': {'default_call_id': self.id}
-            }
+        wizard_action = self._attachment_wizard_action()
+        if wizard_action:
+            return wizard_action
         
-        old_state = self.state
+        now = fields.Datetime.now()
+        old_states = {call.id: call.state for call in self}
         self.write({
             'state': 'resolved',
-            'resolved_date': fields.Datetime.now()
+            'resolved_date': now,
+            'otp_generated_date': now,
         })
-        self.message_post(body='Service resolved.')
         
-        # Generate OTP for closing the call
-        notification = self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
+        # Generate an OTP per call for closing it
+        Notification = self.env['fsm.notification.transaction']
+        otps = {call.id: Notification._generate_otp_code() for call in self}
+        self._set_current_otps(otps)
+        Notification.create([{
+            'call_id': call.id,
+            'technician_id': call.technician_id.id,
+            'service_partner_id': call.service_partner_id.id,
             'notification_type': 'otp_generated',
-            'old_status': old_state,
+            'old_status': old_states[call.id],
             'new_status': 'resolved',
-            'description': f'OTP generated for closing call {self.name}'
-        })
-        # Generate OTP
-        otp = notification.generate_otp()
-
-        # Update call with OTP information
-        self.write({
-            'current_otp': otp,
-            'otp_generated_date': fields.Datetime.now()
-        })
-
-        # Send message with OTP
-        self.message_post(
-            body=f"OTP {otp} generated for closing this service call. Technician must enter this code to close the call."
-        )
+            'description': f'OTP generated for closing call {call.name}',
+            'otp_code': otps[call.id],
+            'otp_generated_date': now,
+            'otp_verified': False,
+        } for call in self])
         
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
-            'notification_type': 'call_resolved',
-            'old_status': old_state,
-            'new_status': 'resolved',
-            'description': f'Service call {self.name} resolved'
+        # Send message with OTP
+        self._message_log_batch(bodies={
+            call.id: f"OTP {otps[call.id]} generated for closing this service call. Technician must enter this code to close the call."
+            for call in self
         })
+        self._log_transition(old_states, 'resolved', 'call_resolved',
+                             'Service call {call.name} resolved', 'Service resolved.')
+    
+    def _set_current_otps(self, otps):
+        """Store ``{call id: otp}`` with a single UPDATE"""
+        if not otps:
+            return
+        self.flush_recordset(['current_otp'])
+        self.env.cr.execute("""
+            UPDATE fsm_call c
+               SET current_otp = v.otp
+              FROM (VALUES %s) AS v(id, otp)
+             WHERE c.id = v.id
+        """ % ', '.join(['%s'] * len(otps)), list(otps.items()))
+        self.browse(list(otps)).invalidate_recordset(['current_otp'])
     
     def action_close(self):
-        self.ensure_one()
-        if self.state != 'resolved':
+        if self.filtered(lambda c: c.state != 'resolved'):
             raise UserError('Only resolved calls can be closed!')
         
         # Check if attachments exist, if not, open attachment wizard
-        if not self.has_attachments():
-            return {
-                'name': 'Add Attachments',
-                'type': 'ir.actions.act_window',
-                'res_model': 'fsm.call.attachment.wizard',
-                'view_mode': 'form',
-                'target': 'new',
-                'context': {'default_call_id': self.id}
-            }
+        wizard_action = self._attachment_wizard_action()
+        if wizard_action:
+            return wizard_action
         
-        old_state = self.state
+        old_states = {call.id: call.state for call in self}
         self.write({
             'state': 'closed',
             'closed_date': fields.Datetime.now()
         })
-        self.message_post(body='Service call closed.')
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
-            'notification_type': 'call_closed',
-            'old_status': old_state,
-            'new_status': 'closed',
-            'description': f'Service call {self.name} closed'
-        })
+        self._log_transition(old_states, 'closed', 'call_closed',
+                             'Service call {call.name} closed', 'Service call closed.')
     
     def action_cancel(self):
-        self.ensure_one()
-        if self.state in ['closed']:
+        if self.filtered(lambda c: c.state in ['closed']):
             raise UserError('Closed calls cannot be cancelled!')
         
-        old_state = self.state
-        self.state = 'cancelled'
-        self.message_post(body='Service call cancelled.')
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
-            'notification_type': 'call_cancelled',
-            'old_status': old_state,
-            'new_status': 'cancelled',
-            'description': f'Service call {self.name} cancelled'
-        })
+        old_states = {call.id: call.state for call in self}
+        self.write({'state': 'cancelled'})
+        self._log_transition(old_states, 'cancelled', 'call_cancelled',
+                             'Service call {call.name} cancelled', 'Service call cancelled.')
     
     def action_reopen(self):
-        self.ensure_one()
-        if self.state not in ['closed', 'cancelled']:
+        if self.filtered(lambda c: c.state not in ['closed', 'cancelled']):
             raise UserError('Only closed or cancelled calls can be reopened!')
         
-        old_state = self.state
-        self.state = 'confirmed'
-        self.message_post(body='Service call reopened.')
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'call_id': self.id,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'service_partner_id': self.service_partner_id.id if self.service_partner_id else False,
-            'notification_type': 'status_changed',
-            'old_status': old_state,
-            'new_status': 'confirmed',
-            'description': f'Service call {self.name} reopened'
-        })
+        old_states = {call.id: call.state for call in self}
+        self.write({'state': 'confirmed'})
+        self._log_transition(old_states, 'confirmed', 'status_changed',
+                             'Service call {call.name} reopened', 'Service call reopened.')
     
     @api.constrains('warranty_expiry_date', 'purchase_date')
     def _check_warranty_dates(self):
@@ -653,12 +757,7 @@ class FSMCall(models.Model):
             
             # Try to find matching FSM location records based on pincode
             if self.partner_id.zip:
-                # Find pincode record
-                pincode_record = self.env['fsm.pincode'].search([('pincode', '=', self.partner_id.zip)], limit=1)
-                if pincode_record:
-                    self.fsm_pincode_id = pincode_record.id
-                    self.fsm_district_id = pincode_record.district_id.id
-                    self.fsm_state_id = pincode_record.state_id.id
+                self.update(self.env['fsm.location.index']._location_values(self.partner_id.zip))
 
             
     @api.onchange('product_id')
@@ -797,4 +896,81 @@ class FSMCallTag(models.Model):
     
     _sql_constraints = [
         ('unique_tag_name', 'UNIQUE(name)', 'Tag name must be unique!')
-    ]
\ No newline at end of file
+    ]
+
+
+class FSMSlaPolicy(models.Model):
+    _name = 'fsm.sla.policy'
+    _description = 'Service Call SLA Policy'
+    _order = 'priority'
+    _rec_name = 'priority'
+    
+    priority = fields.Selection([
+        ('0', 'Low'),
+        ('1', 'Normal'),
+        ('2', 'High'),
+        ('3', 'Urgent')
+    ], string='Priority', required=True)
+    sla_hours = fields.Float(string='SLA Hours', required=True)
+    
+    _sql_constraints = [
+        ('unique_priority', 'UNIQUE(priority)', 'An SLA policy already exists for this priority!'),
+        ('positive_hours', 'CHECK(sla_hours > 0)', 'SLA hours must be positive!')
+    ]
+    
+    @api.model
+    @tools.ormcache()
+    def _get_sla_hours(self):
+        """SLA hours per priority, falling back to DEFAULT_SLA_HOURS"""
+        sla_hours = dict(DEFAULT_SLA_HOURS)
+        for policy in self.sudo().search_read([], ['priority', 'sla_hours']):
+            sla_hours[policy['priority']] = policy['sla_hours']
+        return sla_hours
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        policies = super(FSMSlaPolicy, self).create(vals_list)
+        self._apply_sla_hours_change(policies.mapped('priority'))
+        return policies
+    
+    def write(self, vals):
+        priorities = set(self.mapped('priority'))
+        res = super(FSMSlaPolicy, self).write(vals)
+        self._apply_sla_hours_change(priorities | set(self.mapped('priority')))
+        return res
+    
+    def unlink(self):
+        priorities = self.mapped('priority')
+        res = super(FSMSlaPolicy, self).unlink()
+        self._apply_sla_hours_change(priorities)
+        return res
+    
+    @api.model
+    def _apply_sla_hours_change(self, priorities):
+        """Clear the cache and move the deadline of open calls of these priorities.
+
+        The breach flag is re-evaluated in the same statement, so a shorter
+        SLA shows up at once instead of at the next SLA refresh cron run.
+        """
+        self.env.registry.clear_cache()
+        if not priorities:
+            return
+        sla_hours = self._get_sla_hours()
+        Call = self.env['fsm.call']
+        Call.flush_model(['priority', 'call_date', 'state', 'sla_deadline', 'is_sla_breached'])
+        now = fields.Datetime.now()
+        breached_ids = []
+        for priority in set(priorities):
+            self.env.cr.execute("""
+                UPDATE fsm_call c
+                   SET sla_deadline = c.call_date + %(hours)s * INTERVAL '1 hour',
+                       is_sla_breached = c.call_date + %(hours)s * INTERVAL '1 hour' < %(now)s
+                  FROM fsm_call old
+                 WHERE c.id = old.id AND c.priority = %(priority)s AND c.call_date IS NOT NULL
+                   AND c.state NOT IN ('closed', 'cancelled')
+             RETURNING c.id, (c.is_sla_breached AND NOT COALESCE(old.is_sla_breached, FALSE))
+            """, {'hours': sla_hours.get(priority, 48), 'priority': priority, 'now': now})
+            breached_ids += [call_id for call_id, newly_breached in self.env.cr.fetchall() if newly_breached]
+        Call.invalidate_model(['sla_deadline', 'is_sla_breached'])
+        if breached_ids:
+            Call.browse(breached_ids)._create_sla_breach_notifications()
@@ -2,6 +2,9 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError, UserError
 from datetime import datetime, timedelta
+from collections import defaultdict
+
+from ..tools.claim import bucket_by_tat
 
 class FSMClaim(models.Model):
     _name = 'fsm.claim'
@@ -88,14 +91,22 @@ class FSMClaim(models.Model):
     attachment_ids = fields.Many2many('ir.attachment', string='Supporting Documents')
     attachment_count = fields.Integer(string='Document Count', compute='_compute_attachment_count')
     
+    # Batch claim run that created this claim
+    claim_run_id = fields.Many2one('fsm.claim.run', string='Claim Run', readonly=True, index=True, ondelete='set null')
+    
     company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
     currency_id = fields.Many2one('res.currency', related='company_id.currency_id', readonly=True)
     
-    @api.model
-    def create(self, vals):
-        if vals.get('name', 'New') == 'New':
-            vals['name'] = self.env['ir.sequence'].next_by_code('fsm.claim') or 'New'
-        return super(FSMClaim, self).create(vals)
+    _sql_constraints = [
+        ('unique_run_partner', 'UNIQUE(claim_run_id, service_partner_id)', 'A claim run creates only one claim per service partner!')
+    ]
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', 'New') == 'New':
+                vals['name'] = self.env['ir.sequence'].next_by_code('fsm.claim') or 'New'
+        return super(FSMClaim, self).create(vals_list)
     
     @api.depends('service_partner_id')
     def _compute_technicians(self):
@@ -109,24 +120,15 @@ class FSMClaim(models.Model):
     
     @api.depends('claim_line_ids.amount', 'call_ids', 'expense_amount', 'incentive_amount', 'penalty_amount')
     def _compute_amounts(self):
+        spare_amounts, expense_amounts = self._get_call_cost_amounts(self.call_ids)
         for record in self:
             # TAT-based claim amounts
             record.total_calls_amount = sum(record.claim_line_ids.mapped('amount'))
             
-            # Calculate spare parts amount from calls
-            spare_requests = record.call_ids.mapped('spare_request_ids').filtered(lambda r: r.state == 'received')
-            spare_amount = 0
-            for request in spare_requests:
-                spare_amount += sum(request.spare_line_ids.mapped('subtotal'))
-            record.spare_parts_amount = spare_amount
-            
-            # Calculate expense amount from calls
-            expenses = self.env['fsm.expense'].search([
-                ('call_id', 'in', record.call_ids.ids),
-                ('state', '=', 'approved'),
-                ('is_reimbursable', '=', True)
-            ])
-            record.expense_amount = sum(expenses.mapped('final_amount'))
+            # Spare parts and expense amounts from calls
+            call_ids = record.call_ids.ids
+            record.spare_parts_amount = sum(spare_amounts.get(call_id, 0.0) for call_id in call_ids)
+            record.expense_amount = sum(expense_amounts.get(call_id, 0.0) for call_id in call_ids)
             
             # Calculate subtotal
             record.subtotal_amount = (
@@ -143,6 +145,32 @@ class FSMClaim(models.Model):
             # Total amount
             record.total_amount = record.subtotal_amount + record.tax_amount
     
+    @api.model
+    def _get_call_cost_amounts(self, calls):
+        """Received spare and reimbursable expense totals per call id, for any number of claims.
+
+        Returns two dicts keyed by call id, built with one grouped query each.
+        """
+        spare_amounts = defaultdict(float)
+        expense_amounts = {}
+        if not calls.ids:
+            return spare_amounts, expense_amounts
+        spare_groups = self.env['fsm.spare.request.line']._read_group(
+            [('request_id.call_id', 'in', calls.ids), ('request_id.state', '=', 'received')],
+            ['request_id'],
+            ['subtotal:sum'],
+        )
+        for request, subtotal in spare_groups:
+            spare_amounts[request.call_id.id] += subtotal
+        expense_groups = self.env['fsm.expense']._read_group(
+            [('call_id', 'in', calls.ids), ('state', '=', 'approved'), ('is_reimbursable', '=', True)],
+            ['call_id'],
+            ['final_amount:sum'],
+        )
+        for call, final_amount in expense_groups:
+            expense_amounts[call.id] = final_amount
+        return spare_amounts, expense_amounts
+    
     @api.depends('attachment_ids')
     def _compute_attachment_count(self):
         for record in self:
@@ -161,57 +189,63 @@ class FSMClaim(models.Model):
             self.call_ids = [(6, 0, calls.ids)]
     
     def action_calculate_claim(self):
-        """Calculate claim based on TAT categories"""
-        self.ensure_one()
-        
-        # Clear existing lines
-        self.claim_line_ids.unlink()
-        
-        # Get TAT categories for service partner
-        tat_categories = self.service_partner_id.tat_category_ids.sorted('days')
-        
-        if not tat_categories:
-            raise ValidationError('No TAT categories defined for this service partner!')
-        
-        # Group calls by TAT achievement
-        for category in tat_categories:
-            eligible_calls = self.env['fsm.call']
-            
-            for call in self.call_ids:
-                if call.closed_date and call.call_date:
-                    days_taken = (call.closed_date.date() - call.call_date.date()).days
-                    if days_taken <= category.days:
-                        eligible_calls |= call
-            
-            if eligible_calls:
-                # Remove calls already counted in lower TAT categories
-                already_counted = self.claim_line_ids.mapped('call_ids')
-                eligible_calls = eligible_calls - already_counted
-                
-                if eligible_calls:
-                    line_vals = {
-                        'claim_id': self.id,
-                        'tat_category_id': category.id,
-                        'call_ids': [(6, 0, eligible_calls.ids)],
-                        'call_count': len(eligible_calls),
-                        'rate': category.amount,
-                        'amount': len(eligible_calls) * category.amount
-                    }
-                    self.env['fsm.claim.line'].create(line_vals)
-        
-        self.message_post(body='Claim calculated based on TAT categories.')
+        """Calculate claims based on TAT categories"""
+        self._calculate_claim_lines()
+        for claim in self:
+            claim.message_post(body='Claim calculated based on TAT categories.')
         
+        message = f'Total claim amount: {self.total_amount}' if len(self) == 1 else f'{len(self)} claims calculated.'
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
                 'title': 'Claim Calculated',
-                'message': f'Total claim amount: {self.total_amount}',
+                'message': message,
                 'type': 'success',
                 'sticky': False,
             }
         }
     
+    def _calculate_claim_lines(self):
+        """Replace the claim lines of all claims in self with TAT-based lines.
+
+        Days to close are computed once per call, each call is put in the
+        fastest TAT category it meets with a single sorted pass, and all
+        lines are created in one batch.
+        """
+        no_categories = self.filtered(lambda c: not c.service_partner_id.tat_category_ids)
+        if no_categories:
+            raise ValidationError('No TAT categories defined for service partner(s): %s'
+                                  % ', '.join(no_categories.service_partner_id.mapped('name')))
+        
+        days_by_call = {
+            call.id: (call.closed_date.date() - call.call_date.date()).days
+            for call in self.call_ids if call.closed_date and call.call_date
+        }
+        
+        self.claim_line_ids.unlink()
+        
+        line_vals_list = []
+        for claim in self:
+            categories = claim.service_partner_id.tat_category_ids.sorted('days')
+            call_ids = [call_id for call_id in claim.call_ids.ids if call_id in days_by_call]
+            buckets = bucket_by_tat([days_by_call[call_id] for call_id in call_ids], categories.mapped('days'))
+            
+            call_ids_by_bucket = defaultdict(list)
+            for call_id, bucket in zip(call_ids, buckets):
+                if bucket >= 0:
+                    call_ids_by_bucket[int(bucket)].append(call_id)
+            
+            for index, category in enumerate(categories):
+                if call_ids_by_bucket[index]:
+                    line_vals_list.append({
+                        'claim_id': claim.id,
+                        'tat_category_id': category.id,
+                        'call_ids': [(6, 0, call_ids_by_bucket[index])],
+                        'rate': category.amount,
+                    })
+        return self.env['fsm.claim.line'].create(line_vals_list)
+    
     def action_submit(self):
         """Submit claim for verification"""
         self.ensure_one()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError, ValidationError
+
+_logger = logging.getLogger(__name__)
+
+
+class FSMClaimRun(models.Model):
+    _name = 'fsm.claim.run'
+    _description = 'Service Partner Claim Run'
+    _inherit = ['mail.thread']
+    _order = 'period_start desc, id desc'
+
+    name = fields.Char(string='Name', compute='_compute_name', store=True)
+    period_start = fields.Date(string='Period Start', required=True)
+    period_end = fields.Date(string='Period End', required=True)
+    chunk_size = fields.Integer(string='Partners per Chunk', default=50, required=True)
+
+    partner_ids = fields.Many2many('fsm.service.partner', string='Service Partners',
+                                   help='Leave empty to run for every active service partner of the company')
+    claim_ids = fields.One2many('fsm.claim', 'claim_run_id', string='Claims')
+    skipped_partner_ids = fields.Many2many('fsm.service.partner', 'fsm_claim_run_skipped_rel',
+                                           'run_id', 'partner_id', string='Skipped Partners', readonly=True,
+                                           help='Partners without TAT categories or without closed calls in the period')
+
+    partner_count = fields.Integer(string='Partners', compute='_compute_progress')
+    processed_count = fields.Integer(string='Processed', compute='_compute_progress')
+    claim_count = fields.Integer(string='Claims', compute='_compute_progress')
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    total_amount = fields.Monetary(string='Total Claim Amount', compute='_compute_progress')
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled')
+    ], default='draft', string='Status', tracking=True)
+    started_date = fields.Datetime(string='Started', readonly=True)
+    finished_date = fields.Datetime(string='Finished', readonly=True)
+
+    company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
+    currency_id = fields.Many2one('res.currency', related='company_id.currency_id', readonly=True)
+
+    @api.depends('period_start', 'period_end')
+    def _compute_name(self):
+        for run in self:
+            run.name = f'Claims {run.period_start or ""} - {run.period_end or ""}'
+
+    @api.depends('partner_ids', 'claim_ids', 'skipped_partner_ids')
+    def _compute_progress(self):
+        for run in self:
+            run.partner_count = len(run.partner_ids)
+            run.claim_count = len(run.claim_ids)
+            run.processed_count = run.claim_count + len(run.skipped_partner_ids)
+            run.progress = 100.0 * run.processed_count / run.partner_count if run.partner_count else 0.0
+            run.total_amount = sum(run.claim_ids.mapped('total_amount'))
+
+    @api.constrains('period_start', 'period_end', 'chunk_size')
+    def _check_period_dates(self):
+        for run in self:
+            if run.period_end < run.period_start:
+                raise ValidationError('Period end date must be after start date!')
+            if run.chunk_size <= 0:
+                raise ValidationError('Partners per chunk must be positive!')
+
+    def action_start(self):
+        """Queue the runs; partners are processed in chunks by the claim run cron"""
+        for run in self:
+            if run.state != 'draft':
+                raise UserError('Only draft claim runs can be started!')
+            if not run.partner_ids:
+                run.partner_ids = self.env['fsm.service.partner'].search([
+                    ('active', '=', True),
+                    ('company_id', 'in', [run.company_id.id, False]),
+                ])
+        self.write({'state': 'running', 'started_date': fields.Datetime.now()})
+        self.env.ref('field_service_management.ir_cron_fsm_process_claim_runs')._trigger()
+
+    def action_process(self):
+        """Process the remaining partners right away, in the current transaction"""
+        self.filtered(lambda r: r.state == 'running')._process(auto_commit=False)
+
+    def action_cancel(self):
+        if self.filtered(lambda r: r.state == 'done'):
+            raise UserError('Finished claim runs cannot be cancelled!')
+        self.write({'state': 'cancelled'})
+
+    def action_view_claims(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Claims',
+            'res_model': 'fsm.claim',
+            'view_mode': 'tree,form',
+            'domain': [('claim_run_id', '=', self.id)],
+            'context': {'create': False},
+        }
+
+    def _get_remaining_partners(self):
+        self.ensure_one()
+        return self.partner_ids - self.claim_ids.service_partner_id - self.skipped_partner_ids
+
+    def _get_eligible_call_ids(self, partners):
+        """Closed calls of the period for all partners, in one query partitioned by partner"""
+        self.ensure_one()
+        groups = self.env['fsm.call']._read_group([
+            ('service_partner_id', 'in', partners.ids),
+            ('call_date', '>=', self.period_start),
+            ('call_date', '<=', self.period_end),
+            ('state', 'in', ['closed', 'resolved']),
+        ], ['service_partner_id'], ['id:array_agg'])
+        return {partner.id: call_ids for partner, call_ids in groups}
+
+    def _lock(self):
+        """Rows of self not already being processed by another worker"""
+        self.env.cr.execute("""
+            SELECT id FROM fsm_claim_run
+             WHERE id IN %s AND state = 'running'
+               FOR UPDATE SKIP LOCKED
+        """, (tuple(self.ids),))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _process(self, auto_commit=True):
+        """Create and calculate claims for the remaining partners, chunk by chunk.
+
+        Runs are locked one at a time. Each chunk is committed when auto_commit
+        is set, which releases the lock: the run is locked again and its
+        remaining partners re-read from the database before the next chunk, so
+        a worker that took the run in between is never raced, and an
+        interrupted run resumes with the partners that have neither a claim
+        nor a skip entry.
+        """
+        for run in self:
+            locked = bool(run._lock())
+            while locked:
+                remaining = run._get_remaining_partners()
+                if not remaining:
+                    break
+                chunk = remaining[:run.chunk_size]
+                run._process_chunk(chunk, run._get_eligible_call_ids(chunk))
+                _logger.info('FSM claim run %s: %s/%s partners processed',
+                             run.id, run.processed_count, run.partner_count)
+                if auto_commit:
+                    self.env.cr.commit()
+                    run.invalidate_recordset()
+                    # Taken over by another worker, or finished, between two chunks
+                    locked = bool(run._lock())
+            if not locked:
+                continue
+            run.write({'state': 'done', 'finished_date': fields.Datetime.now()})
+            run.message_post(body=f'{run.claim_count} claims created, '
+                                  f'{len(run.skipped_partner_ids)} partners skipped.')
+            if auto_commit:
+                self.env.cr.commit()
+
+    def _process_chunk(self, partners, call_ids_by_partner):
+        self.ensure_one()
+        to_skip = partners.filtered(lambda p: not p.tat_category_ids or not call_ids_by_partner.get(p.id))
+        claims = self.env['fsm.claim'].with_context(mail_create_nolog=True).create([{
+            'service_partner_id': partner.id,
+            'period_start': self.period_start,
+            'period_end': self.period_end,
+            'call_ids': [(6, 0, call_ids_by_partner[partner.id])],
+            'claim_run_id': self.id,
+            'company_id': self.company_id.id,
+        } for partner in partners - to_skip])
+        claims._calculate_claim_lines()
+        if to_skip:
+            self.skipped_partner_ids = [(4, partner.id) for partner in to_skip]
+
+    @api.model
+    def _cron_process_claim_runs(self):
+        """Cron job to process queued claim runs and resume interrupted ones"""
+        self.search([('state', '=', 'running')])._process()
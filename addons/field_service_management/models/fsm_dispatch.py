@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import numpy as np
+
+from odoo import models, fields, api
+
+from ..tools import dispatch
+
+_logger = logging.getLogger(__name__)
+
+
+class FSMDispatchOptimizer(models.AbstractModel):
+    _name = 'fsm.dispatch.optimizer'
+    _description = 'Service Call Dispatch Optimizer'
+
+    PRIORITY_LEVELS = {'0': 0, '1': 1, '2': 2, '3': 3}
+
+    @api.model
+    def _get_dispatch_calls(self):
+        """Open calls still waiting for a technician"""
+        return self.env['fsm.call'].search([
+            ('state', 'in', ['draft', 'confirmed']),
+            ('technician_id', '=', False),
+        ])
+
+    @api.model
+    def _get_dispatch_technicians(self):
+        """Technicians that can take new calls"""
+        return self.env['fsm.technician'].search([
+            ('state', '=', 'available'),
+            ('active', '=', True),
+        ])
+
+    @api.model
+    def _get_remaining_capacity(self, technicians):
+        """Free slots per technician: max_active_calls minus currently open calls"""
+        return np.array([
+            tech.max_active_calls - tech.active_call_count for tech in technicians
+        ], dtype=np.int64)
+
+    @api.model
+    def _partner_coordinates(self, partners):
+        """Latitude/longitude arrays for partners, NaN when not geolocated"""
+        lat = np.full(len(partners), np.nan)
+        lon = np.full(len(partners), np.nan)
+        for index, partner in enumerate(partners):
+            if partner and (partner.partner_latitude or partner.partner_longitude):
+                lat[index] = partner.partner_latitude
+                lon[index] = partner.partner_longitude
+        return lat, lon
+
+    @api.model
+    def _prepare_dispatch_problem(self, calls, technicians):
+        """Collect the arrays fed to the cost matrix for calls x technicians"""
+        now = fields.Datetime.now()
+        slack_hours = np.array([
+            (call.sla_deadline - now).total_seconds() / 3600 if call.sla_deadline else 0.0
+            for call in calls
+        ])
+        priority = np.array([self.PRIORITY_LEVELS.get(call.priority, 1) for call in calls])
+
+        skill_index = {skill_id: index for index, skill_id in enumerate(
+            set(calls.skill_ids.ids) | set(technicians.skill_ids.ids))}
+        call_skills = np.zeros((len(calls), len(skill_index)), dtype=bool)
+        for row, call in enumerate(calls):
+            call_skills[row, [skill_index[sid] for sid in call.skill_ids.ids]] = True
+        tech_skills = np.zeros((len(technicians), len(skill_index)), dtype=bool)
+        for row, tech in enumerate(technicians):
+            tech_skills[row, [skill_index[sid] for sid in tech.skill_ids.ids]] = True
+
+        call_lat, call_lon = self._partner_coordinates([call.partner_id for call in calls])
+        tech_lat, tech_lon = self._partner_coordinates([
+            tech.partner_id or tech.user_id.partner_id for tech in technicians
+        ])
+        return {
+            'call_lat': call_lat,
+            'call_lon': call_lon,
+            'tech_lat': tech_lat,
+            'tech_lon': tech_lon,
+            'slack_hours': slack_hours,
+            'priority': priority,
+            'call_skills': call_skills,
+            'tech_skills': tech_skills,
+            'capacity': self._get_remaining_capacity(technicians),
+        }
+
+    @api.model
+    def optimize(self, calls, technicians, method='greedy', distance_weight=1.0, sla_weight=100.0, speed_kmh=30.0):
+        """Compute an assignment minimizing SLA breach risk and travel distance.
+
+        Technicians must have every skill required by the call and free
+        capacity left. Returns a list of ``(call, technician)`` pairs; calls
+        without a feasible technician are left out.
+        """
+        if not calls or not technicians:
+            return []
+        problem = self._prepare_dispatch_problem(calls, technicians)
+        cost = dispatch.build_cost_matrix(
+            distance_weight=distance_weight, sla_weight=sla_weight, speed_kmh=speed_kmh, **problem)
+        if method == 'hungarian':
+            assignment = dispatch.solve_hungarian(cost, problem['capacity'])
+        else:
+            order = dispatch.urgency_order(problem['slack_hours'], problem['priority'])
+            assignment = dispatch.solve_greedy(cost, problem['capacity'], order)
+        return [
+            (calls[int(row)], technicians[int(column)])
+            for row, column in enumerate(assignment) if column >= 0
+        ]
+
+    @api.model
+    def dispatch(self, calls=None, technicians=None, **options):
+        """Optimize and assign calls; returns the calls that got a technician"""
+        calls = self._get_dispatch_calls() if calls is None else calls
+        technicians = self._get_dispatch_technicians() if technicians is None else technicians
+        pairs = self.optimize(calls, technicians, **options)
+
+        by_technician = {}
+        for call, technician in pairs:
+            by_technician.setdefault(technician, []).append(call.id)
+        for technician, call_ids in by_technician.items():
+            self.env['fsm.call'].browse(call_ids).write({
+                'technician_id': technician.id,
+                'service_partner_id': technician.service_partner_id.id,
+                'auto_assigned': True,
+            })
+        assigned = self.env['fsm.call'].browse([call.id for call, technician in pairs])
+        assigned.action_assign()
+
+        _logger.info('FSM dispatch: assigned %s of %s calls to %s technicians',
+                     len(assigned), len(calls), len(by_technician))
+        return assigned
+
+    @api.model
+    def _cron_dispatch_open_calls(self):
+        """Cron job to dispatch all unassigned open calls"""
+        self.dispatch()
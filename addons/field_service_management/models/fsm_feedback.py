@@ -4,6 +4,11 @@ from odoo.exceptions import ValidationError, UserError
 import random
 import string
 from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+
+# Dimensions accepted by get_rating_statistics, 'period' being the submitted date
+FEEDBACK_STAT_DIMENSIONS = ('period', 'technician_id', 'service_partner_id', 'product_id')
+FEEDBACK_STAT_PERIODS = ('day', 'week', 'month', 'quarter', 'year')
 
 class FSMFeedback(models.Model):
     _name = 'fsm.feedback'
@@ -16,8 +21,10 @@ class FSMFeedback(models.Model):
     
     # Related Records
     call_id = fields.Many2one('fsm.call', string='Service Call', required=True, tracking=True)
-    partner_id = fields.Many2one('res.partner', string='Customer', related='call_id.partner_id', store=True, readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Customer', related='call_id.partner_id', store=True, readonly=True, index=True)
     technician_id = fields.Many2one('fsm.technician', string='Technician', related='call_id.technician_id', store=True, readonly=True)
+    service_partner_id = fields.Many2one('fsm.service.partner', string='Service Partner', related='call_id.service_partner_id', store=True, readonly=True)
+    product_id = fields.Many2one('product.template', string='Product', related='call_id.product_id', store=True, readonly=True)
     
     # Feedback Information
     rating = fields.Selection([
@@ -123,7 +130,36 @@ class FSMFeedback(models.Model):
             if existing:
                 raise ValidationError('Feedback has already been submitted for this service call!')
         
-        return super(FSMFeedback, self).create(vals)
+        feedback = super(FSMFeedback, self).create(vals)
+        self.env['fsm.technician']._apply_counter_deltas(feedback._get_technician_counter_deltas())
+        return feedback
+    
+    def write(self, vals):
+        if not {'rating', 'call_id'}.intersection(vals):
+            return super(FSMFeedback, self).write(vals)
+        deltas = self._get_technician_counter_deltas(sign=-1)
+        res = super(FSMFeedback, self).write(vals)
+        self._get_technician_counter_deltas(deltas=deltas)
+        self.env['fsm.technician']._apply_counter_deltas(deltas)
+        return res
+    
+    def unlink(self):
+        deltas = self._get_technician_counter_deltas(sign=-1)
+        res = super(FSMFeedback, self).unlink()
+        self.env['fsm.technician']._apply_counter_deltas(deltas)
+        return res
+    
+    def _get_technician_counter_deltas(self, sign=1, deltas=None):
+        """Rating contribution of these feedbacks to their call's technician"""
+        if deltas is None:
+            deltas = defaultdict(Counter)
+        for feedback in self:
+            call = feedback.call_id
+            if feedback.rating and call.technician_id and call.active:
+                delta = deltas[call.technician_id.id]
+                delta['rating_sum'] += sign * int(feedback.rating)
+                delta['rating_count'] += sign
+        return deltas
     
     def generate_otp(self):
         """Generate 6-digit OTP"""
@@ -321,27 +357,78 @@ class FSMFeedback(models.Model):
             else:
                 self.satisfaction = 'highly_dissatisfied'
     
+    @api.model
+    def get_rating_statistics(self, groupby=(), period='month', date_from=None, date_to=None,
+                              company_ids=None, domain=None):
+        """Feedback totals, average rating and rating histogram per group.
+
+        groupby is any subset of FEEDBACK_STAT_DIMENSIONS; 'period' groups on
+        the submitted date with the given granularity. Everything comes from
+        one grouped query: the requested dimensions are grouped together with
+        rating, would_recommend and requires_followup and folded here.
+
+        Returns a list of dicts holding the dimension values (records, or the
+        period start date) and the statistics, ordered by dimension.
+        """
+        if any(dimension not in FEEDBACK_STAT_DIMENSIONS for dimension in groupby):
+            raise UserError('Feedback statistics can only be grouped by %s.' % ', '.join(FEEDBACK_STAT_DIMENSIONS))
+        if period not in FEEDBACK_STAT_PERIODS:
+            raise UserError('Unknown statistics period: %s' % period)
+        domain = list(domain or [])
+        if date_from:
+            domain.append(('submitted_date', '>=', date_from))
+        if date_to:
+            domain.append(('submitted_date', '<=', date_to))
+        if company_ids:
+            domain.append(('company_id', 'in', company_ids))
+        
+        groupby_specs = [f'submitted_date:{period}' if d == 'period' else d for d in groupby]
+        groups = self._read_group(
+            domain,
+            groupby_specs + ['rating', 'would_recommend', 'requires_followup'],
+            ['__count'],
+            order=', '.join(groupby_specs) or None,
+        )
+        
+        statistics = {}
+        for *keys, rating, would_recommend, requires_followup, count in groups:
+            stats = statistics.get(tuple(keys))
+            if stats is None:
+                stats = statistics[tuple(keys)] = dict(zip(groupby, keys), total_feedback=0, rating_sum=0,
+                                                       rating_histogram={star: 0 for star in range(1, 6)},
+                                                       would_recommend=0, requires_followup=0)
+            stats['total_feedback'] += count
+            if rating:
+                stats['rating_sum'] += int(rating) * count
+                stats['rating_histogram'][int(rating)] += count
+            if would_recommend:
+                stats['would_recommend'] += count
+            if requires_followup:
+                stats['requires_followup'] += count
+        
+        for stats in statistics.values():
+            rated = sum(stats['rating_histogram'].values())
+            stats['average_rating'] = round(stats.pop('rating_sum') / rated, 2) if rated else 0.0
+        return list(statistics.values())
+    
     def get_feedback_statistics(self):
         """Get feedback statistics for reporting"""
-        domain = [('state', '=', 'submitted')]
-        all_feedback = self.search(domain)
-        
-        if not all_feedback:
+        statistics = self.get_rating_statistics(domain=[('state', '=', 'submitted')])
+        if not statistics:
             return {}
-        
-        ratings = [int(f.rating) for f in all_feedback]
-        avg_rating = sum(ratings) / len(ratings) if ratings else 0
+        stats = statistics[0]
+        histogram = stats['rating_histogram']
         
         return {
-            'total_feedback': len(all_feedback),
-            'average_rating': round(avg_rating, 2),
-            'five_star': len([r for r in ratings if r == 5]),
-            'four_star': len([r for r in ratings if r == 4]),
-            'three_star': len([r for r in ratings if r == 3]),
-            'two_star': len([r for r in ratings if r == 2]),
-            'one_star': len([r for r in ratings if r == 1]),
-            'would_recommend': len(all_feedback.filtered('would_recommend')),
-            'requires_followup': len(all_feedback.filtered('requires_followup')),
+            'total_feedback': stats['total_feedback'],
+            'average_rating': stats['average_rating'],
+            'five_star': histogram[5],
+            'four_star': histogram[4],
+            'three_star': histogram[3],
+            'two_star': histogram[2],
+            'one_star': histogram[1],
+            'would_recommend': stats['would_recommend'],
+            'requires_followup': stats['requires_followup'],
         }
 
 
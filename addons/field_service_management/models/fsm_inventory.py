@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, Command
 from odoo.exceptions import ValidationError, UserError
 
 class FSMInventory(models.Model):
@@ -97,11 +97,9 @@ class FSMInventory(models.Model):
         
         # Validate stock availability for outward movements
         if self.movement_type in ['outward', 'transfer']:
+            available = self._get_available_quantities(self.line_ids.product_id, self.source_location_id)
             for line in self.line_ids:
-                available_qty = self._get_available_quantity(
-                    line.product_id, 
-                    self.source_location_id
-                )
+                available_qty = available.get(line.product_id.id, 0.0)
                 if available_qty < line.quantity:
                     raise ValidationError(
                         f"Insufficient stock for {line.product_id.name}. "
@@ -152,11 +150,15 @@ class FSMInventory(models.Model):
     
     def _get_available_quantity(self, product, location):
         """Get available quantity for a product in a location"""
-        quants = self.env['stock.quant'].search([
-            ('product_id', '=', product.id),
+        return self._get_available_quantities(product, location).get(product.id, 0.0)
+    
+    def _get_available_quantities(self, products, location):
+        """Available quantity per product id in a location, in one grouped quant read"""
+        groups = self.env['stock.quant']._read_group([
+            ('product_id', 'in', products.ids),
             ('location_id', '=', location.id)
-        ])
-        return sum(quants.mapped('quantity'))
+        ], ['product_id'], ['quantity:sum'])
+        return {product.id: quantity for product, quantity in groups}
     
     def _create_stock_picking(self):
         """Create stock picking for inventory movement"""
@@ -176,21 +178,17 @@ class FSMInventory(models.Model):
             'partner_id': self.technician_id.partner_id.id if self.technician_id else False,
         }
         
+        # Create the picking with all its stock moves at once
+        picking_vals['move_ids'] = [Command.create({
+            'product_id': line.product_id.id,
+            'product_uom_qty': line.quantity,
+            'product_uom': line.product_id.uom_id.id,
+            'location_id': self.source_location_id.id,
+            'location_dest_id': self.dest_location_id.id,
+            'name': line.product_id.name,
+        }) for line in self.line_ids]
         picking = self.env['stock.picking'].create(picking_vals)
         
-        # Create stock moves
-        for line in self.line_ids:
-            move_vals = {
-                'picking_id': picking.id,
-                'product_id': line.product_id.id,
-                'product_uom_qty': line.quantity,
-                'product_uom': line.product_id.uom_id.id,
-                'location_id': self.source_location_id.id,
-                'location_dest_id': self.dest_location_id.id,
-                'name': line.product_id.name,
-            }
-            self.env['stock.move'].create(move_vals)
-        
         self.picking_id = picking
     
     def _get_picking_type(self):
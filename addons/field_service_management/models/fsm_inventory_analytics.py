@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+# Moves of products linked to an active spare part
+SPARE_PRODUCTS_SQL = "SELECT product_id FROM fsm_spare WHERE active AND product_id IS NOT NULL"
+
+
+class FSMInventoryAnalytics(models.AbstractModel):
+    _name = 'fsm.inventory.analytics'
+    _description = 'FSM Inventory Movement Analytics'
+
+    @api.model
+    def get_movement_summary(self, days=30, recent_days=7):
+        """Inward/outward quantities and counts of done spare moves, in one grouped query.
+
+        A move is inward when its destination is an internal location and
+        outward when its source is, as on the inventory dashboard.
+        """
+        self.env['stock.move'].flush_model(['state', 'date', 'product_id', 'product_uom_qty',
+                                            'location_id', 'location_dest_id', 'company_id'])
+        today = fields.Date.today()
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(m.product_uom_qty) FILTER (WHERE dest.usage = 'internal'), 0),
+                   COUNT(*) FILTER (WHERE dest.usage = 'internal'),
+                   COALESCE(SUM(m.product_uom_qty) FILTER (WHERE src.usage = 'internal'), 0),
+                   COUNT(*) FILTER (WHERE src.usage = 'internal'),
+                   COUNT(*) FILTER (WHERE m.date >= %(recent_from)s)
+              FROM stock_move m
+              JOIN stock_location src ON src.id = m.location_id
+              JOIN stock_location dest ON dest.id = m.location_dest_id
+             WHERE m.state = 'done'
+               AND m.date >= %(date_from)s
+               AND m.company_id = ANY(%(company_ids)s)
+               AND m.product_id IN (""" + SPARE_PRODUCTS_SQL + """)
+        """, {
+            'date_from': today - timedelta(days=days),
+            'recent_from': today - timedelta(days=recent_days),
+            'company_ids': self.env.companies.ids,
+        })
+        inward_qty, inward_count, outward_qty, outward_count, recent_count = self.env.cr.fetchone()
+        return {
+            'total_inward_qty': float(inward_qty),
+            'inward_moves_count': inward_count,
+            'total_outward_qty': float(outward_qty),
+            'outward_moves_count': outward_count,
+            'recent_moves_count': recent_count,
+        }
+
+    @api.model
+    def get_turnover_ratio(self, outward_qty, stock_value):
+        return outward_qty / (stock_value or 1)
+
+    @api.model
+    def get_movement_trend(self, days=30):
+        """Daily inward/outward totals from the pre-aggregated movement table"""
+        date_from = fields.Date.today() - timedelta(days=days)
+        groups = self.env['fsm.inventory.movement.daily']._read_group(
+            [('date', '>=', date_from), ('company_id', 'in', self.env.companies.ids)],
+            ['date:day'],
+            ['inward_qty:sum', 'inward_count:sum', 'outward_qty:sum', 'outward_count:sum'],
+            order='date:day',
+        )
+        return [{
+            'date': fields.Date.to_string(day),
+            'inward_qty': inward_qty,
+            'inward_count': inward_count,
+            'outward_qty': outward_qty,
+            'outward_count': outward_count,
+        } for day, inward_qty, inward_count, outward_qty, outward_count in groups]
+
+
+class FSMInventoryMovementDaily(models.Model):
+    _name = 'fsm.inventory.movement.daily'
+    _description = 'FSM Daily Spare Movements'
+    _order = 'date desc'
+    _rec_name = 'date'
+
+    date = fields.Date(string='Date', required=True, readonly=True, index=True)
+    product_id = fields.Many2one('product.product', string='Product', required=True, readonly=True, index=True)
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True)
+    inward_qty = fields.Float(string='Inward Quantity', readonly=True)
+    inward_count = fields.Integer(string='Inward Moves', readonly=True)
+    outward_qty = fields.Float(string='Outward Quantity', readonly=True)
+    outward_count = fields.Integer(string='Outward Moves', readonly=True)
+
+    _sql_constraints = [
+        ('unique_day_product', 'UNIQUE(date, product_id, company_id)', 'Only one movement row per product and day!')
+    ]
+
+    @api.model
+    def _refresh(self, date_from):
+        """Rebuild the daily rows from date_from onwards with one grouped INSERT"""
+        self.env['stock.move'].flush_model(['state', 'date', 'product_id', 'product_uom_qty',
+                                            'location_id', 'location_dest_id', 'company_id'])
+        self.env.cr.execute("DELETE FROM fsm_inventory_movement_daily WHERE date >= %s", (date_from,))
+        self.env.cr.execute("""
+            INSERT INTO fsm_inventory_movement_daily
+                   (date, product_id, company_id, inward_qty, inward_count, outward_qty, outward_count,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT m.date::date, m.product_id, m.company_id,
+                   COALESCE(SUM(m.product_uom_qty) FILTER (WHERE dest.usage = 'internal'), 0),
+                   COUNT(*) FILTER (WHERE dest.usage = 'internal'),
+                   COALESCE(SUM(m.product_uom_qty) FILTER (WHERE src.usage = 'internal'), 0),
+                   COUNT(*) FILTER (WHERE src.usage = 'internal'),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM stock_move m
+              JOIN stock_location src ON src.id = m.location_id
+              JOIN stock_location dest ON dest.id = m.location_dest_id
+             WHERE m.state = 'done'
+               AND m.date >= %(date_from)s
+               AND m.product_id IN (""" + SPARE_PRODUCTS_SQL + """)
+          GROUP BY m.date::date, m.product_id, m.company_id
+        """, {'date_from': date_from, 'uid': self.env.uid})
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh_daily_movements(self, days=3):
+        """Cron job to refresh the last few days; rebuilds a full year when the table is empty"""
+        if not self.search_count([], limit=1):
+            days = 365
+        self._refresh(fields.Date.today() - timedelta(days=days))
@@ -37,6 +37,8 @@ class FSMDistrict(models.Model):
 class FSMPincode(models.Model):
     _name = 'fsm.pincode'
     _description = 'FSM Pincode Master'
+    _inherit = ['fsm.location.index.mixin']
+    _location_index_fields = ('pincode', 'district_id', 'state_id', 'latitude', 'longitude', 'active')
     _order = 'pincode'
     _rec_name = 'pincode'
     
@@ -44,6 +46,8 @@ class FSMPincode(models.Model):
     district_id = fields.Many2one('fsm.district', string='District', required=True)
     state_id = fields.Many2one('fsm.state', string='State', required=True)
     area_ids = fields.One2many('fsm.area', 'pincode_id', string='Areas')
+    latitude = fields.Float(string='Latitude', digits=(10, 7))
+    longitude = fields.Float(string='Longitude', digits=(10, 7))
     active = fields.Boolean(default=True)
     
     @api.onchange('district_id')
@@ -51,14 +55,18 @@ class FSMPincode(models.Model):
         if self.district_id:
             self.state_id = self.district_id.state_id
     
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            self._set_state_from_district(vals)
+        return super(FSMPincode, self).create(vals_list)
+    
+    def _set_state_from_district(self, vals):
         # Automatically set state_id from district_id if not provided
         if 'district_id' in vals and 'state_id' not in vals:
             district = self.env['fsm.district'].browse(vals['district_id'])
             if district:
                 vals['state_id'] = district.state_id.id
-        return super(FSMPincode, self).create(vals)
     
     def write(self, vals):
         # Automatically set state_id from district_id if district is being updated
@@ -88,6 +96,8 @@ class FSMPincode(models.Model):
 class FSMArea(models.Model):
     _name = 'fsm.area'
     _description = 'FSM Area Master'
+    _inherit = ['fsm.location.index.mixin']
+    _location_index_fields = ('name', 'pincode_id', 'active')
     _order = 'name'
     
     name = fields.Char(string='Area Name', required=True)
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+
+from odoo import models, api, tools
+
+from ..tools.location import IntervalIndex, PointIndex, pincode_key
+
+PincodeLocation = namedtuple('PincodeLocation', 'pincode_id district_id state_id area_ids latitude longitude')
+
+# Single row table holding the version of the location data the caches are keyed on
+VERSION_TABLE = 'fsm_location_index_version'
+
+# Key of cr.precommit.data holding the indexes of a transaction that changed the location data
+PENDING_KEY = 'fsm.location.index'
+
+
+class FSMLocationIndex(models.AbstractModel):
+    _name = 'fsm.location.index'
+    _description = 'FSM Location Index'
+
+    def init(self):
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS %s_seq" % VERSION_TABLE)
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS %s (id integer PRIMARY KEY, version bigint NOT NULL)
+        """ % VERSION_TABLE)
+        self.env.cr.execute("""
+            INSERT INTO %s (id, version) VALUES (1, nextval('%s_seq')) ON CONFLICT DO NOTHING
+        """ % (VERSION_TABLE, VERSION_TABLE))
+
+    def _get_location_index_version(self):
+        """Version of the location data visible to this transaction, part of the cache keys"""
+        self.env.cr.execute("SELECT version FROM %s WHERE id = 1" % VERSION_TABLE)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _invalidate_location_index(self):
+        """Move to a new version of the location data; the index is rebuilt lazily on next lookup.
+
+        Only the location caches are affected, unlike clearing the registry
+        cache. The shared version row is bumped once, when the transaction
+        commits, so concurrent imports do not queue on it; until then this
+        transaction builds its own indexes. Versions come from a sequence, so
+        a rolled back change never hands its version to a later one.
+        """
+        cr = self.env.cr
+        if PENDING_KEY not in cr.precommit.data:
+            @cr.precommit.add
+            def bump_version():
+                cr.execute("""
+                    UPDATE %s SET version = nextval('%s_seq') WHERE id = 1
+                """ % (VERSION_TABLE, VERSION_TABLE))
+        cr.precommit.data[PENDING_KEY] = {}
+
+    @tools.ormcache('name', 'self._get_location_index_version()')
+    def _get_cached_index(self, name):
+        return getattr(self, '_build_%s' % name)()
+
+    def _get_index(self, name):
+        """Index ``name``, shared unless this transaction changed the location data"""
+        local = self.env.cr.precommit.data.get(PENDING_KEY)
+        if local is None:
+            return self._get_cached_index(name)
+        if name not in local:
+            self.env.flush_all()
+            local[name] = getattr(self, '_build_%s' % name)()
+        return local[name]
+
+    def _build_pincode_locations(self):
+        """{pincode: PincodeLocation} for all active master pincodes.
+
+        A pincode existing in several districts keeps its first record, as
+        the former search(limit=1) did.
+        """
+        self.env.cr.execute("""
+            SELECT p.pincode, p.id, p.district_id, p.state_id, p.latitude, p.longitude,
+                   COALESCE(ARRAY_AGG(a.id ORDER BY a.name) FILTER (WHERE a.id IS NOT NULL), '{}')
+              FROM fsm_pincode p
+         LEFT JOIN fsm_area a ON a.pincode_id = p.id AND a.active
+             WHERE p.active
+          GROUP BY p.id
+          ORDER BY p.pincode, p.id DESC
+        """)
+        locations = {}
+        for pincode, pincode_id, district_id, state_id, latitude, longitude, area_ids in self.env.cr.fetchall():
+            locations[pincode.strip()] = PincodeLocation(
+                pincode_id, district_id, state_id, tuple(area_ids), latitude, longitude)
+        return locations
+
+    def _build_coverage_index(self):
+        """IntervalIndex of service partner ids over their pincode ranges"""
+        self.env.cr.execute("""
+            SELECT a.partner_id, a.pincode_from, a.pincode_to
+              FROM fsm_service_partner_area a
+              JOIN fsm_service_partner sp ON sp.id = a.partner_id
+             WHERE a.active AND sp.active
+        """)
+        intervals = []
+        for partner_id, pincode_from, pincode_to in self.env.cr.fetchall():
+            start = pincode_key(pincode_from)
+            end = pincode_key(pincode_to)
+            start, end = start if start is not None else end, end if end is not None else start
+            if start is not None and start <= end:
+                intervals.append((start, end, partner_id))
+        return IntervalIndex(intervals)
+
+    def _build_technician_points(self):
+        """PointIndex of active technicians located by their contact, or their user's"""
+        self.env.cr.execute("""
+            SELECT t.id, p.partner_latitude, p.partner_longitude
+              FROM fsm_technician t
+              JOIN res_users u ON u.id = t.user_id
+              JOIN res_partner p ON p.id = COALESCE(t.partner_id, u.partner_id)
+             WHERE t.active
+               AND (p.partner_latitude != 0 OR p.partner_longitude != 0)
+        """)
+        return PointIndex([(lat, lon, tech_id) for tech_id, lat, lon in self.env.cr.fetchall()])
+
+    @api.model
+    def get_pincode_location(self, pincode):
+        """PincodeLocation of a pincode, or None"""
+        return self._get_index('pincode_locations').get((pincode or '').strip())
+
+    @api.model
+    def resolve_pincodes(self, pincodes):
+        """{pincode: PincodeLocation} for a batch of pincodes, e.g. during an import"""
+        locations = self._get_index('pincode_locations')
+        return {pincode: locations.get((pincode or '').strip()) for pincode in pincodes}
+
+    @api.model
+    def get_covering_partners(self, pincode):
+        """Service partners whose pincode ranges include pincode"""
+        key = pincode_key(pincode)
+        if key is None:
+            return self.env['fsm.service.partner']
+        return self.env['fsm.service.partner'].browse(sorted(self._get_index('coverage_index').lookup(key)))
+
+    @api.model
+    def get_nearest_technicians(self, pincode=None, latitude=None, longitude=None, limit=5, max_km=None):
+        """[(technician, distance_km)] nearest first, from coordinates or a geolocated pincode"""
+        if latitude is None or longitude is None:
+            location = self.get_pincode_location(pincode)
+            if not location or location.latitude is None or location.longitude is None:
+                return []
+            latitude, longitude = location.latitude, location.longitude
+        Technician = self.env['fsm.technician']
+        return [
+            (Technician.browse(tech_id), distance)
+            for distance, tech_id in self._get_index('technician_points').nearest(latitude, longitude, limit, max_km)
+        ]
+
+    @api.model
+    def _location_values(self, pincode):
+        """fsm_pincode_id/fsm_district_id/fsm_state_id values for a pincode, {} when unknown"""
+        location = self.get_pincode_location(pincode)
+        if not location:
+            return {}
+        return {
+            'fsm_pincode_id': location.pincode_id,
+            'fsm_district_id': location.district_id,
+            'fsm_state_id': location.state_id,
+        }
+
+
+class FSMLocationIndexInvalidation(models.AbstractModel):
+    """Invalidate the location index when the data it is built from changes"""
+    _name = 'fsm.location.index.mixin'
+    _description = 'FSM Location Index Invalidation'
+
+    # Fields read by the index; writes to other fields keep the cache
+    _location_index_fields = ()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Archived records are not indexed
+        if any(record.active for record in records):
+            self.env['fsm.location.index']._invalidate_location_index()
+        return records
+
+    def write(self, vals):
+        fnames = [fname for fname in self._location_index_fields if fname in vals]
+        if not fnames:
+            return super().write(vals)
+        old_values = {record.id: [record[fname] for fname in fnames] for record in self}
+        res = super().write(vals)
+        if any(old_values[record.id] != [record[fname] for fname in fnames] for record in self):
+            self.env['fsm.location.index']._invalidate_location_index()
+        return res
+
+    def unlink(self):
+        indexed = any(record.active for record in self)
+        res = super().unlink()
+        if indexed:
+            self.env['fsm.location.index']._invalidate_location_index()
+        return res
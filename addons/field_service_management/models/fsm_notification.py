@@ -34,6 +34,7 @@ class FSMNotificationTransaction(models.Model):
         ('technician_assigned', 'Technician Assigned'),
         ('otp_generated', 'OTP Generated'),
         ('otp_verified', 'OTP Verified'),
+        ('sla_breached', 'SLA Breached'),
     ], string='Notification Type', required=True)
     
     old_status = fields.Selection([
@@ -90,11 +91,15 @@ class FSMNotificationTransaction(models.Model):
             else:
                 record.display_name = dict(record._fields['notification_type'].selection).get(record.notification_type, 'Notification')
 
+    @api.model
+    def _generate_otp_code(self):
+        """Random 5-digit OTP code"""
+        return ''.join(random.choices(string.digits, k=5))
+
     def generate_otp(self):
         """Generate a 5-digit OTP code"""
         self.ensure_one()
-        # Generate random 5-digit OTP
-        otp = ''.join(random.choices(string.digits, k=5))
+        otp = self._generate_otp_code()
         self.write({
             'otp_code': otp,
             'otp_generated_date': fields.Datetime.now(),
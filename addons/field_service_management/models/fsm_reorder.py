@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, Command
+from odoo.exceptions import UserError
+
+
+class FSMReorderProposal(models.Model):
+    _name = 'fsm.reorder.proposal'
+    _description = 'Spare Parts Reorder Proposal'
+    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _rec_name = 'name'
+    _order = 'create_date desc'
+
+    name = fields.Char(string='Reference', readonly=True, copy=False, default='New')
+    vendor_id = fields.Many2one('res.partner', string='Vendor', tracking=True,
+                                help='Empty when none of the spares has a vendor: the proposal is then a stock alert')
+    warehouse_id = fields.Many2one('stock.warehouse', string='Warehouse')
+    location_id = fields.Many2one('stock.location', string='Stock Location')
+    line_ids = fields.One2many('fsm.reorder.proposal.line', 'proposal_id', string='Lines')
+    line_count = fields.Integer(string='Line Count', compute='_compute_line_count')
+    purchase_order_id = fields.Many2one('purchase.order', string='Purchase Order', readonly=True, copy=False)
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('ordered', 'Ordered'),
+        ('cancelled', 'Cancelled')
+    ], default='draft', string='Status', tracking=True)
+
+    company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', 'New') == 'New':
+                vals['name'] = self.env['ir.sequence'].next_by_code('fsm.reorder.proposal') or 'New'
+        return super(FSMReorderProposal, self).create(vals_list)
+
+    @api.depends('line_ids')
+    def _compute_line_count(self):
+        for record in self:
+            record.line_count = len(record.line_ids)
+
+    def action_create_purchase_order(self):
+        """Create one draft purchase order per proposal, in a single create"""
+        proposals = self.filtered(lambda p: p.state == 'draft')
+        if proposals.filtered(lambda p: not p.vendor_id):
+            raise UserError('A vendor is required to create a purchase order.')
+        order_vals_list = []
+        for proposal in proposals:
+            order_vals = {
+                'partner_id': proposal.vendor_id.id,
+                'origin': proposal.name,
+                'company_id': proposal.company_id.id,
+                'order_line': [Command.create({
+                    'product_id': line.product_id.id,
+                    'product_qty': line.proposed_qty,
+                }) for line in proposal.line_ids if line.product_id and line.proposed_qty > 0],
+            }
+            if proposal.warehouse_id:
+                order_vals['picking_type_id'] = proposal.warehouse_id.in_type_id.id
+            order_vals_list.append(order_vals)
+        orders = self.env['purchase.order'].create(order_vals_list)
+        for proposal, order in zip(proposals, orders):
+            proposal.write({'purchase_order_id': order.id, 'state': 'ordered'})
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Purchase Orders',
+            'res_model': 'purchase.order',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', orders.ids)],
+        }
+
+    def action_cancel(self):
+        self.write({'state': 'cancelled'})
+
+
+class FSMReorderProposalLine(models.Model):
+    _name = 'fsm.reorder.proposal.line'
+    _description = 'Spare Parts Reorder Proposal Line'
+    _rec_name = 'spare_id'
+
+    proposal_id = fields.Many2one('fsm.reorder.proposal', string='Proposal', required=True, ondelete='cascade', index=True)
+    spare_id = fields.Many2one('fsm.spare', string='Spare Part', required=True, index=True)
+    product_id = fields.Many2one('product.product', related='spare_id.product_id', readonly=True)
+    qty_available = fields.Float(string='Quantity Available')
+    min_stock_qty = fields.Float(string='Minimum Stock Quantity')
+    proposed_qty = fields.Float(string='Proposed Quantity')
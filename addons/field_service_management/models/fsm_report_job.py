@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+import logging
+import tempfile
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+from odoo.tools.pdf import merge_pdf
+
+_logger = logging.getLogger(__name__)
+
+# Spare requests loaded into the cache at a time while writing a report
+REPORT_CHUNK_SIZE = 500
+
+# Spare requests rendered per PDF part, the parts being merged at the end
+PDF_CHUNK_SIZE = 2000
+
+# Jobs still running after this long were interrupted (worker crash or restart)
+REPORT_JOB_TIMEOUT = timedelta(hours=2)
+
+XLSX_COLUMNS = [
+    ('Request #', 18),
+    ('Technician', 24),
+    ('Service Call', 18),
+    ('Customer', 28),
+    ('Request Date', 14),
+    ('Status', 12),
+    ('Pending Qty', 12),
+    ('Spare Parts', 60),
+]
+
+
+class FSMReportJob(models.Model):
+    _name = 'fsm.report.job'
+    _description = 'FSM Background Report'
+    _inherit = ['mail.thread']
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(string='Report', required=True)
+    user_id = fields.Many2one('res.users', string='Requested By', required=True, index=True,
+                              default=lambda self: self.env.user)
+    report_format = fields.Selection([
+        ('pdf', 'PDF'),
+        ('xlsx', 'Excel'),
+    ], string='Format', required=True, default='pdf')
+    options = fields.Json(string='Report Options', help='Values of the spare report wizard the job was queued from')
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ], default='queued', string='Status', tracking=True)
+    record_count = fields.Integer(string='Spare Requests', readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string='File', readonly=True, ondelete='set null')
+    error = fields.Text(string='Error', readonly=True)
+    started_date = fields.Datetime(string='Started', readonly=True)
+    finished_date = fields.Datetime(string='Finished', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError('The report has not been generated yet!')
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{self.attachment_id.id}?download=true',
+            'target': 'self',
+        }
+
+    def action_retry(self):
+        if self.filtered(lambda j: j.state != 'failed'):
+            raise UserError('Only failed reports can be retried!')
+        # Requesters may not write jobs, but can queue their own again
+        if not self.env.user.has_group('field_service_management.group_fsm_manager') \
+                and self.filtered(lambda j: j.user_id != self.env.user):
+            raise UserError('Only your own reports can be retried!')
+        self.sudo().write({'state': 'queued', 'error': False})
+        self.env.ref('field_service_management.ir_cron_fsm_run_report_jobs')._trigger()
+
+    def _lock(self):
+        """Rows of self not already being generated by another worker"""
+        self.env.cr.execute("""
+            SELECT id FROM fsm_report_job
+             WHERE id IN %s AND state = 'queued'
+               FOR UPDATE SKIP LOCKED
+        """, (tuple(self.ids),))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _run(self, auto_commit=True):
+        """Generate the queued reports, each one in its own transaction"""
+        if not self:
+            return
+        for job in self._lock():
+            job.write({'state': 'running', 'started_date': fields.Datetime.now()})
+            if auto_commit:
+                self.env.cr.commit()
+            try:
+                # Render with the requester's rights, as the synchronous report would
+                job_as_user = job.with_user(job.user_id).with_company(job.company_id)
+                wizard = job_as_user.env['fsm.spare.report.wizard'].create(job.options or {})
+                request_ids = wizard._get_request_ids()
+                if job.report_format == 'xlsx':
+                    content, filename = job._render_xlsx(wizard, request_ids)
+                else:
+                    content, filename = job._render_pdf(wizard, request_ids)
+                attachment = self.env['ir.attachment'].create({
+                    'name': filename,
+                    'raw': content,
+                    'res_model': self._name,
+                    'res_id': job.id,
+                })
+                job.write({
+                    'state': 'done',
+                    'attachment_id': attachment.id,
+                    'record_count': len(request_ids),
+                    'finished_date': fields.Datetime.now(),
+                })
+                job._notify_done()
+            except Exception as e:
+                if not auto_commit:
+                    raise
+                _logger.exception('FSM report job %s failed', job.id)
+                self.env.cr.rollback()
+                job.write({'state': 'failed', 'error': str(e), 'finished_date': fields.Datetime.now()})
+                job._notify_failed()
+            if auto_commit:
+                self.env.cr.commit()
+
+    def _render_pdf(self, wizard, request_ids):
+        """Render the report PDF_CHUNK_SIZE requests at a time and merge the parts,
+        dropping the cache in between as the Excel export does."""
+        self.ensure_one()
+        parts = []
+        for chunk_ids in list(split_every(PDF_CHUNK_SIZE, request_ids)) or [()]:
+            content, _report_type = wizard.env['ir.actions.report']._render_qweb_pdf(
+                'field_service_management.action_report_spare_request',
+                res_ids=wizard.ids,
+                data=wizard._get_report_data(chunk_ids),
+            )
+            parts.append(content)
+            wizard.env.invalidate_all()
+        content = parts[0] if len(parts) == 1 else merge_pdf(parts)
+        return content, f'{self.name}.pdf'
+
+    def _render_xlsx(self, wizard, request_ids):
+        """Write the spare request table row by row.
+
+        The workbook is built in xlsxwriter's constant_memory mode, which
+        flushes each row to disk once the next one starts, and the requests
+        are read REPORT_CHUNK_SIZE at a time with the cache dropped in
+        between, so memory stays flat whatever the date range.
+        """
+        self.ensure_one()
+        import xlsxwriter
+
+        Request = wizard.env['fsm.spare.request']
+        states = dict(Request._fields['state']._description_selection(wizard.env))
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as tmp:
+            workbook = xlsxwriter.Workbook(tmp.name, {'constant_memory': True})
+            sheet = workbook.add_worksheet('Spare Requests')
+            bold = workbook.add_format({'bold': True})
+            for col, (title, width) in enumerate(XLSX_COLUMNS):
+                sheet.set_column(col, col, width)
+                sheet.write(0, col, title, bold)
+            row = 1
+            for chunk_ids in split_every(REPORT_CHUNK_SIZE, request_ids):
+                for spare_request in Request.browse(chunk_ids):
+                    sheet.write_row(row, 0, [
+                        spare_request.name,
+                        spare_request.technician_id.name or 'Unassigned',
+                        spare_request.call_id.name or '-',
+                        spare_request.partner_id.name or '-',
+                        fields.Date.to_string(spare_request.request_date) if spare_request.request_date else '-',
+                        states.get(spare_request.state, spare_request.state),
+                        spare_request.pending_qty,
+                        ', '.join(f'{line.spare_id.name} ({line.quantity})' for line in spare_request.spare_line_ids),
+                    ])
+                    row += 1
+                wizard.env.invalidate_all()
+            workbook.close()
+            tmp.seek(0)
+            content = tmp.read()
+        return content, f'{self.name}.xlsx'
+
+    def _notify_done(self):
+        self.ensure_one()
+        self.message_post(
+            body=f'{self.name} is ready ({self.record_count} spare requests).',
+            attachment_ids=self.attachment_id.ids,
+            partner_ids=self.user_id.partner_id.ids,
+        )
+        self.env['bus.bus']._sendone(self.user_id.partner_id, 'simple_notification', {
+            'type': 'success',
+            'title': 'Report Ready',
+            'message': f'{self.name} is ready. Find it under Reports > Background Reports.',
+            'sticky': False,
+        })
+
+    def _notify_failed(self):
+        self.ensure_one()
+        self.message_post(
+            body=f'{self.name} could not be generated: {self.error}',
+            partner_ids=self.user_id.partner_id.ids,
+        )
+        self.env['bus.bus']._sendone(self.user_id.partner_id, 'simple_notification', {
+            'type': 'danger',
+            'title': 'Report Failed',
+            'message': f'{self.name} could not be generated.',
+            'sticky': True,
+        })
+
+    @api.model
+    def _requeue_interrupted(self):
+        """Queue again the jobs left running by a worker that died"""
+        interrupted = self.search([
+            ('state', '=', 'running'),
+            ('started_date', '<', fields.Datetime.now() - REPORT_JOB_TIMEOUT),
+        ])
+        if interrupted:
+            _logger.warning('Requeuing interrupted FSM report jobs %s', interrupted.ids)
+            interrupted.write({'state': 'queued', 'started_date': False})
+        return interrupted
+
+    @api.model
+    def _cron_run_report_jobs(self):
+        """Cron job to generate queued reports"""
+        self._requeue_interrupted()
+        self.search([('state', '=', 'queued')], order='id')._run()
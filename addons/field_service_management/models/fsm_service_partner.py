@@ -5,7 +5,8 @@ from odoo.exceptions import ValidationError
 class FSMServicePartner(models.Model):
     _name = 'fsm.service.partner'
     _description = 'Service Partner'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'fsm.location.index.mixin']
+    _location_index_fields = ('active',)
     _rec_name = 'name'
     _order = 'create_date desc'
     
@@ -138,6 +139,8 @@ class FSMServicePartner(models.Model):
 class FSMServicePartnerArea(models.Model):
     _name = 'fsm.service.partner.area'
     _description = 'Service Partner Area'
+    _inherit = ['fsm.location.index.mixin']
+    _location_index_fields = ('partner_id', 'pincode_from', 'pincode_to', 'active')
     _rec_name = 'area_name'
     
     partner_id = fields.Many2one('fsm.service.partner', string='Service Partner', required=True, ondelete='cascade')
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
-from odoo.exceptions import ValidationError
+from odoo import models, fields, api, Command
+from odoo.exceptions import ValidationError, UserError
+from collections import defaultdict
+from markupsafe import Markup
 
 class FSMSpare(models.Model):
     _name = 'fsm.spare'
@@ -20,6 +22,7 @@ class FSMSpare(models.Model):
     
     # Stock Information
     qty_available = fields.Float(string='Quantity Available', compute='_compute_qty_available', store=True)
+    stock_snapshot_date = fields.Datetime(string='Stock Snapshot Date', readonly=True, copy=False)
     uom_id = fields.Many2one('uom.uom', string='Unit of Measure', related='product_id.uom_id', readonly=True)
     min_stock_qty = fields.Float(string='Minimum Stock Quantity', default=1.0)
     reorder_qty = fields.Float(string='Reorder Quantity', default=10.0)
@@ -59,15 +62,75 @@ class FSMSpare(models.Model):
     
     @api.depends('product_id', 'location_id')
     def _compute_qty_available(self):
+        quantities = self._get_quant_quantities()
         for record in self:
-            if record.product_id and record.location_id:
-                quants = self.env['stock.quant'].search([
-                    ('product_id', '=', record.product_id.id),
-                    ('location_id', '=', record.location_id.id)
-                ])
-                record.qty_available = sum(quants.mapped('quantity'))
-            else:
-                record.qty_available = 0.0
+            record.qty_available = quantities.get((record.product_id.id, record.location_id.id), 0.0)
+    
+    def _get_quant_quantities(self, available=False):
+        """On-hand quantity per (product_id, location_id) for these spares, in one grouped quant read.
+        
+        With ``available``, the quantity already reserved by other transfers is deducted.
+        """
+        spares = self.filtered(lambda s: s.product_id and s.location_id)
+        if not spares:
+            return {}
+        groups = self.env['stock.quant']._read_group(
+            [('product_id', 'in', spares.product_id.ids), ('location_id', 'in', spares.location_id.ids)],
+            ['product_id', 'location_id'], ['quantity:sum', 'reserved_quantity:sum'],
+        )
+        return {
+            (product.id, location.id): quantity - reserved if available else quantity
+            for product, location, quantity, reserved in groups
+        }
+    
+    @api.model
+    def _use_stock_snapshot(self):
+        """Whether dashboard and cron read the stored snapshot instead of live quants"""
+        return bool(self.env['ir.config_parameter'].sudo().get_param('field_service_management.use_stock_snapshot'))
+    
+    @api.model
+    def _get_stock_levels(self, spares):
+        """Quantity per spare id: the stored snapshot, or one live grouped quant read"""
+        if self._use_stock_snapshot():
+            return {spare.id: spare.qty_available for spare in spares}
+        quantities = spares._get_quant_quantities()
+        return {
+            spare.id: quantities.get((spare.product_id.id, spare.location_id.id), 0.0)
+            for spare in spares
+        }
+    
+    @api.model
+    def _refresh_stock_snapshot(self, spares=None):
+        """Store current quant levels on qty_available for many spares at once.
+        
+        Only changed rows are rewritten, with a single UPDATE.
+        """
+        spares = self.search([]) if spares is None else spares
+        if not spares:
+            return
+        quantities = spares._get_quant_quantities()
+        changed = []
+        for spare in spares:
+            qty = quantities.get((spare.product_id.id, spare.location_id.id), 0.0)
+            if qty != spare.qty_available:
+                changed.append((spare.id, qty))
+        if changed:
+            self.env.cr.execute("""
+                UPDATE fsm_spare s
+                   SET qty_available = v.qty
+                  FROM (VALUES %s) AS v(id, qty)
+                 WHERE s.id = v.id
+            """ % ', '.join(['%s'] * len(changed)), changed)
+        self.env.cr.execute(
+            "UPDATE fsm_spare SET stock_snapshot_date = %s WHERE id = ANY(%s)",
+            (fields.Datetime.now(), spares.ids),
+        )
+        spares.invalidate_recordset(['qty_available', 'stock_snapshot_date'])
+    
+    @api.model
+    def _cron_refresh_stock_snapshot(self):
+        """Cron job to refresh the stock snapshot of all spare parts"""
+        self._refresh_stock_snapshot()
     
     @api.depends('spare_request_line_ids', 'spare_request_line_ids.is_returned', 'spare_request_line_ids.is_defective')
     def _compute_statistics(self):
@@ -93,23 +156,80 @@ class FSMSpare(models.Model):
                 raise ValidationError('Reorder quantity must be greater than minimum stock quantity!')
     
     def action_check_stock(self):
-        """Check stock and create purchase order if needed"""
-        for record in self:
-            if record.qty_available < record.min_stock_qty:
-                # Create purchase order or alert
-                self.message_post(
-                    body=f"Stock level ({record.qty_available}) is below minimum ({record.min_stock_qty}). Reorder required.",
-                    subject="Low Stock Alert"
-                )
-                # TODO: Create automatic purchase order
+        """Check stock and propose a reorder for the spares below minimum"""
+        self._refresh_stock_snapshot(self)
+        low_stock_spares = self.filtered(lambda s: s.qty_available < s.min_stock_qty)
+        proposals = low_stock_spares._generate_reorder_proposals()
+        for record in low_stock_spares:
+            record.message_post(
+                body=f"Stock level ({record.qty_available}) is below minimum ({record.min_stock_qty}). Reorder required.",
+                subject="Low Stock Alert"
+            )
+        return proposals
     
     @api.model
     def check_all_stock_levels(self):
         """Cron job to check stock levels for all spare parts"""
-        low_stock_spares = self.search([])
-        for spare in low_stock_spares:
-            if spare.qty_available < spare.min_stock_qty:
-                spare.action_check_stock()
+        if not self._use_stock_snapshot():
+            self._refresh_stock_snapshot()
+        self.browse(self._get_low_stock_spare_ids())._generate_reorder_proposals()
+    
+    @api.model
+    def _get_low_stock_spare_ids(self):
+        """Ids of active spares below their minimum stock, in a single query"""
+        self.flush_model(['qty_available', 'min_stock_qty', 'active'])
+        self.env.cr.execute("""
+            SELECT id FROM fsm_spare
+             WHERE active AND qty_available < min_stock_qty
+          ORDER BY id
+        """)
+        return [row[0] for row in self.env.cr.fetchall()]
+    
+    def _get_reorder_vendor(self):
+        """Preferred vendor of the spare's product, if any"""
+        self.ensure_one()
+        product = self.product_id
+        if not product:
+            return self.env['res.partner']
+        return product._select_seller(quantity=self.reorder_qty).partner_id
+    
+    def _generate_reorder_proposals(self):
+        """Group these spares by (vendor, location) into draft reorder proposals.
+        
+        Spares already on a draft proposal are skipped so the nightly cron
+        does not pile up duplicates. Spares without a vendor end up on one
+        proposal per location, which serves as the consolidated stock alert.
+        All proposals are created in a single create().
+        """
+        if not self:
+            return self.env['fsm.reorder.proposal']
+        pending = self.env['fsm.reorder.proposal.line'].search([
+            ('spare_id', 'in', self.ids),
+            ('proposal_id.state', '=', 'draft'),
+        ]).spare_id
+        groups = {}
+        for spare in self - pending:
+            key = (spare._get_reorder_vendor(), spare.location_id, spare.company_id)
+            groups.setdefault(key, []).append(spare)
+        
+        vals_list = []
+        for (vendor, location, company), spares in groups.items():
+            warehouse = spares[0].warehouse_id or location.warehouse_id
+            vals_list.append({
+                'vendor_id': vendor.id,
+                'location_id': location.id,
+                'warehouse_id': warehouse.id,
+                'company_id': company.id,
+                'line_ids': [Command.create({
+                    'spare_id': spare.id,
+                    'qty_available': spare.qty_available,
+                    'min_stock_qty': spare.min_stock_qty,
+                    'proposed_qty': max(spare.reorder_qty - spare.qty_available, 0.0),
+                }) for spare in spares],
+            })
+        return self.env['fsm.reorder.proposal'].with_context(
+            mail_create_nolog=True, tracking_disable=True
+        ).create(vals_list)
 
 
 class FSMSpareCategory(models.Model):
@@ -187,6 +307,9 @@ class FSMSpareRequest(models.Model):
     approved_by = fields.Many2one('res.users', string='Approved By')
     rejection_reason = fields.Text(string='Rejection Reason')
     
+    # Stock transfers that issued this request
+    picking_ids = fields.Many2many('stock.picking', string='Transfers', readonly=True, copy=False)
+    
     # Notes
     notes = fields.Text(string='Notes')
 
@@ -196,11 +319,12 @@ class FSMSpareRequest(models.Model):
 
     company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
     
-    @api.model
-    def create(self, vals):
-        if vals.get('name', 'New') == 'New':
-            vals['name'] = self.env['ir.sequence'].next_by_code('fsm.spare.request') or 'New'
-        return super(FSMSpareRequest, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', 'New') == 'New':
+                vals['name'] = self.env['ir.sequence'].next_by_code('fsm.spare.request') or 'New'
+        return super(FSMSpareRequest, self).create(vals_list)
 
     @api.depends('spare_line_ids', 'spare_line_ids.quantity', 'state')
     def _compute_pending_qty(self):
@@ -215,105 +339,198 @@ class FSMSpareRequest(models.Model):
         for record in self:
             record.total_spare_count = len(record.spare_line_ids)
     
+    def _create_transition_notifications(self, old_states, new_state, notification_type, description):
+        """One notification transaction per request, in a single create;
+        description is formatted with the request."""
+        return self.env['fsm.notification.transaction'].create([{
+            'spare_request_id': request.id,
+            'call_id': request.call_id.id,
+            'technician_id': request.technician_id.id,
+            'notification_type': notification_type,
+            'old_status': old_states[request.id],
+            'new_status': new_state,
+            'description': description.format(request=request),
+        } for request in self])
+    
     def action_request(self):
-        self.ensure_one()
-        if not self.spare_line_ids:
+        if self.filtered(lambda r: not r.spare_line_ids):
             raise ValidationError('Please add at least one spare part to request!')
-        old_state = self.state
-        self.state = 'requested'
+        old_states = {request.id: request.state for request in self}
+        self.write({'state': 'requested'})
         
-        # Check stock availability
-        for line in self.spare_line_ids:
-            if line.spare_id.qty_available < line.quantity:
-                self.message_post(
-                    body=f"Low stock alert: {line.spare_id.name} - Available: {line.spare_id.qty_available}, Requested: {line.quantity}"
-                )
+        # Check stock availability, for all lines with one grouped quant read
+        quantities = self.spare_line_ids.spare_id._get_quant_quantities(available=True)
+        for request in self:
+            alerts = []
+            for line in request.spare_line_ids:
+                available = quantities.get((line.spare_id.product_id.id, line.spare_id.location_id.id), 0.0)
+                if available < line.quantity:
+                    alerts.append(f"Low stock alert: {line.spare_id.name} - Available: {available}, Requested: {line.quantity}")
+            if alerts:
+                request.message_post(body=Markup('<br/>').join(alerts))
         
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'spare_request_id': self.id,
-            'call_id': self.call_id.id if self.call_id else False,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'notification_type': 'spare_requested',
-            'old_status': old_state,
-            'new_status': 'requested',
-            'description': f'Spare request {self.name} created for call {self.call_id.name if self.call_id else ""}'
-        })
+        self._create_transition_notifications(
+            old_states, 'requested', 'spare_requested',
+            'Spare request {request.name} created for call {request.call_id.name}')
     
     def action_approve(self):
-        self.ensure_one()
-        old_state = self.state
+        old_states = {request.id: request.state for request in self}
         self.write({
             'state': 'approved',
             'approved_date': fields.Datetime.now(),
             'approved_by': self.env.user.id
         })
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'spare_request_id': self.id,
-            'call_id': self.call_id.id if self.call_id else False,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'notification_type': 'spare_approved',
-            'old_status': old_state,
-            'new_status': 'approved',
-            'description': f'Spare request {self.name} approved'
-        })
+        self._create_transition_notifications(old_states, 'approved', 'spare_approved',
+                                              'Spare request {request.name} approved')
     
     def action_issue(self):
-        self.ensure_one()
-        old_state = self.state
-        # TODO: Create stock picking
-        self.write({
+        if self.filtered(lambda r: r.state != 'approved'):
+            raise UserError('Only approved spare requests can be issued!')
+        issued, reasons = self._issue_batch()
+        if reasons:
+            if len(self) == 1:
+                raise UserError('Cannot issue %s: %s.' % (self.name, reasons[self.id]))
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': 'Spare Requests Issued',
+                    'message': '%s requests issued; not issued: %s' % (len(issued), ', '.join(
+                        f'{request.name} ({reasons[request.id]})' for request in self if request.id in reasons)),
+                    'type': 'warning',
+                    'sticky': True,
+                }
+            }
+    
+    def action_approve_and_issue(self):
+        """Approve the requested ones, then issue everything approved in one batch"""
+        self.filtered(lambda r: r.state == 'requested').action_approve()
+        return self.filtered(lambda r: r.state == 'approved').action_issue()
+    
+    def _get_issue_locations(self, line):
+        """(source, destination) stock locations for issuing a request line:
+        the spare's stock location to the technician's van location"""
+        destination = (line.request_id.technician_id.location_id
+                       or self.env.ref('stock.stock_location_customers', raise_if_not_found=False))
+        return line.spare_id.location_id, destination
+    
+    def _issue_batch(self):
+        """Issue approved requests together.
+        
+        Availability of every line is checked against the unreserved quantity
+        with one grouped quant read and allocated request by request, so a
+        request is only issued when all its lines can be served and moved.
+        Moves are consolidated into one picking per (source location,
+        technician location), created in one batch.
+        
+        :return: (issued requests, {request id: reason} of the ones not issued)
+        """
+        available = defaultdict(float, self.spare_line_ids.spare_id._get_quant_quantities(available=True))
+        issued = self.browse()
+        reasons = {}
+        picking_types = {}
+        moves_by_locations = defaultdict(list)
+        requests_by_locations = defaultdict(set)
+        for request in self:
+            # Spares without a stock location are issued without stock checks or moves
+            lines = request.spare_line_ids.filtered(
+                lambda l: l.spare_id.product_id and l.spare_id.location_id and l.quantity > 0)
+            if lines and request.company_id not in picking_types:
+                picking_types[request.company_id] = self.env['stock.picking.type'].search([
+                    ('code', '=', 'internal'),
+                    ('company_id', '=', request.company_id.id)
+                ], limit=1)
+            if lines and not picking_types[request.company_id]:
+                reasons[request.id] = 'no internal operation type for the company'
+                continue
+            locations = {line: self._get_issue_locations(line) for line in lines}
+            if any(not destination for _source, destination in locations.values()):
+                reasons[request.id] = 'no destination location'
+                continue
+            needed = defaultdict(float)
+            for line in lines:
+                needed[(line.spare_id.product_id.id, line.spare_id.location_id.id)] += line.quantity
+            if any(available[key] < quantity for key, quantity in needed.items()):
+                reasons[request.id] = 'not enough available stock'
+                continue
+            for key, quantity in needed.items():
+                available[key] -= quantity
+            issued |= request
+            for line in lines:
+                source, destination = locations[line]
+                key = (source, destination, request.company_id)
+                requests_by_locations[key].add(request.id)
+                moves_by_locations[key].append({
+                    'name': line.spare_id.name,
+                    'product_id': line.spare_id.product_id.id,
+                    'product_uom_qty': line.quantity,
+                    'product_uom': line.spare_id.product_id.uom_id.id,
+                    'location_id': source.id,
+                    'location_dest_id': destination.id,
+                    'origin': request.name,
+                    'company_id': request.company_id.id,
+                })
+        if not issued:
+            return issued, reasons
+        
+        picking_vals_list = []
+        picking_keys = []
+        for key, move_vals_list in moves_by_locations.items():
+            source, destination, company = key
+            requests = self.browse(sorted(requests_by_locations[key]))
+            picking_vals_list.append({
+                'picking_type_id': picking_types[company].id,
+                'location_id': source.id,
+                'location_dest_id': destination.id,
+                'origin': ', '.join(requests.mapped('name')),
+                'company_id': company.id,
+                'move_ids': [Command.create(vals) for vals in move_vals_list],
+            })
+            picking_keys.append(key)
+        pickings = self.env['stock.picking'].create(picking_vals_list)
+        if pickings:
+            pickings.action_confirm()
+            pickings.action_assign()
+        
+        pickings_by_request = defaultdict(list)
+        for key, picking in zip(picking_keys, pickings):
+            for request_id in requests_by_locations[key]:
+                pickings_by_request[request_id].append(picking.id)
+        old_states = {request.id: request.state for request in issued}
+        issued.write({
             'state': 'issued',
             'issued_date': fields.Datetime.now()
         })
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'spare_request_id': self.id,
-            'call_id': self.call_id.id if self.call_id else False,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'notification_type': 'spare_issued',
-            'old_status': old_state,
-            'new_status': 'issued',
-            'description': f'Spare request {self.name} issued'
-        })
+        for request_id, picking_ids in pickings_by_request.items():
+            self.browse(request_id).picking_ids = [Command.link(picking_id) for picking_id in picking_ids]
+        issued._create_transition_notifications(old_states, 'issued', 'spare_issued',
+                                                'Spare request {request.name} issued')
+        return issued, reasons
     
     def action_receive(self):
-        self.ensure_one()
-        old_state = self.state
+        old_states = {request.id: request.state for request in self}
         self.write({
             'state': 'received',
             'received_date': fields.Datetime.now()
         })
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'spare_request_id': self.id,
-            'call_id': self.call_id.id if self.call_id else False,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'notification_type': 'spare_received',
-            'old_status': old_state,
-            'new_status': 'received',
-            'description': f'Spare request {self.name} received'
-        })
+        self._create_transition_notifications(old_states, 'received', 'spare_received',
+                                              'Spare request {request.name} received')
     
     def action_cancel(self):
+        old_states = {request.id: request.state for request in self}
+        self.write({'state': 'cancelled'})
+        self._create_transition_notifications(old_states, 'cancelled', 'status_changed',
+                                              'Spare request {request.name} cancelled')
+    
+    def action_view_pickings(self):
         self.ensure_one()
-        old_state = self.state
-        self.state = 'cancelled'
-        
-        # Create notification transaction
-        self.env['fsm.notification.transaction'].create({
-            'spare_request_id': self.id,
-            'call_id': self.call_id.id if self.call_id else False,
-            'technician_id': self.technician_id.id if self.technician_id else False,
-            'notification_type': 'status_changed',
-            'old_status': old_state,
-            'new_status': 'cancelled',
-            'description': f'Spare request {self.name} cancelled'
-        })
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Transfers',
+            'res_model': 'stock.picking',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', self.picking_ids.ids)],
+        }
 
 
 class FSMSpareRequestLine(models.Model):
@@ -2,10 +2,26 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 
+# Stored counters on fsm.technician that calls and feedback add deltas to
+COUNTER_FIELDS = [
+    'call_count',
+    'active_call_count',
+    'total_calls_completed',
+    'resolution_days_sum',
+    'resolution_count',
+    'rating_sum',
+    'rating_count',
+]
+
+# Nearest technicians considered when no technician is assigned to a pincode
+NEAREST_TECHNICIAN_CANDIDATES = 20
+
+
 class FSMTechnician(models.Model):
     _name = 'fsm.technician'
     _description = 'Field Service Technician'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'fsm.location.index.mixin']
+    _location_index_fields = ('partner_id', 'user_id', 'active')
     _rec_name = 'name'
     _order = 'create_date desc'
     
@@ -27,8 +43,11 @@ class FSMTechnician(models.Model):
     
     # Related Calls
     call_ids = fields.One2many('fsm.call', 'technician_id', string='Assigned Calls')
-    call_count = fields.Integer(string='Call Count', compute='_compute_call_count')
-    active_call_count = fields.Integer(string='Active Calls', compute='_compute_call_count')
+    
+    # Performance counters, maintained incrementally by fsm.call and
+    # fsm.feedback through _apply_counter_deltas()
+    call_count = fields.Integer(string='Call Count', default=0, readonly=True, copy=False)
+    active_call_count = fields.Integer(string='Active Calls', default=0, readonly=True, copy=False, index=True)
     
     # Status
     state = fields.Selection([
@@ -40,11 +59,19 @@ class FSMTechnician(models.Model):
     # Skills and Specialization
     skill_ids = fields.Many2many('fsm.skill', string='Skills')
     specialization = fields.Text(string='Specialization')
+    max_active_calls = fields.Integer(string='Max Active Calls', default=5,
+                                      help='Capacity used by the dispatch optimizer')
+    location_id = fields.Many2one('stock.location', string='Stock Location', domain=[('usage', '=', 'internal')],
+                                  help='Van or technician stock location spare parts are issued to')
     
     # Performance Metrics
-    rating = fields.Float(string='Average Rating', compute='_compute_rating', store=True)
-    total_calls_completed = fields.Integer(string='Total Calls Completed', compute='_compute_performance', store=True)
-    avg_resolution_time = fields.Float(string='Avg Resolution Time (Days)', compute='_compute_performance', store=True)
+    rating = fields.Float(string='Average Rating', readonly=True, copy=False)
+    total_calls_completed = fields.Integer(string='Total Calls Completed', default=0, readonly=True, copy=False)
+    avg_resolution_time = fields.Float(string='Avg Resolution Time (Days)', readonly=True, copy=False)
+    resolution_days_sum = fields.Integer(string='Resolution Days Sum', default=0, readonly=True, copy=False)
+    resolution_count = fields.Integer(string='Resolved Calls With Dates', default=0, readonly=True, copy=False)
+    rating_sum = fields.Integer(string='Rating Sum', default=0, readonly=True, copy=False)
+    rating_count = fields.Integer(string='Rating Count', default=0, readonly=True, copy=False)
     
     active = fields.Boolean(default=True)
     company_id = fields.Many2one('res.company', string='Company', default=lambda self: self.env.company)
@@ -55,42 +82,94 @@ class FSMTechnician(models.Model):
             vals['code'] = self.env['ir.sequence'].next_by_code('fsm.technician') or 'New'
         return super(FSMTechnician, self).create(vals)
     
-    @api.depends('call_ids', 'call_ids.state')
-    def _compute_call_count(self):
-        for record in self:
-            record.call_count = len(record.call_ids)
-            record.active_call_count = len(record.call_ids.filtered(
-                lambda c: c.state not in ['closed', 'cancelled']
-            ))
-    
-    @api.depends('call_ids.feedback_ids.rating')
-    def _compute_rating(self):
-        for record in self:
-            feedbacks = record.call_ids.mapped('feedback_ids').filtered(lambda f: f.rating)
-            if feedbacks:
-                ratings = [int(f.rating) for f in feedbacks]
-                record.rating = sum(ratings) / len(ratings)
-            else:
-                record.rating = 0.0
-    
-    @api.depends('call_ids', 'call_ids.state', 'call_ids.closed_date', 'call_ids.call_date')
-    def _compute_performance(self):
-        for record in self:
-            completed_calls = record.call_ids.filtered(lambda c: c.state == 'closed')
-            record.total_calls_completed = len(completed_calls)
-            
-            if completed_calls:
-                total_days = 0
-                valid_calls = 0
-                for call in completed_calls:
-                    if call.closed_date and call.call_date:
-                        days = (call.closed_date - call.call_date).days
-                        total_days += days
-                        valid_calls += 1
-                
-                record.avg_resolution_time = total_days / valid_calls if valid_calls > 0 else 0
-            else:
-                record.avg_resolution_time = 0
+    @api.model
+    def _apply_counter_deltas(self, deltas):
+        """Add ``{technician_id: {counter: delta}}`` to the stored counters.
+
+        The increments run as a single UPDATE so concurrent call writes do
+        not overwrite each other, and the averages are derived in the same
+        statement from the new sums.
+        """
+        rows = [
+            (tech_id, *(int(delta.get(fname, 0)) for fname in COUNTER_FIELDS))
+            for tech_id, delta in deltas.items()
+            if tech_id and any(delta.values())
+        ]
+        if not rows:
+            return
+        self.env.cr.execute("""
+            UPDATE fsm_technician t
+               SET call_count = COALESCE(t.call_count, 0) + d.call_count,
+                   active_call_count = COALESCE(t.active_call_count, 0) + d.active_call_count,
+                   total_calls_completed = COALESCE(t.total_calls_completed, 0) + d.total_calls_completed,
+                   resolution_days_sum = COALESCE(t.resolution_days_sum, 0) + d.resolution_days_sum,
+                   resolution_count = COALESCE(t.resolution_count, 0) + d.resolution_count,
+                   rating_sum = COALESCE(t.rating_sum, 0) + d.rating_sum,
+                   rating_count = COALESCE(t.rating_count, 0) + d.rating_count,
+                   avg_resolution_time = CASE WHEN COALESCE(t.resolution_count, 0) + d.resolution_count > 0
+                       THEN (COALESCE(t.resolution_days_sum, 0) + d.resolution_days_sum)::float / (COALESCE(t.resolution_count, 0) + d.resolution_count)
+                       ELSE 0 END,
+                   rating = CASE WHEN COALESCE(t.rating_count, 0) + d.rating_count > 0
+                       THEN (COALESCE(t.rating_sum, 0) + d.rating_sum)::float / (COALESCE(t.rating_count, 0) + d.rating_count)
+                       ELSE 0 END
+              FROM (VALUES %s) AS d(id, %s)
+             WHERE t.id = d.id
+        """ % (', '.join(['%s'] * len(rows)), ', '.join(COUNTER_FIELDS)), rows)
+        self.browse([row[0] for row in rows]).invalidate_recordset(COUNTER_FIELDS + ['rating', 'avg_resolution_time'])
+
+    def _rebuild_performance_counters(self):
+        """Recompute the counters from all calls and feedback (repair tool).
+
+        Runs on all technicians when called on an empty recordset.
+        """
+        technicians = self or self.with_context(active_test=False).search([])
+        if not technicians:
+            return
+        self.env['fsm.call'].flush_model(['technician_id', 'state', 'call_date', 'closed_date', 'active'])
+        self.env['fsm.feedback'].flush_model(['call_id', 'rating'])
+        self.env.cr.execute("""
+            UPDATE fsm_technician t
+               SET call_count = COALESCE(c.call_count, 0),
+                   active_call_count = COALESCE(c.active_call_count, 0),
+                   total_calls_completed = COALESCE(c.total_calls_completed, 0),
+                   resolution_days_sum = COALESCE(c.resolution_days_sum, 0),
+                   resolution_count = COALESCE(c.resolution_count, 0),
+                   rating_sum = COALESCE(r.rating_sum, 0),
+                   rating_count = COALESCE(r.rating_count, 0),
+                   avg_resolution_time = CASE WHEN c.resolution_count > 0
+                       THEN c.resolution_days_sum::float / c.resolution_count ELSE 0 END,
+                   rating = CASE WHEN r.rating_count > 0
+                       THEN r.rating_sum::float / r.rating_count ELSE 0 END
+              FROM fsm_technician t2
+         LEFT JOIN (
+                SELECT technician_id,
+                       COUNT(*) AS call_count,
+                       COUNT(*) FILTER (WHERE state NOT IN ('closed', 'cancelled')) AS active_call_count,
+                       COUNT(*) FILTER (WHERE state = 'closed') AS total_calls_completed,
+                       (SUM(FLOOR(EXTRACT(EPOCH FROM closed_date - call_date) / 86400))
+                           FILTER (WHERE state = 'closed' AND closed_date IS NOT NULL AND call_date IS NOT NULL))::int
+                           AS resolution_days_sum,
+                       COUNT(*) FILTER (WHERE state = 'closed' AND closed_date IS NOT NULL AND call_date IS NOT NULL)
+                           AS resolution_count
+                  FROM fsm_call
+                 WHERE active AND technician_id = ANY(%(ids)s)
+              GROUP BY technician_id
+              ) c ON c.technician_id = t2.id
+         LEFT JOIN (
+                SELECT call.technician_id,
+                       SUM(feedback.rating::int) AS rating_sum,
+                       COUNT(*) AS rating_count
+                  FROM fsm_feedback feedback
+                  JOIN fsm_call call ON call.id = feedback.call_id
+                 WHERE call.active AND feedback.rating IS NOT NULL AND call.technician_id = ANY(%(ids)s)
+              GROUP BY call.technician_id
+              ) r ON r.technician_id = t2.id
+             WHERE t.id = t2.id AND t.id = ANY(%(ids)s)
+        """, {'ids': technicians.ids})
+        technicians.invalidate_recordset(COUNTER_FIELDS + ['rating', 'avg_resolution_time'])
+
+    def action_rebuild_performance_counters(self):
+        self._rebuild_performance_counters()
     
     def action_set_available(self):
         self.state = 'available'
@@ -142,6 +221,13 @@ class FSMTechnicianPincode(models.Model):
             if self.fsm_pincode_id.state_id:
                 self.state = self.fsm_pincode_id.state_id.name
     
+    @api.onchange('pincode')
+    def _onchange_pincode(self):
+        if self.pincode and not self.fsm_pincode_id:
+            values = self.env['fsm.location.index']._location_values(self.pincode)
+            if values:
+                self.fsm_pincode_id = values['fsm_pincode_id']
+    
     @api.onchange('fsm_area_id')
     def _onchange_fsm_area_id(self):
         if self.fsm_area_id:
@@ -162,34 +248,47 @@ class FSMTechnicianPincode(models.Model):
     @api.model
     def get_available_technician(self, pincode):
         """Find available technician for given pincode"""
-        domain = [
-            ('pincode', '=', pincode),
+        return self.get_available_technicians([pincode]).get(pincode, False)
+    
+    @api.model
+    def get_available_technicians(self, pincodes):
+        """{pincode: technician or False} for a batch of pincodes, e.g. call intake or an import.
+        
+        Technicians assigned to the pincode come first, by priority then
+        least active calls, all pincodes being read in one search. Pincodes
+        nobody is assigned to fall back on the location index: the nearest
+        available technician with free capacity, preferring the service
+        partners whose ranges cover the pincode.
+        """
+        pincodes = {pincode for pincode in pincodes if pincode}
+        technicians = dict.fromkeys(pincodes, False)
+        if not pincodes:
+            return technicians
+        candidates = {}
+        for tp in self.search([
+            ('pincode', 'in', list(pincodes)),
             ('active', '=', True),
             ('technician_id.state', '=', 'available'),
             ('technician_id.active', '=', True)
-        ]
-        technician_pincodes = self.search(domain, order='priority')
-        
-        if technician_pincodes:
-            # Find technician with least active calls
-            technicians_data = []
-            for tp in technician_pincodes:
-                active_calls = tp.technician_id.call_ids.filtered(
-                    lambda c: c.state not in ['closed', 'cancelled']
-                )
-                technicians_data.append({
-                    'technician': tp.technician_id,
-                    'active_calls': len(active_calls),
-                    'priority': tp.priority
-                })
-            
-            # Sort by priority first, then by active calls
-            technicians_data.sort(key=lambda x: (x['priority'], x['active_calls']))
-            
-            if technicians_data:
-                return technicians_data[0]['technician']
+        ], order='priority'):
+            key = (tp.priority, tp.technician_id.active_call_count)
+            if tp.pincode not in candidates or key < candidates[tp.pincode][0]:
+                candidates[tp.pincode] = (key, tp.technician_id)
+        for pincode, (_key, technician) in candidates.items():
+            technicians[pincode] = technician
         
-        return False
+        index = self.env['fsm.location.index']
+        for pincode in pincodes - set(candidates):
+            nearest = [
+                technician for technician, _distance in index.get_nearest_technicians(
+                    pincode, limit=NEAREST_TECHNICIAN_CANDIDATES)
+                if technician.state == 'available' and technician.active_call_count < technician.max_active_calls
+            ]
+            covering = index.get_covering_partners(pincode)
+            technicians[pincode] = next(
+                (technician for technician in nearest if technician.service_partner_id in covering),
+                nearest[0] if nearest else False)
+        return technicians
     
     @api.model
     def get_technicians_for_pincode(self, pincode):
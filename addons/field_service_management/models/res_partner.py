@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api
+from collections import defaultdict
+from datetime import datetime, timedelta
 
 class ResPartner(models.Model):
     _inherit = 'res.partner'
@@ -11,10 +13,10 @@ class ResPartner(models.Model):
     
     # Related FSM Records
     fsm_call_ids = fields.One2many('fsm.call', 'partner_id', string='Service Calls')
-    fsm_call_count = fields.Integer(string='Service Calls', compute='_compute_fsm_counts')
+    fsm_call_count = fields.Integer(string='Service Calls', compute='_compute_fsm_counts', store=True)
     
     fsm_service_partner_ids = fields.One2many('fsm.service.partner', 'partner_id', string='Service Partner Records')
-    fsm_service_partner_count = fields.Integer(string='Service Partners', compute='_compute_fsm_counts')
+    fsm_service_partner_count = fields.Integer(string='Service Partners', compute='_compute_fsm_counts', store=True)
     
     fsm_technician_ids = fields.One2many('fsm.technician', 'partner_id', string='Technician Records')
     fsm_feedback_ids = fields.One2many('fsm.feedback', 'partner_id', string='Feedback')
@@ -38,29 +40,79 @@ class ResPartner(models.Model):
     
     service_notes = fields.Text(string='Service Notes')
     
+    def write(self, vals):
+        if not {'partner_latitude', 'partner_longitude'} & set(vals):
+            return super(ResPartner, self).write(vals)
+        old_positions = {partner.id: (partner.partner_latitude, partner.partner_longitude) for partner in self}
+        res = super(ResPartner, self).write(vals)
+        # Technician positions of the location index come from their contact
+        moved = self.filtered(lambda p: old_positions[p.id] != (p.partner_latitude, p.partner_longitude))
+        if moved and moved._is_technician_location():
+            self.env['fsm.location.index']._invalidate_location_index()
+        return res
+
+    def _is_technician_location(self):
+        """Whether one of these partners locates an active technician"""
+        self.env['fsm.technician'].flush_model(['partner_id', 'user_id', 'active'])
+        self.env.cr.execute("""
+            SELECT 1
+              FROM fsm_technician t
+              JOIN res_users u ON u.id = t.user_id
+             WHERE t.active AND COALESCE(t.partner_id, u.partner_id) IN %s
+             LIMIT 1
+        """, (tuple(self.ids),))
+        return bool(self.env.cr.fetchone())
+    
     @api.depends('fsm_service_partner_ids')
     def _compute_is_service_partner(self):
         for partner in self:
             partner.is_service_partner = bool(partner.fsm_service_partner_ids)
     
+    def _count_by_partner(self, model, domain=None, groupby=()):
+        """Record counts of model per partner of self (and extra groupby
+        values), in one grouped query: {(partner_id, *groupby values): count}"""
+        partner_ids = [pid for pid in self._origin.ids if pid]
+        if not partner_ids:
+            return {}
+        groups = self.env[model]._read_group(
+            [('partner_id', 'in', partner_ids)] + (domain or []),
+            ['partner_id', *groupby],
+            ['__count'],
+        )
+        return {(partner.id, *keys): count for partner, *keys, count in groups}
+    
     @api.depends('fsm_call_ids', 'fsm_service_partner_ids')
     def _compute_fsm_counts(self):
+        call_counts = self._count_by_partner('fsm.call')
+        service_partner_counts = self._count_by_partner('fsm.service.partner')
         for partner in self:
-            partner.fsm_call_count = len(partner.fsm_call_ids)
-            partner.fsm_service_partner_count = len(partner.fsm_service_partner_ids)
+            partner.fsm_call_count = call_counts.get((partner._origin.id,), 0)
+            partner.fsm_service_partner_count = service_partner_counts.get((partner._origin.id,), 0)
     
     @api.depends('fsm_call_ids', 'fsm_call_ids.state', 'fsm_feedback_ids', 'fsm_feedback_ids.rating')
     def _compute_service_stats(self):
+        call_counts = defaultdict(int)
+        pending_counts = defaultdict(int)
+        for (partner_id, state), count in self._count_by_partner('fsm.call', groupby=['state']).items():
+            call_counts[partner_id] += count
+            if state not in ['closed', 'cancelled']:
+                pending_counts[partner_id] += count
+        
+        # Average rating from submitted feedback
+        rating_sums = defaultdict(int)
+        rating_counts = defaultdict(int)
+        feedback_counts = self._count_by_partner('fsm.feedback', [('state', '=', 'submitted'), ('rating', '!=', False)],
+                                                 groupby=['rating'])
+        for (partner_id, rating), count in feedback_counts.items():
+            rating_sums[partner_id] += int(rating) * count
+            rating_counts[partner_id] += count
+        
         for partner in self:
-            calls = partner.fsm_call_ids
-            partner.total_service_calls = len(calls)
-            partner.pending_service_calls = len(calls.filtered(lambda c: c.state not in ['closed', 'cancelled']))
-            
-            # Calculate average rating from feedback
-            feedbacks = partner.fsm_feedback_ids.filtered(lambda f: f.rating and f.state == 'submitted')
-            if feedbacks:
-                ratings = [int(f.rating) for f in feedbacks]
-                partner.avg_service_rating = sum(ratings) / len(ratings)
+            partner_id = partner._origin.id
+            partner.total_service_calls = call_counts[partner_id]
+            partner.pending_service_calls = pending_counts[partner_id]
+            if rating_counts[partner_id]:
+                partner.avg_service_rating = rating_sums[partner_id] / rating_counts[partner_id]
             else:
                 partner.avg_service_rating = 0.0
     
@@ -169,14 +221,29 @@ class FSMServiceContract(models.Model):
     
     @api.depends('partner_id', 'start_date', 'end_date', 'max_calls_per_year')
     def _compute_contract_stats(self):
+        # Daily call counts of all customers over the union of the contract
+        # periods, from one grouped query; each contract sums its own window.
+        # Days are grouped in UTC, the timezone of the date bounds, so calls
+        # near midnight land in the same day as the bounds compare them.
+        dated = self.filtered(lambda c: c.partner_id and c.start_date and c.end_date)
+        daily_counts = defaultdict(list)
+        if dated:
+            groups = self.env['fsm.call'].with_context(tz='UTC')._read_group([
+                ('partner_id', 'in', dated.partner_id._origin.ids),
+                ('call_date', '>=', min(dated.mapped('start_date'))),
+                ('call_date', '<', max(dated.mapped('end_date')) + timedelta(days=1)),
+            ], ['partner_id', 'call_date:day'], ['__count'])
+            for partner, day, count in groups:
+                if isinstance(day, datetime):
+                    day = day.date()
+                daily_counts[partner.id].append((day, count))
+        
         for contract in self:
-            if contract.partner_id and contract.start_date and contract.end_date:
-                calls = self.env['fsm.call'].search([
-                    ('partner_id', '=', contract.partner_id.id),
-                    ('call_date', '>=', contract.start_date),
-                    ('call_date', '<=', contract.end_date)
-                ])
-                contract.calls_used = len(calls)
+            if contract in dated:
+                contract.calls_used = sum(
+                    count for day, count in daily_counts[contract.partner_id._origin.id]
+                    if contract.start_date <= day <= contract.end_date
+                )
                 
                 if contract.max_calls_per_year:
                     contract.calls_remaining = max(0, contract.max_calls_per_year - contract.calls_used)
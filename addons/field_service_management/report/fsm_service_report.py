@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api,tools
 
+# Single row table holding the write_date up to which calls were copied
+WATERMARK_TABLE = 'fsm_service_report_state'
+
+# Indexed report dimensions
+INDEXED_COLUMNS = ['call_date', 'technician_id', 'service_partner_id', 'state']
+
 class FSMServiceReport(models.Model):
     _name = 'fsm.service.report'
     _description = 'Service Report'
     _auto = False
     _order = 'call_date desc'
     
-    # Dimensions
+    # Dimensions (report rows share the id of their call, so ids are stable)
     call_id = fields.Many2one('fsm.call', string='Service Call', readonly=True)
     partner_id = fields.Many2one('res.partner', string='Customer', readonly=True)
     technician_id = fields.Many2one('fsm.technician', string='Technician', readonly=True)
@@ -53,30 +59,119 @@ class FSMServiceReport(models.Model):
     company_id = fields.Many2one('res.company', string='Company', readonly=True)
     currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
     
+    def _select(self):
+        return """
+            SELECT
+                c.id AS id,
+                c.id AS call_id,
+                c.partner_id,
+                c.technician_id,
+                c.service_partner_id,
+                c.call_date,
+                c.closed_date,
+                1 AS call_count,
+                c.resolution_time,
+                c.total_charge,
+                c.state,
+                c.priority,
+                c.pincode,
+                c.warranty_status,
+                c.company_id,
+                company.currency_id
+            FROM
+                fsm_call c
+                LEFT JOIN res_company company ON company.id = c.company_id
+        """
+
+    def _columns(self):
+        return ['id', 'call_id', 'partner_id', 'technician_id', 'service_partner_id', 'call_date',
+                'closed_date', 'call_count', 'resolution_time', 'total_charge', 'state', 'priority',
+                'pincode', 'warranty_status', 'company_id', 'currency_id']
+
     def init(self):
-        """Initialize the SQL view for the report"""
+        """Create the report table with its indexes and fill it from all calls.
+
+        The report used to be a plain view; it is now a table keyed on the
+        call id and kept up to date incrementally by _refresh(). It is only
+        built when missing, so module upgrades keep the existing rows.
+        """
         tools.drop_view_if_exists(self.env.cr, self._table)
         self.env.cr.execute("""
-            CREATE OR REPLACE VIEW %s AS (
-                SELECT
-                    row_number() OVER () AS id,
-                    c.id as call_id,
-                    c.partner_id,
-                    c.technician_id,
-                    c.service_partner_id,
-                    c.call_date,
-                    c.closed_date,
-                    1 as call_count,
-                    c.resolution_time,
-                    c.total_charge,
-                    c.state,
-                    c.priority,
-                    c.pincode,
-                    c.warranty_status,
-                    c.company_id
-                FROM
-                    fsm_call c
-                WHERE
-                    c.active = True
-            )
-        """ % self._table)
\ No newline at end of file
+            CREATE TABLE IF NOT EXISTS %s (id integer PRIMARY KEY, watermark timestamp)
+        """ % WATERMARK_TABLE)
+        self.env.cr.execute("INSERT INTO %s (id) VALUES (1) ON CONFLICT DO NOTHING" % WATERMARK_TABLE)
+        if not tools.table_exists(self.env.cr, self._table):
+            watermark = self._get_refresh_boundary()
+            self.env.cr.execute("""
+                CREATE TABLE %s AS (%s WHERE c.active = True)
+            """ % (self._table, self._select()))
+            self.env.cr.execute("ALTER TABLE %s ADD PRIMARY KEY (id)" % self._table)
+            self.env.cr.execute("UPDATE %s SET watermark = %%s WHERE id = 1" % WATERMARK_TABLE, (watermark,))
+        for column in INDEXED_COLUMNS:
+            tools.create_index(self.env.cr, '%s_%s_index' % (self._table, column), self._table, [column])
+
+    def _get_refresh_boundary(self):
+        """Time before which every call write_date is visible to this transaction.
+
+        write_date is the start time of the writing transaction, so calls
+        still being written by a running transaction are at least as recent
+        as the oldest transaction start; taking that bound, rather than a
+        fixed overlap, never skips a long running transaction.
+        """
+        self.env.cr.execute("""
+            SELECT LEAST(now(), MIN(xact_start)) AT TIME ZONE 'UTC'
+              FROM pg_stat_activity
+             WHERE datname = current_database() AND xact_start IS NOT NULL
+        """)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _refresh(self):
+        """Copy calls written since the watermark into the report table.
+
+        Active calls are upserted on their id and archived ones removed;
+        deleted calls are removed by fsm.call.unlink. The watermark row is
+        locked for the whole refresh, so concurrent refreshes run one after
+        the other.
+        """
+        self.env.cr.execute("SELECT watermark FROM %s WHERE id = 1 FOR UPDATE" % WATERMARK_TABLE)
+        since = self.env.cr.fetchone()[0] or fields.Datetime.to_datetime('1970-01-01')
+        self.env['fsm.call'].flush_model()
+        new_watermark = self._get_refresh_boundary()
+        columns = self._columns()
+        self.env.cr.execute("""
+            INSERT INTO %(table)s (%(columns)s)
+            %(select)s WHERE c.active = True AND c.write_date >= %%(since)s
+            ON CONFLICT (id) DO UPDATE SET %(updates)s
+        """ % {
+            'table': self._table,
+            'columns': ', '.join(columns),
+            'select': self._select(),
+            'updates': ', '.join('%s = EXCLUDED.%s' % (column, column) for column in columns[1:]),
+        }, {'since': since})
+        updated = self.env.cr.rowcount
+        self.env.cr.execute("""
+            DELETE FROM %s r USING fsm_call c
+             WHERE c.id = r.id AND c.active = False AND c.write_date >= %%s
+        """ % self._table, (since,))
+        self.env.cr.execute("UPDATE %s SET watermark = %%s WHERE id = 1" % WATERMARK_TABLE, (new_watermark,))
+        self.invalidate_model()
+        return updated
+
+    @api.model
+    def _delete_calls(self, call_ids):
+        """Drop the report rows of deleted calls"""
+        if call_ids:
+            self.env.cr.execute("DELETE FROM %s WHERE id IN %%s" % self._table, (tuple(call_ids),))
+            self.invalidate_model()
+
+    @api.model
+    def _cron_refresh(self):
+        """Cron job to bring the report table up to date with recent call writes"""
+        self._refresh()
+
+    @api.model
+    def action_open_report(self):
+        """Refresh the report incrementally, then open the analysis"""
+        self._refresh()
+        return self.env['ir.actions.act_window']._for_xml_id('field_service_management.action_fsm_service_report')
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import dispatch
+from . import claim
+from . import location
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""TAT bucketing behind ``fsm.claim`` calculation, kept free of ORM imports."""
+import numpy as np
+
+
+def bucket_by_tat(days_taken, thresholds):
+    """Index of the TAT category each call falls into, in one sorted pass.
+
+    ``thresholds`` are the category day limits sorted ascending; a call
+    belongs to the first category whose limit is >= its days to close.
+    Returns an array of category indices, -1 for calls slower than every
+    category.
+    """
+    days_taken = np.asarray(days_taken, dtype=np.int64)
+    thresholds = np.asarray(thresholds, dtype=np.int64)
+    buckets = np.searchsorted(thresholds, days_taken, side='left')
+    buckets[buckets >= len(thresholds)] = -1
+    return buckets
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""In-memory structures behind the ``fsm.location.index`` model.
+
+No ORM imports: the model builds these from the database once per registry
+and caches them, lookups are then pure Python.
+"""
+import math
+from bisect import bisect_left, bisect_right
+
+EARTH_RADIUS_KM = 6371.0
+
+# One degree of latitude is ~111 km everywhere
+KM_PER_LATITUDE_DEGREE = 111.19
+
+
+def pincode_key(pincode):
+    """Integer key of a numeric pincode, None for anything else"""
+    pincode = (pincode or '').strip()
+    return int(pincode) if pincode.isdigit() else None
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class IntervalIndex:
+    """Overlapping integer ranges mapped to owners, answering "who covers x".
+
+    The ranges are cut into disjoint elementary segments at every range
+    boundary; each segment keeps the frozenset of owners covering it, so a
+    lookup is a single bisect over the sorted boundaries.
+    """
+
+    def __init__(self, intervals):
+        """intervals: iterable of (start, end, owner) with start <= end, inclusive"""
+        events = {}
+        for start, end, owner in intervals:
+            events.setdefault(start, []).append((1, owner))
+            events.setdefault(end + 1, []).append((-1, owner))
+        self.boundaries = sorted(events)
+        self.owners = []
+        active = {}
+        for point in self.boundaries:
+            for delta, owner in events[point]:
+                count = active.get(owner, 0) + delta
+                if count:
+                    active[owner] = count
+                else:
+                    active.pop(owner, None)
+            self.owners.append(frozenset(active))
+
+    def __len__(self):
+        return len(self.boundaries)
+
+    def lookup(self, value):
+        index = bisect_right(self.boundaries, value) - 1
+        return self.owners[index] if index >= 0 else frozenset()
+
+
+class PointIndex:
+    """Points sorted by latitude for nearest-neighbour queries.
+
+    A query bisects to the point's latitude and widens the window both ways
+    only while the latitude gap alone could still beat the current k-th
+    best distance, so it touches a narrow band instead of every point.
+    """
+
+    def __init__(self, points):
+        """points: iterable of (lat, lon, owner)"""
+        self.points = sorted(points, key=lambda point: point[0])
+        self.latitudes = [point[0] for point in self.points]
+
+    def __len__(self):
+        return len(self.points)
+
+    def nearest(self, lat, lon, limit=5, max_km=None):
+        """[(distance_km, owner)] of the closest points, nearest first"""
+        best = []
+        below = bisect_left(self.latitudes, lat) - 1
+        above = below + 1
+
+        def bound():
+            if len(best) >= limit:
+                return best[-1][0]
+            return max_km if max_km is not None else math.inf
+
+        while below >= 0 or above < len(self.points):
+            gap_below = (lat - self.latitudes[below]) * KM_PER_LATITUDE_DEGREE if below >= 0 else math.inf
+            gap_above = (self.latitudes[above] - lat) * KM_PER_LATITUDE_DEGREE if above < len(self.points) else math.inf
+            if min(gap_below, gap_above) > bound():
+                break
+            if gap_below <= gap_above:
+                point_lat, point_lon, owner = self.points[below]
+                below -= 1
+            else:
+                point_lat, point_lon, owner = self.points[above]
+                above += 1
+            distance = haversine_km(lat, lon, point_lat, point_lon)
+            if distance <= bound():
+                best.append((distance, owner))
+                best.sort(key=lambda item: item[0])
+                del best[limit:]
+        return best
@@ -4,4 +4,5 @@ from . import fsm_spare_request
 from . import fsm_spare_report_wizard
 from . import fsm_close_call
 from . import fsm_technician_assignment
-from . import fsm_call_attachment
\ No newline at end of file
+from . import fsm_call_attachment
+from . import fsm_dispatch_wizard
\ No newline at end of file
@@ -10,7 +10,6 @@ class FSMAssignTechnician(models.TransientModel):
     
     def action_assign(self):
         """Assign selected technician to calls"""
-        for call in self.call_ids:
-            call.technician_id = self.technician_id
-            call.action_assign()
+        self.call_ids.write({'technician_id': self.technician_id.id})
+        self.call_ids.action_assign()
         return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
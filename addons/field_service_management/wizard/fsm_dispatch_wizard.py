@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+
+class FSMDispatchWizard(models.TransientModel):
+    _name = 'fsm.dispatch.wizard'
+    _description = 'Optimized Dispatch Wizard'
+
+    call_ids = fields.Many2many('fsm.call', string='Service Calls',
+                                domain="[('state', 'in', ['draft', 'confirmed']), ('technician_id', '=', False)]")
+    technician_ids = fields.Many2many('fsm.technician', string='Technicians',
+                                      help='Leave empty to use all available technicians')
+    method = fields.Selection([
+        ('greedy', 'Greedy (most urgent first)'),
+        ('hungarian', 'Optimal (Hungarian)')
+    ], string='Method', default='greedy', required=True)
+    distance_weight = fields.Float(string='Distance Weight', default=1.0, help='Cost per km travelled')
+    sla_weight = fields.Float(string='SLA Weight', default=100.0, help='Cost per expected SLA breach, scaled by priority')
+    speed_kmh = fields.Float(string='Average Speed (km/h)', default=30.0)
+
+    @api.model
+    def default_get(self, fields):
+        res = super(FSMDispatchWizard, self).default_get(fields)
+        optimizer = self.env['fsm.dispatch.optimizer']
+        if self._context.get('active_model') == 'fsm.call' and self._context.get('active_ids'):
+            calls = self.env['fsm.call'].browse(self._context['active_ids']).filtered(
+                lambda c: c.state in ['draft', 'confirmed'] and not c.technician_id
+            )
+        else:
+            calls = optimizer._get_dispatch_calls()
+        res['call_ids'] = [(6, 0, calls.ids)]
+        return res
+
+    def action_dispatch(self):
+        self.ensure_one()
+        if not self.call_ids:
+            raise UserError("There are no unassigned calls to dispatch.")
+        if self.speed_kmh <= 0:
+            raise UserError("Average speed must be positive.")
+
+        technicians = self.technician_ids or self.env['fsm.dispatch.optimizer']._get_dispatch_technicians()
+        assigned = self.env['fsm.dispatch.optimizer'].dispatch(
+            self.call_ids, technicians,
+            method=self.method,
+            distance_weight=self.distance_weight,
+            sla_weight=self.sla_weight,
+            speed_kmh=self.speed_kmh,
+        )
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Dispatched Calls',
+            'res_model': 'fsm.call',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', assigned.ids)],
+            'target': 'current',
+        }
@@ -2,6 +2,9 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 
+# Larger selections are rendered by a background report job instead of the request
+SYNC_REPORT_LIMIT = 2000
+
 class FSMSpareReportWizard(models.TransientModel):
     _name = 'fsm.spare.report.wizard'
     _description = 'Spare Request Report Wizard'
@@ -42,9 +45,8 @@ class FSMSpareReportWizard(models.TransientModel):
             if record.date_from > record.date_to:
                 raise ValidationError('Start date cannot be later than end date!')
 
-    def action_print_report(self):
-        """Generate PDF report"""
-        # Build domain for filtering
+    def _get_report_domain(self):
+        self.ensure_one()
         domain = [
             ('request_date', '>=', self.date_from),
             ('request_date', '<=', self.date_to)
@@ -66,14 +68,15 @@ class FSMSpareReportWizard(models.TransientModel):
         if self.partner_ids:
             domain.append(('partner_id', 'in', self.partner_ids.ids))
 
-        # Get filtered records
-        spare_requests = self.env['fsm.spare.request'].search(domain, order='request_date desc')
+        return domain
 
-        if not spare_requests:
-            raise ValidationError('No spare requests found for the selected criteria!')
+    def _get_request_ids(self):
+        """Ids of the matching spare requests, newest first; no fields are read"""
+        return self.env['fsm.spare.request']._search(self._get_report_domain(), order='request_date desc').get_result_ids()
 
-        # Prepare data for report
-        data = {
+    def _get_report_data(self, request_ids):
+        self.ensure_one()
+        return {
             'wizard_id': self.id,
             'date_from': self.date_from,
             'date_to': self.date_to,
@@ -83,7 +86,60 @@ class FSMSpareReportWizard(models.TransientModel):
             'call_ids': self.call_ids.ids,
             'partner_ids': self.partner_ids.ids,
             'group_by': self.group_by,
-            'request_ids': spare_requests.ids
+            'request_ids': list(request_ids),
+        }
+
+    def _get_job_options(self):
+        """Wizard values a background report job recreates the wizard from"""
+        self.ensure_one()
+        return {
+            'date_from': fields.Date.to_string(self.date_from),
+            'date_to': fields.Date.to_string(self.date_to),
+            'technician_ids': [(6, 0, self.technician_ids.ids)],
+            'spare_ids': [(6, 0, self.spare_ids.ids)],
+            'state_filter': self.state_filter,
+            'call_ids': [(6, 0, self.call_ids.ids)],
+            'partner_ids': [(6, 0, self.partner_ids.ids)],
+            'group_by': self.group_by,
         }
 
-        return self.env.ref('field_service_management.action_report_spare_request').report_action(self, data=data)
\ No newline at end of file
+    def action_print_report(self):
+        """Generate PDF report, in the background when the range is too large"""
+        self.ensure_one()
+        request_count = self.env['fsm.spare.request'].search_count(self._get_report_domain())
+        if not request_count:
+            raise ValidationError('No spare requests found for the selected criteria!')
+        if request_count > SYNC_REPORT_LIMIT:
+            return self._queue_report('pdf')
+
+        data = self._get_report_data(self._get_request_ids())
+        return self.env.ref('field_service_management.action_report_spare_request').report_action(self, data=data)
+
+    def action_queue_pdf(self):
+        return self._queue_report('pdf')
+
+    def action_queue_xlsx(self):
+        return self._queue_report('xlsx')
+
+    def _queue_report(self, report_format):
+        self.ensure_one()
+        if not self.env['fsm.spare.request'].search_count(self._get_report_domain(), limit=1):
+            raise ValidationError('No spare requests found for the selected criteria!')
+        job = self.env['fsm.report.job'].create({
+            'name': f'Spare Request Report {self.date_from} - {self.date_to}',
+            'report_format': report_format,
+            'options': self._get_job_options(),
+        })
+        self.env.ref('field_service_management.ir_cron_fsm_run_report_jobs')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Report Queued',
+                'message': f'{job.name} is being generated in the background. '
+                           'You will be notified when it is ready.',
+                'type': 'info',
+                'sticky': False,
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }
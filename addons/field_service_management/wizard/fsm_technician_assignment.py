@@ -44,12 +44,9 @@ class FSMTechnicianAssignmentWizard(models.TransientModel):
             if technicians:
                 technician_data = []
                 for tech in technicians:
-                    active_calls = tech.call_ids.filtered(
-                        lambda c: c.state not in ['closed', 'cancelled']
-                    )
                     technician_data.append({
                         'technician': tech,
-                        'active_calls': len(active_calls)
+                        'active_calls': tech.active_call_count
                     })
 
                 # Sort by active calls count (ascending) - least busy first
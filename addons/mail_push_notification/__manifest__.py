@@ -21,7 +21,7 @@
 #############################################################################
 {
     "name": "Push Notification From ChatBox",
-    'version': '17.0.2.0.0',
+    'version': '17.0.2.3.0',
     'category': 'Discuss,Extra Tools',
     'summary': """With Push Notification From ChatBox, users can respond 
      promptly to important messages, improving communication efficiency.""",
@@ -35,7 +35,9 @@
     "depends": ["web", "mail"],
     "data": [
         "security/ir.model.access.csv",
-        "views/res_config_settings_views.xml"
+        "data/ir_cron_data.xml",
+        "views/res_config_settings_views.xml",
+        "views/push_notification_outbox_views.xml",
     ],
     'assets': {
         'web.assets_backend': [
@@ -24,3 +24,4 @@ from . import push_notification
 from . import res_company
 from . import res_config_settings
 from . import res_users
+from . import push_notification_outbox
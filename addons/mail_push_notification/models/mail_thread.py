@@ -19,8 +19,11 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from firebase_admin import messaging, initialize_app, credentials, _apps
-from odoo import models
+import logging
+
+from odoo import models, tools
+
+_logger = logging.getLogger(__name__)
 
 
 class MailThread(models.AbstractModel):
@@ -28,74 +31,44 @@ class MailThread(models.AbstractModel):
     _inherit = 'mail.thread'
 
     def _notify_thread(self, message, msg_vals=False, **kwargs):
-        """Override the _notify_thread() function to fetch chat message details
-        and push that message as a notification."""
+        """Override the _notify_thread() function to push chat messages to
+        the devices of the other channel members."""
         res = super()._notify_thread(message, msg_vals=msg_vals, **kwargs)
-        msg = message.read()
-        if (self.env.company.push_notification and
+        if ('channel_type' in self._fields and
+                self.env.company.push_notification and
                 self.env.user.has_group('base.group_user')):
             try:
-                domain = []
-                receiver_ids = self._get_receiver_ids(msg)
-                user_list = [rec.id for rec in receiver_ids]
-                if receiver_ids:
-                    domain = [('user_id', 'in', user_list)]
-                self._send_push_notification(msg, domain)
-            except Exception as e:
-                self.env['ir.logging'].sudo().create({
-                    'name': 'Push Notification Error',
-                    'type': 'server',
-                    'level': 'ERROR',
-                    'message': str(e),
-                    'path': 'mail.thread',
-                    'func': '_notify_thread',
-                    'line': '45',
-                })
+                author = message.author_id
+                tokens = self._get_receiver_tokens(author)
+                if tokens:
+                    self.env['push.notification.outbox']._enqueue(
+                        title='Message from ' + (author.name or ''),
+                        body=tools.html2plaintext(message.body or ''),
+                        tokens=tokens,
+                        message=message,
+                    )
+            except Exception:
+                _logger.exception('Could not queue the push notification of '
+                                  'message %s', message.id)
         return res
 
-    def _get_receiver_ids(self, msg):
-        """Identify the receiver of the notification."""
-        receiver_ids = []
-        receiver_id = False
-        if self.channel_type != 'channel':
-            for partner in self.channel_partner_ids:
-                if partner.id != msg[0]['author_id'][0]:
-                    receiver_id = self.env['res.users'].search(
-                        [('partner_id', '=', partner.id)])
-                if receiver_id:
-                    receiver_ids.append(receiver_id)
-        else:
-            for partner in self.channel_partner_ids:
-                receiver_id = self.env['res.users'].search(
-                    [('partner_id', '=', partner.id)])
-                if receiver_id:
-                    receiver_ids.append(receiver_id)
-        return receiver_ids
-
-    def _send_push_notification(self, msg, domain):
-        """Send a push notification using Firebase."""
-        if not _apps:
-            cred = credentials.Certificate({
-                "type": "service_account",
-                "project_id": self.env.company.project_id_firebase,
-                "private_key_id": self.env.company.private_key_ref,
-                "private_key": self.env.company.private_key.replace('\\n',
-                                                                    '\n'),
-                "client_email": self.env.company.client_email,
-                "client_id": self.env.company.client_id_firebase,
-                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token",
-                "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                "client_x509_cert_url": self.env.company.client_cert_url,
-                "universe_domain": "googleapis.com"
-            })
-            initialize_app(cred)
-        message = messaging.MulticastMessage(
-            notification=messaging.Notification(
-                title='Message from ' + msg[0]['author_id'][1],
-                body=msg[0]['body']
-            ),
-            tokens=[reg_id.register_id for reg_id in
-                    self.env['push.notification'].search(domain)]
-        )
-        messaging.send_each_for_multicast(message)
+    def _get_receiver_tokens(self, author):
+        """Registration tokens of the internal users who are members of the
+        channels, the author excepted, fetched in a single query whatever
+        the number of members."""
+        self.env['discuss.channel.member'].flush_model(
+            ['channel_id', 'partner_id'])
+        self.env['res.users'].flush_model(['partner_id', 'active'])
+        self.env['push.notification'].flush_model(
+            ['user_id', 'register_id', 'active'])
+        self.env.cr.execute("""
+            SELECT DISTINCT token.register_id
+              FROM discuss_channel_member member
+              JOIN res_users users ON users.partner_id = member.partner_id
+                                  AND users.active
+              JOIN push_notification token ON token.user_id = users.id
+             WHERE member.channel_id IN %s
+               AND member.partner_id != %s
+               AND token.active
+        """, (tuple(self.ids), author.id or 0))
+        return [row[0] for row in self.env.cr.fetchall()]
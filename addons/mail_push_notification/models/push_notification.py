@@ -19,7 +19,10 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import fields, models
+from odoo import api, fields, models
+
+# Consecutive transient failures after which a token is deactivated
+MAX_TOKEN_FAILURES = 10
 
 
 class PushNotification(models.Model):
@@ -29,6 +32,76 @@ class PushNotification(models.Model):
     _description = 'Web Push Notification'
 
     user_id = fields.Many2one("res.users", string="Firebase User",
+                              index=True, ondelete='cascade',
                               help="Corresponding Firebase User")
-    register_id = fields.Char(string="Registration Id",
+    register_id = fields.Char(string="Registration Id", required=True,
                               help="Firebase Registration Token")
+    active = fields.Boolean(string="Active", default=True,
+                            help="Inactive tokens are no longer notified")
+    last_seen = fields.Datetime(string="Last Seen",
+                                help="Last time the browser registered the "
+                                     "token")
+    failure_count = fields.Integer(string="Failures", default=0,
+                                   help="Consecutive failed deliveries")
+
+    _sql_constraints = [
+        ('register_id_unique', 'unique(register_id)',
+         'A registration token can only be registered once.'),
+    ]
+
+    @api.model
+    def _register(self, token, user):
+        """Register ``token`` for ``user`` in one atomic upsert, so
+        concurrent logins of the same browser never duplicate it. A token
+        moving to another user, or coming back after deactivation, is
+        reassigned and reactivated."""
+        if not token:
+            return
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO push_notification (register_id, user_id, active,
+                                           last_seen, failure_count,
+                                           create_uid, create_date,
+                                           write_uid, write_date)
+                 VALUES (%(token)s, %(user)s, TRUE, NOW() AT TIME ZONE 'UTC',
+                         0, %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s,
+                         NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (register_id) DO UPDATE
+                    SET user_id = EXCLUDED.user_id,
+                        active = TRUE,
+                        last_seen = EXCLUDED.last_seen,
+                        failure_count = 0,
+                        write_uid = EXCLUDED.write_uid,
+                        write_date = EXCLUDED.write_date
+        """, {'token': token, 'user': user.id, 'uid': self.env.uid})
+        self.invalidate_model()
+
+    @api.model
+    def _report_delivery(self, delivered=(), failed=(), invalid=()):
+        """Update the token registry with the outcome of a delivery.
+
+        Delivered tokens have their failure count reset, failed ones have it
+        increased and are deactivated after MAX_TOKEN_FAILURES consecutive
+        failures, and the ones FCM reports as unregistered or invalid are
+        deactivated right away."""
+        self.flush_model()
+        cr = self.env.cr
+        if delivered:
+            cr.execute("""
+                UPDATE push_notification SET failure_count = 0
+                 WHERE register_id = ANY(%s)
+                   AND COALESCE(failure_count, 0) != 0
+            """, (list(delivered),))
+        if failed:
+            cr.execute("""
+                UPDATE push_notification
+                   SET failure_count = COALESCE(failure_count, 0) + 1,
+                       active = COALESCE(failure_count, 0) + 1 < %s
+                 WHERE register_id = ANY(%s)
+            """, (MAX_TOKEN_FAILURES, list(failed)))
+        if invalid:
+            cr.execute("""
+                UPDATE push_notification SET active = FALSE
+                 WHERE register_id = ANY(%s) AND active
+            """, (list(invalid),))
+        self.invalidate_model(['active', 'failure_count'])
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Gokul PI (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+from .push_transport import (MULTICAST_LIMIT, TOKEN_ERRORS,
+                             PushTransportError, get_transport)
+
+_logger = logging.getLogger(__name__)
+
+# Delay before the first retry, doubled on each further attempt
+RETRY_BASE_DELAY = timedelta(minutes=1)
+MAX_ATTEMPTS = 6
+# Outbox rows handled by one cron run
+PROCESS_BATCH_SIZE = 200
+# Sent notifications are kept this long for troubleshooting
+SENT_RETENTION = timedelta(days=7)
+
+
+class PushNotificationOutbox(models.Model):
+    """Push notifications waiting to be delivered.
+
+    Rows are created in the transaction posting the message and delivered
+    by a cron once it is committed, so posting never waits on FCM and a
+    rolled back message is never pushed."""
+    _name = 'push.notification.outbox'
+    _description = 'Push Notification Outbox'
+    _order = 'id'
+
+    message_id = fields.Many2one('mail.message', string="Message",
+                                 ondelete='cascade', index='btree_not_null',
+                                 help="Message the notification was created "
+                                      "for")
+    company_id = fields.Many2one('res.company', string="Company",
+                                 required=True,
+                                 help="Company whose Firebase credentials "
+                                      "are used")
+    title = fields.Char(string="Title", required=True)
+    body = fields.Text(string="Body")
+    tokens = fields.Json(string="Tokens",
+                         help="Registration tokens still to be notified")
+    token_count = fields.Integer(string="Token Count",
+                                 compute='_compute_token_count')
+    state = fields.Selection([('pending', 'Pending'), ('sent', 'Sent'),
+                              ('failed', 'Failed')], string="Status",
+                             default='pending', required=True)
+    attempt_count = fields.Integer(string="Attempts", default=0)
+    next_attempt_date = fields.Datetime(string="Next Attempt",
+                                        default=fields.Datetime.now)
+    last_error = fields.Text(string="Last Error")
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS push_notification_outbox_pending_idx
+                ON push_notification_outbox (next_attempt_date)
+             WHERE state = 'pending'
+        """)
+
+    @api.depends('tokens')
+    def _compute_token_count(self):
+        for record in self:
+            record.token_count = len(record.tokens or [])
+
+    @api.model
+    def _enqueue(self, title, body, tokens, message=None):
+        """Queue a notification to ``tokens``; delivered after commit."""
+        tokens = list(dict.fromkeys(token for token in tokens if token))
+        if not tokens:
+            return self.browse()
+        outbox = self.sudo().create({
+            'message_id': message.id if message else False,
+            'company_id': self.env.company.id,
+            'title': title,
+            'body': body,
+            'tokens': tokens,
+        })
+        self.env.ref('mail_push_notification.ir_cron_push_notification_outbox'
+                     ).sudo()._trigger()
+        return outbox
+
+    def _get_transport_name(self):
+        return self.env['ir.config_parameter'].sudo().get_param(
+            'mail_push_notification.transport', 'firebase')
+
+    @api.model
+    def _process_outbox(self, auto_commit=True):
+        """Deliver the due notifications, at most PROCESS_BATCH_SIZE per run.
+
+        Rows are locked with SKIP LOCKED so concurrent workers never send the
+        same notification twice. Each row is committed once sent, so a later
+        failure never rolls back, and resends, what was already pushed; the
+        commit releasing the locks, every row is locked again before it is
+        sent."""
+        now = fields.Datetime.now()
+        outbox = self._lock_due(now, limit=PROCESS_BATCH_SIZE)
+        transport_name = self._get_transport_name()
+        transports = {}
+        for record in outbox:
+            if auto_commit and not record._lock_due(now):
+                continue
+            company = record.company_id
+            if company not in transports:
+                try:
+                    transports[company] = get_transport(transport_name,
+                                                        company)
+                except Exception as e:
+                    _logger.exception('Push transport %s of company %s '
+                                      'cannot be created', transport_name,
+                                      company.id)
+                    transports[company] = e
+            transport = transports[company]
+            if isinstance(transport, Exception):
+                record._schedule_retry(record.tokens or [], [str(transport)])
+            else:
+                try:
+                    with self.env.cr.savepoint():
+                        record._send(transport)
+                except Exception as e:
+                    _logger.exception('Push notification %s could not be '
+                                      'sent', record.id)
+                    record._schedule_retry(record.tokens or [], [str(e)])
+            if auto_commit:
+                self.env.cr.commit()
+        self._schedule_next_run(more=len(outbox) == PROCESS_BATCH_SIZE)
+
+    def _lock_due(self, now, limit=None):
+        """Due pending rows, of self or of the whole outbox, not locked by
+        another worker."""
+        query = """
+            SELECT id FROM push_notification_outbox
+             WHERE state = 'pending' AND next_attempt_date <= %s
+               {ids}
+          ORDER BY id
+             {limit}
+               FOR UPDATE SKIP LOCKED
+        """.format(ids='AND id IN %s' if self else '',
+                   limit='LIMIT %s' if limit else '')
+        params = [now] + ([tuple(self.ids)] if self else []) + \
+            ([limit] if limit else [])
+        self.env.cr.execute(query, params)
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _send(self, transport):
+        """Send to the remaining tokens, MULTICAST_LIMIT at a time."""
+        self.ensure_one()
+        tokens = self.tokens or []
+        retry_tokens, errors = [], []
+        delivered_tokens, failed_tokens, dead_tokens = [], [], []
+        for start in range(0, len(tokens), MULTICAST_LIMIT):
+            batch = tokens[start:start + MULTICAST_LIMIT]
+            try:
+                results = transport.send_multicast(self.title, self.body or '',
+                                                   batch)
+            except PushTransportError as e:
+                retry_tokens += batch
+                errors.append(str(e))
+                continue
+            for result in results:
+                if result.success:
+                    delivered_tokens.append(result.token)
+                elif result.error in TOKEN_ERRORS:
+                    dead_tokens.append(result.token)
+                else:
+                    failed_tokens.append(result.token)
+                    errors.append('%s: %s' % (result.token[:12],
+                                              result.error))
+        self.env['push.notification']._report_delivery(
+            delivered=delivered_tokens, failed=failed_tokens,
+            invalid=dead_tokens)
+        self._schedule_retry(retry_tokens + failed_tokens, errors)
+
+    def _schedule_retry(self, tokens, errors):
+        """Keep the failed tokens for an exponentially delayed retry."""
+        self.ensure_one()
+        attempt_count = self.attempt_count + 1
+        vals = {'attempt_count': attempt_count, 'tokens': tokens,
+                'last_error': '\n'.join(errors) or False}
+        if not tokens:
+            vals['state'] = 'sent'
+        elif attempt_count >= MAX_ATTEMPTS:
+            vals['state'] = 'failed'
+            _logger.warning('Push notification %s failed after %s attempts',
+                            self.id, attempt_count)
+        else:
+            vals['next_attempt_date'] = fields.Datetime.now() + \
+                RETRY_BASE_DELAY * 2 ** (attempt_count - 1)
+        self.write(vals)
+
+    @api.model
+    def _schedule_next_run(self, more=False):
+        """Trigger the cron again for the backlog or the next retry."""
+        cron = self.env.ref(
+            'mail_push_notification.ir_cron_push_notification_outbox')
+        if more:
+            cron._trigger()
+            return
+        next_retry = self.search([('state', '=', 'pending')],
+                                 order='next_attempt_date', limit=1)
+        if next_retry:
+            cron._trigger(at=next_retry.next_attempt_date)
+
+    def action_retry(self):
+        self.write({'state': 'pending', 'attempt_count': 0,
+                    'next_attempt_date': fields.Datetime.now()})
+        self._schedule_next_run()
+
+    @api.autovacuum
+    def _gc_sent_notifications(self):
+        self.search([
+            ('state', '=', 'sent'),
+            ('write_date', '<', fields.Datetime.now() - SENT_RETENTION),
+        ]).unlink()
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Gokul PI (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+"""Transports delivering push notifications for the push outbox.
+
+A transport sends one notification to up to ``MULTICAST_LIMIT`` device
+tokens and reports the outcome per token. The transport in use is read
+from the ``mail_push_notification.transport`` system parameter, so
+installations without Firebase access (and tests) can switch to the
+in-process ``stub`` transport.
+"""
+import logging
+from collections import namedtuple
+
+_logger = logging.getLogger(__name__)
+
+# Maximum number of tokens FCM accepts in one multicast request
+MULTICAST_LIMIT = 500
+
+# Per token outcome; error is None on success, else a normalized error code
+PushResult = namedtuple('PushResult', 'token success error')
+
+# Error codes meaning the token will never work again
+TOKEN_ERRORS = ('unregistered', 'invalid-argument', 'not-found',
+                'sender-id-mismatch')
+
+# Code of the errors worth retrying later, e.g. quota or server errors
+RETRY_ERROR = 'unavailable'
+
+
+def _firebase_error_classes():
+    """(exception class, normalized code) of firebase_admin, most specific
+    first: UnregisteredError is a NotFoundError and SenderIdMismatchError a
+    PermissionDeniedError."""
+    from firebase_admin import exceptions, messaging
+    return (
+        (messaging.UnregisteredError, 'unregistered'),
+        (messaging.SenderIdMismatchError, 'sender-id-mismatch'),
+        (exceptions.InvalidArgumentError, 'invalid-argument'),
+        (exceptions.NotFoundError, 'not-found'),
+    )
+
+
+class PushTransportError(Exception):
+    """The whole batch could not be sent; it is retried later."""
+
+
+class PushTransport:
+    """Base class of the push transports."""
+    name = None
+
+    def __init__(self, company):
+        self.company = company
+
+    def send_multicast(self, title, body, tokens, data=None):
+        """Send one notification to ``tokens``.
+
+        :return: a ``PushResult`` per token, in the order of ``tokens``
+        :raise PushTransportError: when nothing could be sent
+        """
+        raise NotImplementedError()
+
+
+class FirebaseTransport(PushTransport):
+    """Firebase Cloud Messaging through the firebase_admin SDK."""
+    name = 'firebase'
+
+    def _get_app(self):
+        """Firebase app of the company, initialized once per process."""
+        import firebase_admin
+        from firebase_admin import credentials
+        app_name = 'mail_push_notification_%s' % self.company.id
+        try:
+            return firebase_admin.get_app(app_name)
+        except ValueError:
+            company = self.company
+            cred = credentials.Certificate({
+                "type": "service_account",
+                "project_id": company.project_id_firebase,
+                "private_key_id": company.private_key_ref,
+                "private_key": (company.private_key or '').replace('\\n',
+                                                                   '\n'),
+                "client_email": company.client_email,
+                "client_id": company.client_id_firebase,
+                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+                "client_x509_cert_url": company.client_cert_url,
+                "universe_domain": "googleapis.com"
+            })
+            return firebase_admin.initialize_app(cred, name=app_name)
+
+    def send_multicast(self, title, body, tokens, data=None):
+        from firebase_admin import messaging
+        try:
+            response = messaging.send_each_for_multicast(
+                messaging.MulticastMessage(
+                    notification=messaging.Notification(title=title,
+                                                        body=body),
+                    data=data or None,
+                    tokens=list(tokens),
+                ), app=self._get_app())
+        except Exception as e:
+            raise PushTransportError(str(e)) from e
+        error_classes = _firebase_error_classes()
+        results = []
+        for token, resp in zip(tokens, response.responses):
+            error = None
+            if not resp.success:
+                error = next((code for error_class, code in error_classes
+                              if isinstance(resp.exception, error_class)),
+                             RETRY_ERROR)
+            results.append(PushResult(token, resp.success, error))
+        return results
+
+
+class StubTransport(PushTransport):
+    """In-process transport recording what would have been sent.
+
+    Tokens listed in ``failing_tokens`` are answered with their error code,
+    one of ``TOKEN_ERRORS`` or ``RETRY_ERROR`` as the Firebase transport
+    reports them, every other token succeeds.
+    """
+    name = 'stub'
+    sent = []
+    failing_tokens = {}
+
+    def send_multicast(self, title, body, tokens, data=None):
+        self.sent.append({
+            'company_id': self.company.id,
+            'title': title,
+            'body': body,
+            'tokens': list(tokens),
+            'data': data,
+        })
+        _logger.info('Push notification "%s" sent to %s token(s) by the stub '
+                     'transport', title, len(tokens))
+        results = []
+        for token in tokens:
+            error = self.failing_tokens.get(token)
+            if error is not None and error not in TOKEN_ERRORS:
+                error = RETRY_ERROR
+            results.append(PushResult(token, error is None, error))
+        return results
+
+
+TRANSPORTS = {
+    transport.name: transport
+    for transport in (FirebaseTransport, StubTransport)
+}
+
+
+def get_transport(name, company):
+    """Instantiate the transport registered under ``name``."""
+    if name not in TRANSPORTS:
+        raise PushTransportError('Unknown push transport %r' % name)
+    return TRANSPORTS[name](company)
@@ -19,7 +19,59 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import fields, models
+import hashlib
+
+from odoo import api, fields, models, tools
+
+# Settings the service worker and the web client configuration are built from
+FIREBASE_WEB_FIELDS = ('push_notification', 'api_key', 'auth_domain',
+                       'project_id_firebase', 'storage_bucket',
+                       'messaging_sender_id_firebase', 'app_id_firebase',
+                       'measurement_id_firebase', 'vapid')
+
+FIREBASE_SW_TEMPLATE = """
+this.addEventListener('fetch', function(e) {
+  e.respondWith(
+    caches.match(e.request).then(function(response) {
+      return response || fetch(e.request);
+    })
+  );
+});
+importScripts('https://www.gstatic.com/firebasejs/8.4.2/firebase-app.js');
+importScripts('https://www.gstatic.com/firebasejs/8.4.2/firebase-messaging.js');
+var firebaseConfig = {
+    apiKey: '%(apiKey)s',
+    authDomain: '%(authDomain)s',
+    projectId: '%(projectId)s',
+    storageBucket: '%(storageBucket)s',
+    messagingSenderId: '%(messagingSenderId)s',
+    appId: '%(appId)s',
+    measurementId: '%(measurementId)s',
+};
+firebase.initializeApp(firebaseConfig);
+const messaging = firebase.messaging();
+messaging.setBackgroundMessageHandler(function(payload) {
+const notificationTitle = "Background Message Title";
+const notificationOptions = {
+    body: payload.notification.body,
+    icon:'/mail_push_notification/static/description/icon.png',
+};
+return self.registration.showNotification(
+    notificationTitle,
+    notificationOptions,
+);
+});
+"""
+
+FIREBASE_SW_DISABLED = """
+this.addEventListener('fetch', function(e) {
+  e.respondWith(
+    caches.match(e.request).then(function(response) {
+      return response || fetch(e.request);
+    })
+  );
+});
+"""
 
 
 class ResCompany(models.Model):
@@ -66,3 +118,54 @@ class ResCompany(models.Model):
     measurement_id_firebase = fields.Char(string="Measurement Id",
                                           help='Corresponding measurementId '
                                                'of firebase config')
+    firebase_config_date = fields.Datetime(string="Firebase Config Date",
+                                           readonly=True,
+                                           help='Last change of the firebase '
+                                                'web configuration')
+
+    def write(self, vals):
+        """Drop the cached service worker when the firebase settings change"""
+        if set(vals) & set(FIREBASE_WEB_FIELDS):
+            vals = dict(vals, firebase_config_date=fields.Datetime.now())
+            res = super().write(vals)
+            self.env.registry.clear_cache()
+            return res
+        return super().write(vals)
+
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_firebase_web_config(self, company_id):
+        """Firebase web configuration of the company, or None when push
+        notifications are disabled"""
+        company = self.browse(company_id).sudo()
+        if not company.push_notification:
+            return None
+        return {
+            'vapid': company.vapid,
+            'config': {
+                'apiKey': company.api_key,
+                'authDomain': company.auth_domain,
+                'projectId': company.project_id_firebase,
+                'storageBucket': company.storage_bucket,
+                'messagingSenderId': company.messaging_sender_id_firebase,
+                'appId': company.app_id_firebase,
+                'measurementId': company.measurement_id_firebase,
+            },
+        }
+
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_firebase_service_worker(self, company_id):
+        """(script, etag, last_modified) of the firebase service worker,
+        built once per configuration change"""
+        web_config = self._get_firebase_web_config(company_id)
+        if web_config:
+            script = FIREBASE_SW_TEMPLATE % {
+                key: value or '' for key, value in web_config['config'].items()
+            }
+        else:
+            script = FIREBASE_SW_DISABLED
+        company = self.browse(company_id).sudo()
+        last_modified = company.firebase_config_date or company.write_date
+        etag = hashlib.sha1(script.encode()).hexdigest()
+        return script, etag, last_modified
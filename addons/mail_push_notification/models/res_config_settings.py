@@ -19,8 +19,6 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from firebase_admin import initialize_app, _apps
-from firebase_admin import credentials
 from odoo import fields, models, _
 
 
@@ -97,6 +95,10 @@ class ResConfigSettings(models.TransientModel):
         if not self.env.company.push_notification:
             return False
         try:
+            # Imported here so that loading the registry does not import the
+            # firebase SDK when push notifications are unused
+            from firebase_admin import initialize_app, _apps
+            from firebase_admin import credentials
             # Initialize the firebase app with the credentials
             if not _apps:
                 cred = credentials.Certificate(
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Gokul PI (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import Command
+from odoo.addons.mail.tests.common import mail_new_test_user
+from odoo.tests import TransactionCase, tagged
+
+from ..models.push_transport import StubTransport
+
+
+@tagged('post_install', '-at_install')
+class TestPushReceivers(TransactionCase):
+    """Posting in a channel queues its push notification in a number of
+    queries independent of the number of members."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env.company.push_notification = True
+        cls.env['ir.config_parameter'].sudo().set_param(
+            'mail_push_notification.transport', 'stub')
+        cls.author = mail_new_test_user(
+            cls.env, login='push_author', groups='base.group_user')
+        cls.members = cls.env['res.users']
+        for index in range(50):
+            cls.members |= mail_new_test_user(
+                cls.env, login='push_member_%s' % index,
+                groups='base.group_user')
+        cls.env['push.notification'].create([{
+            'user_id': user.id,
+            'register_id': 'token-%s' % user.id,
+        } for user in cls.members | cls.author])
+        cls.small_channel = cls._create_channel(cls.members[:2])
+        cls.large_channel = cls._create_channel(cls.members)
+
+    @classmethod
+    def _create_channel(cls, users):
+        return cls.env['discuss.channel'].create({
+            'name': 'Push %s members' % len(users),
+            'channel_type': 'channel',
+            'channel_member_ids': [
+                Command.create({'partner_id': partner.id})
+                for partner in (users | cls.author).partner_id
+            ],
+        })
+
+    def setUp(self):
+        super().setUp()
+        self.patch(StubTransport, 'sent', [])
+
+    def _post(self, channel):
+        """Queries of one post in ``channel``, after a first post warming
+        up the caches."""
+        channel = channel.with_user(self.author)
+        channel.message_post(body='Warm up', message_type='comment',
+                             subtype_xmlid='mail.mt_comment')
+        self.env.flush_all()
+        self.env.invalidate_all()
+        query_count = self.cr.sql_log_count
+        channel.message_post(body='Hello', message_type='comment',
+                             subtype_xmlid='mail.mt_comment')
+        self.env.flush_all()
+        return self.cr.sql_log_count - query_count
+
+    def test_receiver_query_count(self):
+        small_count = self._post(self.small_channel)
+        large_count = self._post(self.large_channel)
+        self.assertEqual(small_count, large_count)
+
+    def test_receiver_tokens(self):
+        self._post(self.large_channel)
+        outbox = self.env['push.notification.outbox'].search(
+            [('message_id', '=', self.large_channel.message_ids[0].id)])
+        self.assertEqual(len(outbox), 1)
+        self.assertEqual(
+            set(outbox.tokens),
+            {'token-%s' % user.id for user in self.members})
+        outbox._process_outbox(auto_commit=False)
+        self.assertEqual(outbox.state, 'sent')
+        self.assertEqual(
+            {token for sent in StubTransport.sent for token in sent['tokens']},
+            {'token-%s' % user.id for user in self.members})
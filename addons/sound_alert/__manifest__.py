@@ -15,6 +15,7 @@
     'depends': ['base', 'web', 'base_setup', 'bus', 'mail'],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'views/sound_alert_views.xml'
     ],
     'assets': {
@@ -23,9 +24,6 @@
             'sound_alert/static/src/css/main.css'
         ]
     },
-    'external_dependencies': {
-        'python': ['gTTS'],
-    },
     'demo': [
         'demo/demo.xml'
     ],
@@ -17,7 +17,9 @@ class SoundController(http.Controller):
         :param kw: {
                         "params": {
                             "partner_id": 3,
-                            "partner_ids": [2,3]
+                            "partner_ids": [2,3],
+                            "group_ids": [1],
+                            "company_ids": [1]
                         }
                     }
         :return: None
@@ -28,14 +30,36 @@ class SoundController(http.Controller):
         if not alert_rec:
             _logger.warning("No Alert Record with the id: %s present in the system!", alert_id)
         else:
-            params = {
-                'sound_stream': alert_rec.sound_alert_binary if alert_rec.alert_type == 'sound' else alert_rec.voice_alert_binary
-            }
-            if kw.get('partner_id', False):
-                request.env['bus.bus']._sendone(request.env['res.partner'].browse(kw.get("partner_id")), 'voice_alert_sound', params)
-            if kw.get("partner_ids", []):
-                notifications = [[x, 'voice_alert_sound', params] for x in request.env['res.partner'].browse(kw.get("partner_ids"))]
-                request.env['bus.bus']._sendmany(notifications)
+            Alert = request.env["sound_alert.alerts"].sudo()
+            params = Alert._get_audio_params(alert_rec.sudo()._get_audio_attachment())
+            if not params:
+                return
+            partner_ids = ([kw["partner_id"]] if kw.get("partner_id") else []) + list(kw.get("partner_ids") or [])
+            if kw.get("group_ids") or kw.get("company_ids"):
+                partner_ids += Alert._get_broadcast_partner_ids(kw.get("group_ids"), kw.get("company_ids"))
+            Alert._send_alert(params, partner_ids)
+
+    @http.route("/sound_alert/audio/<string:checksum>", methods=["GET"], type="http", auth="user")
+    def sound_alert_audio(self, checksum, **kw):
+        """
+        Serve an alert audio by the sha1 of its content. As the URL changes with the content, the
+        response is cached by the browser for a year without revalidation, and byte ranges are
+        honoured so that the audio element can seek and resume.
+        """
+        attachment = request.env['ir.attachment'].sudo().search([
+            ('checksum', '=', checksum),
+            ('res_model', 'in', ('sound_alert.alerts', 'sound_alert.voice.cache')),
+            # Without a res_field term, field attachments are filtered out by ir.attachment
+            ('res_field', 'in', ('sound_alert_binary', 'voice_alert_binary', 'audio')),
+        ], limit=1)
+        if not attachment:
+            raise request.not_found()
+        stream = request.env['ir.binary']._get_stream_from(attachment)
+        response = stream.get_response(immutable=True)
+        if stream.type == 'data':
+            # Files served from disk get range support from send_file already
+            response.make_conditional(request.httprequest, accept_ranges=True, complete_length=stream.size)
+        return response
 
     def authenticate_user(self):
         """
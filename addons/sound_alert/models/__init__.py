@@ -1 +1,2 @@
 from . import sound_alert
+from . import sound_alert_voice_cache
@@ -1,10 +1,21 @@
 # -*- coding: utf-8 -*-
-import base64
 import io
+import logging
+import time
 
-import gtts
 from odoo import models, fields, api
 
+from .sound_alert_voice_cache import VoiceCacheConflict
+from .tts_engines import ENGINES, TTSError
+
+_logger = logging.getLogger(__name__)
+
+# (dbname, sound url, partner id): monotonic time the alert was last sent by this worker
+_recent_alerts = {}
+
+# Fields from which the voice audio is generated
+VOICE_FIELDS = ('alert_type', 'voice_alert_text', 'voice_lang', 'voice_engine')
+
 
 class SoundAlert(models.Model):
     _name = 'sound_alert.alerts'
@@ -20,6 +31,12 @@ class SoundAlert(models.Model):
     # Voice Alert Options
     voice_alert_text = fields.Text(string="Voice Alert Text", default="This is Alert!")
     voice_alert_binary = fields.Binary(attachment=True, string="Voice Audio File")
+    voice_lang = fields.Char(string="Voice Language", default="en", help="Language code of the voice, e.g. en, fr")
+    voice_engine = fields.Selection(selection=[(name, engine.label) for name, engine in ENGINES.items()],
+                                    string="Voice Engine", default=lambda self: self._default_voice_engine())
+    voice_status = fields.Selection(selection=[("pending", "Pending"), ("ready", "Ready"), ("failed", "Failed")],
+                                    string="Voice Status", default="ready", readonly=True, copy=False)
+    voice_error = fields.Text(string="Voice Error", readonly=True, copy=False)
 
     # computed fields
     python_model_text = fields.Char(compute="get_python_model_text")
@@ -27,40 +44,108 @@ class SoundAlert(models.Model):
     api_admin_demo_user_demo_text = fields.Char(compute="get_api_admin_demo_user_demo_text")
     api_admin_custom_text_demo_text = fields.Char(compute="get_api_admin_custom_text_demo_text")
 
+    @api.model
+    def _default_voice_engine(self):
+        return self.env['ir.config_parameter'].sudo().get_param('sound_alert.tts_engine', 'gtts')
+
     @api.model_create_multi
     def create(self, vals_list):
         res = super(SoundAlert, self).create(vals_list)
-        for rec in res:
-            if rec.alert_type == 'voice' and rec.voice_alert_text:
-                rec.update_voice_binary_file()
+        res.filtered(lambda rec: rec.alert_type == 'voice' and rec.voice_alert_text).update_voice_binary_file()
         return res
 
     def write(self, data):
         res = super(SoundAlert, self).write(data)
-        if (any(['alert_type' in data, 'voice_alert_text' in data]) and self.alert_type == 'voice'
-                and self.voice_alert_text):
-            self.update_voice_binary_file()
+        if set(data) & set(VOICE_FIELDS):
+            self.filtered(lambda rec: rec.alert_type == 'voice' and rec.voice_alert_text).update_voice_binary_file()
         return res
 
     def update_voice_binary_file(self):
-        file_obj = self.get_voice_binary_file(self.voice_alert_text)
-        self.write({'voice_alert_binary': file_obj.read()})
+        """Queue the voice generation, done by the voice cron outside of the current request"""
+        if not self:
+            return
+        super(SoundAlert, self).write({'voice_status': 'pending', 'voice_error': False})
+        self.env.ref('sound_alert.ir_cron_generate_voice_alerts').sudo()._trigger()
 
     def get_voice_binary_file(self, voice_alert_text):
-        sound_byte = gtts.gTTS(voice_alert_text)
-        file_obj = io.BytesIO()
-        for idx, decoded in enumerate(sound_byte.stream()):
-            file_obj.write(base64.b64encode(decoded))
-        file_obj.seek(0)
-        return file_obj
+        """Base64 voice audio of a text with the default engine, from the voice cache"""
+        cache = self.env['sound_alert.voice.cache']._get_voice(voice_alert_text, 'en', self._default_voice_engine())
+        return io.BytesIO(cache.with_context(bin_size=False).audio)
+
+    def _generate_voice(self):
+        self.ensure_one()
+        cache = self.env['sound_alert.voice.cache']._get_voice(
+            self.voice_alert_text, self.voice_lang or 'en', self.voice_engine or self._default_voice_engine())
+        super(SoundAlert, self).write({
+            'voice_alert_binary': cache.with_context(bin_size=False).audio,
+            'voice_status': 'ready',
+            'voice_error': False,
+        })
+
+    @api.model
+    def _cron_generate_voice(self, auto_commit=True):
+        """Generate the audio of the pending voice alerts, one transaction per alert.
+
+        A failing alert is marked failed and the run goes on with the next ones.
+        """
+        self.env.cr.execute("""
+            SELECT id FROM sound_alert_alerts
+             WHERE voice_status = 'pending'
+             ORDER BY id
+               FOR UPDATE SKIP LOCKED
+        """)
+        retry = False
+        for alert in self.browse([row[0] for row in self.env.cr.fetchall()]):
+            try:
+                with self.env.cr.savepoint():
+                    alert._generate_voice()
+            except VoiceCacheConflict:
+                # Cached concurrently, the voice is found on the next run
+                retry = True
+            except Exception as e:
+                if isinstance(e, TTSError):
+                    _logger.warning("Voice generation of alert %s failed: %s", alert.id, e)
+                else:
+                    _logger.exception("Voice generation of alert %s failed", alert.id)
+                super(SoundAlert, alert).write({'voice_status': 'failed', 'voice_error': str(e)})
+            if auto_commit:
+                self.env.cr.commit()
+        if retry:
+            self.env.ref('sound_alert.ir_cron_generate_voice_alerts').sudo()._trigger()
+
+    def action_regenerate_voice(self):
+        self.filtered(lambda rec: rec.alert_type == 'voice' and rec.voice_alert_text).update_voice_binary_file()
+
+    def _get_audio_field(self):
+        return 'sound_alert_binary' if self.alert_type == 'sound' else 'voice_alert_binary'
+
+    def _get_audio_attachment(self):
+        """Attachment holding the alert audio; the filestore keys it by the sha1 of its content"""
+        self.ensure_one()
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', self._get_audio_field()),
+        ], limit=1)
+
+    @api.model
+    def _get_custom_voice_attachment(self, voice_text, lang='en'):
+        """Attachment of a custom voice text, synthesized once per (text, language, engine)"""
+        cache = self.env['sound_alert.voice.cache']._get_voice(voice_text, lang or 'en', self._default_voice_engine())
+        return cache._get_audio_attachment()
+
+    @api.model
+    def _get_audio_params(self, attachment):
+        """Bus/action payload: the content-addressed URL of the audio, never the audio itself"""
+        if not attachment:
+            return {}
+        return {'sound_url': '/sound_alert/audio/%s' % attachment.checksum}
 
     def generate_alert(self):
         return {
             'type': 'ir.actions.client',
             'tag': "generate_sound_alert",
-            'params': {
-                'sound_stream': self.sound_alert_binary if self.alert_type == 'sound' else self.voice_alert_binary,
-            }
+            'params': self._get_audio_params(self._get_audio_attachment()),
         }
 
     @api.model
@@ -69,24 +154,81 @@ class SoundAlert(models.Model):
         return rec_id.generate_alert()
 
     @api.model
-    def generate_sound_to_partners(self, alert_rec_id=0, partner_id=0, partner_ids=(), custom_voice_text=""):
+    def generate_sound_to_partners(self, alert_rec_id=0, partner_id=0, partner_ids=(), custom_voice_text="",
+                                   voice_lang="en"):
+        params = self._get_broadcast_params(alert_rec_id, custom_voice_text, voice_lang)
+        if not params:
+            return
+        partner_ids = ([partner_id] if partner_id else []) + list(partner_ids or ())
+        self._send_alert(params, partner_ids)
+
+    @api.model
+    def broadcast_sound(self, alert_rec_id=0, group_ids=(), company_ids=(), custom_voice_text="", voice_lang="en"):
+        """
+        Play the alert for every active user of the given groups and/or companies, e.g.
+        self.env['sound_alert.alerts'].broadcast_sound(alert_rec_id=1, group_ids=[ref('base.group_user')])
+        """
+        params = self._get_broadcast_params(alert_rec_id, custom_voice_text, voice_lang)
+        if not params:
+            return
+        self._send_alert(params, self._get_broadcast_partner_ids(group_ids, company_ids))
+
+    @api.model
+    def _get_broadcast_params(self, alert_rec_id=0, custom_voice_text="", voice_lang="en"):
         alert_rec = self.browse(alert_rec_id)
-        params = {}
         if alert_rec:
-            params[
-                'sound_stream'] = alert_rec.sound_alert_binary if alert_rec.alert_type == 'sound' else alert_rec.voice_alert_binary
-        elif custom_voice_text:
-            params['sound_stream'] = self.get_voice_binary_file(custom_voice_text).read()
-        else:
-            return
+            return self._get_audio_params(alert_rec._get_audio_attachment())
+        if custom_voice_text:
+            return self._get_audio_params(self._get_custom_voice_attachment(custom_voice_text, voice_lang))
+        return {}
 
-        if partner_id:
-            partner_rec_id = self.env['res.partner'].browse(partner_id)
-            self.env['bus.bus'].sudo()._sendone(partner_rec_id, 'voice_alert_sound', params)
-        if partner_ids:
-            partner_rec_ids = self.env['res.partner'].browse(partner_ids)
-            notifications = [[x, 'voice_alert_sound', params] for x in partner_rec_ids]
-            self.env['bus.bus'].sudo()._sendmany(notifications)
+    @api.model
+    def _get_broadcast_partner_ids(self, group_ids=(), company_ids=()):
+        """Partners of the active users in any of the groups and any of the companies, in one query"""
+        self.env['res.users'].flush_model(['active', 'partner_id', 'groups_id', 'company_ids'])
+        self.env.cr.execute("""
+            SELECT DISTINCT u.partner_id
+              FROM res_users u
+             WHERE u.active
+               AND (%(all_groups)s OR EXISTS (
+                       SELECT 1 FROM res_groups_users_rel g WHERE g.uid = u.id AND g.gid = ANY(%(group_ids)s)))
+               AND (%(all_companies)s OR EXISTS (
+                       SELECT 1 FROM res_company_users_rel c WHERE c.user_id = u.id AND c.cid = ANY(%(company_ids)s)))
+        """, {
+            'all_groups': not group_ids,
+            'group_ids': list(group_ids or ()),
+            'all_companies': not company_ids,
+            'company_ids': list(company_ids or ()),
+        })
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _send_alert(self, params, partner_ids):
+        """
+        Send the alert to the partners in a single bus batch. Partners who got the same audio less than
+        sound_alert.coalesce_seconds ago on this worker are skipped; the web client drops the duplicates
+        that reach it through other workers. Sends are only remembered once their transaction commits,
+        so a rolled back alert does not hold back its retry.
+        """
+        window = float(self.env['ir.config_parameter'].sudo().get_param('sound_alert.coalesce_seconds', 3))
+        params = dict(params, coalesce_ms=int(window * 1000))
+        now = time.monotonic()
+        key_prefix = (self.env.cr.dbname, params.get('sound_url'))
+        # Shared by the request threads of the worker, entries may vanish concurrently
+        for key, sent_at in list(_recent_alerts.items()):
+            if now - sent_at > window:
+                _recent_alerts.pop(key, None)
+        to_notify = [partner_id for partner_id in dict.fromkeys(partner_ids)
+                     if key_prefix + (partner_id,) not in _recent_alerts]
+        if to_notify:
+            partners = self.env['res.partner'].browse(to_notify)
+            self.env['bus.bus'].sudo()._sendmany([(partner, 'voice_alert_sound', params) for partner in partners])
+
+            @self.env.cr.postcommit.add
+            def remember_sent():
+                sent_at = time.monotonic()
+                for partner_id in to_notify:
+                    _recent_alerts[key_prefix + (partner_id,)] = sent_at
 
     def get_python_model_text(self):
         self.python_model_text = "return self.env['sound_alert.alerts'].generate_sound_by_id(%s)" % self.id
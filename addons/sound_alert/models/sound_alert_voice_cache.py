@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+
+from psycopg2.errors import UniqueViolation
+
+from odoo import models, fields, api
+
+from .tts_engines import ENGINES, get_engine
+
+
+class VoiceCacheConflict(Exception):
+    """The voice is being cached by a concurrent transaction not visible yet"""
+
+
+class SoundAlertVoiceCache(models.Model):
+    _name = 'sound_alert.voice.cache'
+    _description = 'Sound Alert Voice Cache'
+
+    key = fields.Char(string="Key", required=True, index=True, help="sha1 of the text, language and engine")
+    text = fields.Text(string="Text", required=True)
+    lang = fields.Char(string="Language", required=True)
+    engine = fields.Selection(selection=[(name, engine.label) for name, engine in ENGINES.items()],
+                              string="Engine", required=True)
+    audio = fields.Binary(attachment=True, string="Audio")
+    mimetype = fields.Char(string="Mimetype")
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', "A voice is cached once per text, language and engine."),
+    ]
+
+    @api.model
+    def _get_key(self, text, lang, engine):
+        return hashlib.sha1('\x00'.join((text, lang, engine)).encode()).hexdigest()
+
+    @api.model
+    def _get_voice(self, text, lang, engine):
+        """Cached voice of the text, synthesized on the first request only
+
+        :raise TTSError: when the engine cannot synthesize the text
+        :raise VoiceCacheConflict: when a concurrent transaction cached the same voice first
+        """
+        key = self._get_key(text, lang, engine)
+        cache = self.sudo().search([('key', '=', key)], limit=1)
+        if not cache:
+            raw, mimetype = get_engine(engine).synthesize(text, lang)
+            try:
+                with self.env.cr.savepoint():
+                    cache = self.sudo().create({
+                        'key': key,
+                        'text': text,
+                        'lang': lang,
+                        'engine': engine,
+                        'audio': base64.b64encode(raw),
+                        'mimetype': mimetype,
+                    })
+                    # Served as is by the audio route, do not rely on content sniffing
+                    cache._get_audio_attachment().mimetype = mimetype
+            except UniqueViolation:
+                # Synthesized at the same time by another request
+                cache = self.sudo().search([('key', '=', key)], limit=1)
+                if not cache:
+                    raise VoiceCacheConflict(key)
+        return cache
+
+    def _get_audio_attachment(self):
+        self.ensure_one()
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', 'audio'),
+        ], limit=1)
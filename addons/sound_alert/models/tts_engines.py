@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Text-to-speech engines used to generate voice alerts.
+
+Each engine turns a text into audio bytes. The online gTTS engine is the default, espeak and the tone
+engine work on isolated servers. Register a new engine by adding a TTSEngine subclass to ENGINES.
+"""
+import io
+import math
+import shutil
+import struct
+import subprocess
+import wave
+
+
+class TTSError(Exception):
+    pass
+
+
+class TTSEngine:
+    name = None
+    label = None
+
+    def synthesize(self, text, lang):
+        """
+        :return: (audio bytes, mimetype)
+        """
+        raise NotImplementedError()
+
+
+class GTTSEngine(TTSEngine):
+    name = 'gtts'
+    label = 'Google Text-to-Speech (online)'
+
+    def synthesize(self, text, lang):
+        try:
+            import gtts
+        except ImportError:
+            raise TTSError("The gTTS python package is not installed.")
+        file_obj = io.BytesIO()
+        try:
+            gtts.gTTS(text, lang=lang or 'en').write_to_fp(file_obj)
+        except Exception as e:
+            raise TTSError(str(e)) from e
+        return file_obj.getvalue(), 'audio/mpeg'
+
+
+class EspeakEngine(TTSEngine):
+    name = 'espeak'
+    label = 'eSpeak (offline)'
+
+    def synthesize(self, text, lang):
+        binary = shutil.which('espeak-ng') or shutil.which('espeak')
+        if not binary:
+            raise TTSError("Neither espeak-ng nor espeak is installed on the server.")
+        try:
+            result = subprocess.run([binary, '-v', lang or 'en', '--stdout', text],
+                                    capture_output=True, check=True, timeout=60)
+        except (subprocess.SubprocessError, OSError) as e:
+            raise TTSError(str(e)) from e
+        return result.stdout, 'audio/wav'
+
+
+class ToneEngine(TTSEngine):
+    """Two-note chime, ignoring the text: always available."""
+    name = 'tone'
+    label = 'Tone (offline)'
+
+    sample_rate = 16000
+    notes = ((880.0, 0.18), (660.0, 0.28))
+
+    def synthesize(self, text, lang):
+        frames = bytearray()
+        for frequency, duration in self.notes:
+            count = int(self.sample_rate * duration)
+            for i in range(count):
+                # Short linear fade in/out to avoid clicks
+                envelope = min(1.0, i / 200.0, (count - i) / 200.0)
+                sample = 0.5 * envelope * math.sin(2 * math.pi * frequency * i / self.sample_rate)
+                frames += struct.pack('<h', int(sample * 32767))
+        file_obj = io.BytesIO()
+        with wave.open(file_obj, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(bytes(frames))
+        return file_obj.getvalue(), 'audio/wav'
+
+
+ENGINES = {engine.name: engine for engine in (GTTSEngine, EspeakEngine, ToneEngine)}
+
+
+def get_engine(name):
+    if name not in ENGINES:
+        raise TTSError("Unknown text-to-speech engine %r." % name)
+    return ENGINES[name]()
@@ -3,9 +3,21 @@
 import { registry } from "@web/core/registry";
 import { patch } from "@web/core/utils/patch";
 
+// Time each alert url was last played, to merge repeated alerts instead of replaying them
+const lastPlayed = new Map();
+
 export function generateSoundAlert(env, action) {
-    if (action.params.sound_stream) {
-        var audio = new window.Audio("data:audio/mp3;base64," + action.params.sound_stream);
+    const { sound_url, sound_stream, coalesce_ms } = action.params;
+    if (sound_url && coalesce_ms) {
+        const now = Date.now();
+        if (now - (lastPlayed.get(sound_url) || 0) < coalesce_ms) {
+            return;
+        }
+        lastPlayed.set(sound_url, now);
+    }
+    if (sound_url || sound_stream) {
+        // The url is content-addressed, repeated alerts are served from the browser cache
+        var audio = new window.Audio(sound_url || "data:audio/mp3;base64," + sound_stream);
         audio.currentTime = 0;
         audio.loop = false;
         audio.volume = 1;
@@ -16,8 +28,8 @@ export function generateSoundAlert(env, action) {
 export const generateVoiceSoundAlert = {
     dependencies: ["bus_service", "notification"],
     start(env, { bus_service, notification: notificationService}) {
-        bus_service.subscribe("voice_alert_sound", ({ sound_stream }) => {
-            generateSoundAlert(env, {'params': {'sound_stream': sound_stream}});
+        bus_service.subscribe("voice_alert_sound", ({ sound_url, sound_stream, coalesce_ms }) => {
+            generateSoundAlert(env, {'params': {'sound_url': sound_url, 'sound_stream': sound_stream, 'coalesce_ms': coalesce_ms}});
         });
         bus_service.start();
     },